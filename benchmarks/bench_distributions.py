@@ -0,0 +1,55 @@
+"""Benchmark of creating the distribution of the number of duplicates.
+
+Compares the former Zipf distribution (its normalising sum runs over all
+original records) with the closed-form distribution of
+'DuplicateGen._count_distribution', for several numbers of original records.
+
+   USAGE:
+     python -m benchmarks.bench_distributions [max_num_dups]
+"""
+
+import contextlib
+import io
+import sys
+import time
+
+import duplicategenerator
+
+
+def zipf_loop(num_org_records, max_num_dups):
+    zipf_theta = 0.5
+
+    denom = 0.0
+    for i in range(num_org_records):
+        denom += 1.0 / (i + 1) ** (1.0 - zipf_theta)
+
+    zipf_c = 1.0 / denom
+    zipf_num = [zipf_c / ((i + 1) ** (1.0 - zipf_theta)) for i in range(max_num_dups)]
+    zipf_sum = sum(zipf_num)
+
+    return [num / zipf_sum for num in zipf_num]
+
+
+def main(max_num_dups=9):
+    print("%12s %12s %12s" % ("originals", "loop (s)", "closed (s)"))
+
+    for num_org_records in [10 ** 5, 10 ** 6, 10 ** 7]:
+        with contextlib.redirect_stdout(io.StringIO()):
+            dupgen = duplicategenerator.DuplicateGen(
+                num_org_records, num_org_records, max_num_dups, 1, 1, "zip", "typ"
+            )
+
+        start = time.perf_counter()
+        zipf_loop(num_org_records, max_num_dups)
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            dupgen._duplicate_distribution()
+        closed_time = time.perf_counter() - start
+
+        print("%12d %12.4f %12.4f" % (num_org_records, loop_time, closed_time))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
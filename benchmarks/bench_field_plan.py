@@ -0,0 +1,49 @@
+"""Benchmark of the scalar generation loops (which use the compiled field
+plan of the 'fields' module).
+
+Reports the number of records per second of 'DuplicateGen.generate_iter'
+with the "scalar" engine, for (nearly only) original records and for original and
+duplicate records, with typographical and with all modification types.
+
+   USAGE:
+     python -m benchmarks.bench_field_plan [num_org_records]
+"""
+
+import contextlib
+import io
+import sys
+import time
+
+import duplicategenerator
+
+
+def main(num_org_records=20000):
+    print("%-12s %-6s %10s %12s" % ("records", "types", "time (s)", "records/s"))
+
+    for rec_types, num_dup_records in [
+        ("originals", 1),
+        ("duplicates", num_org_records),
+    ]:
+        for type_modification in ["typ", "all"]:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                dupgen = duplicategenerator.DuplicateGen(
+                    num_org_records, num_dup_records, 5, 2, 4, "poi",
+                    type_modification, culture="eng", seed=1,
+                )
+                num_records = sum(
+                    len(chunk) for chunk in dupgen.generate_iter(10000, "list")
+                )
+            gen_time = time.perf_counter() - start
+
+            print(
+                "%-12s %-6s %10.2f %12.0f"
+                % (rec_types, type_modification, gen_time, num_records / gen_time)
+            )
+
+            if num_dup_records == 1:
+                break  # Modification types only matter for duplicates
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,66 @@
+"""Benchmark of the selection of fields to modify in duplicates.
+
+Compares the cost per selection of the former rejection loop (draw a field
+with the alias sampler until a field without its maximal number of
+modifications is found) with the selection used in
+'DuplicateGen._create_duplicate_records' (one draw with the alias sampler,
+then one draw with the 'utils.DynamicSampler' of the fields that can still
+be modified), for a growing number of saturated fields.
+
+   USAGE:
+     python -m benchmarks.bench_field_select [num_fields] [num_selections]
+"""
+
+import random
+import sys
+import time
+
+from duplicategenerator import utils
+
+
+def main(num_fields=12, num_selections=200000):
+    rng = random.Random(1)
+    weights = [rng.random() for i in range(num_fields)]
+    total_weight = sum(weights)
+
+    select_sampler = utils.DiscreteSampler(list(range(num_fields)), weights)
+    field_sampler = utils.DynamicSampler(list(range(num_fields)), weights)
+
+    print(
+        "%-10s %12s %16s %14s"
+        % ("saturated", "weight (%)", "rejection (us)", "dynamic (us)")
+    )
+
+    for num_saturated in range(num_fields):
+        saturated = [i < num_saturated for i in range(num_fields)]
+        field_sampler.reset()
+        for i in range(num_saturated):
+            field_sampler.remove(i)
+
+        start = time.perf_counter()
+        for n in range(num_selections):
+            field = select_sampler.sample(rng)
+            while saturated[field]:
+                field = select_sampler.sample(rng)
+        rejection_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for n in range(num_selections):
+            field = select_sampler.sample(rng)
+            if saturated[field]:
+                field = field_sampler.sample_index(rng)
+        dynamic_time = time.perf_counter() - start
+
+        print(
+            "%-10d %12.1f %16.3f %14.3f"
+            % (
+                num_saturated,
+                100.0 * sum(weights[:num_saturated]) / total_weight,
+                rejection_time / num_selections * 1e6,
+                dynamic_time / num_selections * 1e6,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
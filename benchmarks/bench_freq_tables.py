@@ -0,0 +1,70 @@
+"""Benchmark of loading the bundled frequency files.
+
+For each '*-freq.csv' file in the data directory, compares the load time and
+the memory of the frequency-expanded (and shuffled) value list used before
+with the FrequencySampler over the distinct values.
+
+   USAGE:
+     python -m benchmarks.bench_freq_tables
+"""
+
+import os
+import random
+import time
+import tracemalloc
+
+from duplicategenerator import utils
+
+
+def load_expanded_list(file_name):
+    value_list = []
+    with open(file_name) as fin:
+        for line in fin:
+            line_list = line.strip().split(",")
+            value_list += [line_list[0].strip()] * int(line_list[1])
+    random.shuffle(value_list)
+    return value_list
+
+
+def measure(func, file_name):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(file_name)
+    load_time = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, load_time, memory
+
+
+def main():
+    data_dir = os.path.join(os.path.dirname(utils.__file__), "data")
+
+    print(
+        "%-22s %9s %9s %11s %11s %11s %11s"
+        % ("file", "values", "total", "list (s)", "sampler (s)", "list (KB)", "sampler (KB)")
+    )
+    for file_name in sorted(os.listdir(data_dir)):
+        if not file_name.endswith("-freq.csv"):
+            continue
+        path = os.path.join(data_dir, file_name)
+
+        value_list, list_time, list_memory = measure(load_expanded_list, path)
+        del value_list
+        sampler, sampler_time, sampler_memory = measure(utils.load_frequency_file, path)
+
+        print(
+            "%-22s %9d %9d %11.3f %11.3f %11.1f %11.1f"
+            % (
+                file_name,
+                len(sampler),
+                sampler.total,
+                list_time,
+                sampler_time,
+                list_memory / 1024.0,
+                sampler_memory / 1024.0,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
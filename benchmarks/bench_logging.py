@@ -0,0 +1,126 @@
+"""Benchmark of the cost of the trace events of the generation.
+
+First compares, per event and with the DEBUG level disabled, an empty
+statement, the former check of the verbose attribute, a trace event guarded
+by the flag precomputed in the generation loops ('if trace: logger.debug')
+and an unguarded 'logger.debug' call. Then creates the same duplicates with
+'DuplicateGen._create_duplicate_records' with the DEBUG level disabled and
+enabled (events logged into a null handler).
+
+   USAGE:
+     python -m benchmarks.bench_logging [num_org_records] [num_dup_records]
+"""
+
+import contextlib
+import io
+import logging
+import random
+import sys
+import time
+import timeit
+
+import numpy
+
+import duplicategenerator
+from duplicategenerator import fields
+from duplicategenerator import generate
+from duplicategenerator import uniqueness
+from duplicategenerator import utils
+
+
+class Verbose:
+    VERBOSE_OUTPUT = False
+
+
+def event_costs(num_events=1000000):
+    logger = generate.logger
+    trace = logger.isEnabledFor(logging.DEBUG)
+    setup = "value = 'peter'"
+    env = {"logger": logger, "trace": trace, "dupgen": Verbose()}
+
+    statements = [
+        ("empty", "pass"),
+        ("verbose", "if dupgen.VERBOSE_OUTPUT == True: pass"),
+        ("guarded", "if trace: logger.debug('    Changed %s -> %s', value, value)"),
+        ("unguarded", "logger.debug('    Changed %s -> %s', value, value)"),
+    ]
+    print("%-10s %12s" % ("event", "cost (ns)"))
+    for name, statement in statements:
+        cost = min(
+            timeit.repeat(statement, setup, number=num_events, repeat=3, globals=env)
+        )
+        print("%-10s %12.1f" % (name, cost / num_events * 1e9))
+
+
+def create_duplicates(dupgen, org_rec, num_dup_records):
+    dupgen._rng = random.Random(1)
+    dupgen._transformation_cache = utils.TransformationCache(
+        dupgen.transformation_cache_size
+    )
+    all_rec_index = uniqueness.create_index(dupgen.unique_index)
+    for rec_dict in org_rec:
+        all_rec_index.add(rec_dict)
+
+    start = time.perf_counter()
+    dupgen._create_duplicate_records(
+        org_rec,
+        dupgen._dup_count_sampler,
+        org_rec,
+        dupgen._select_sampler,
+        all_rec_index,
+        dupgen._freq_files,
+        num_dup_records,
+    )
+    return time.perf_counter() - start
+
+
+def main(num_org_records=20000, num_dup_records=20000):
+    event_costs()
+    print()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        dupgen = duplicategenerator.DuplicateGen(
+            num_org_records=num_org_records,
+            num_dup_records=num_dup_records,
+            max_num_dups=5,
+            max_num_field_modifi=2,
+            max_num_record_modifi=4,
+            prob_distribution="poisson",
+            type_modification="all",
+        )
+        dupgen._dup_count_sampler = dupgen._duplicate_distribution()
+        dupgen._freq_files = dupgen._load_frequency_lookup_tables()
+
+    dupgen._field_plan = fields.compile_field_plan(
+        dupgen.field_list, dupgen._freq_files, dupgen.culture
+    )
+    dupgen._swap_pairs = fields.compile_swap_pairs(dupgen.field_swap_prob)
+    dupgen._select_sampler = utils.DiscreteSampler(
+        dupgen._field_plan, [field.select_prob for field in dupgen._field_plan]
+    )
+    org_rec = dupgen._create_original_records_batch(
+        dupgen._freq_files,
+        uniqueness.create_index(dupgen.unique_index),
+        numpy_rng=numpy.random.default_rng(1),
+    )
+
+    logger = generate.logger
+    handler = logging.NullHandler()
+    logger.addHandler(handler)
+    print("%-10s %16s" % ("DEBUG", "duplicates (1/s)"))
+    try:
+        for level in [logging.WARNING, logging.DEBUG]:
+            logger.setLevel(level)
+            elapsed = create_duplicates(dupgen, org_rec, num_dup_records)
+            print(
+                "%-10s %16.0f"
+                % ("enabled" if level == logging.DEBUG else "disabled",
+                   num_dup_records / elapsed)
+            )
+    finally:
+        logger.removeHandler(handler)
+        logger.setLevel(logging.NOTSET)
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
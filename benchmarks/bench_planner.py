@@ -0,0 +1,105 @@
+"""Benchmark of the creation of duplicate records.
+
+Creates the same number of duplicates from the same original records with
+the scalar loop ('DuplicateGen._create_duplicate_records', one duplicate
+and one modification at a time) and with the batched planner of the
+"numpy" engine ('DuplicateGen._create_duplicate_records_batch'), for each
+modification type, and reports the number of duplicates created per second.
+
+   USAGE:
+     python -m benchmarks.bench_planner [num_org_records] [num_dup_records]
+"""
+
+import contextlib
+import io
+import random
+import sys
+import time
+
+import numpy
+
+import duplicategenerator
+from duplicategenerator import fields
+from duplicategenerator import uniqueness
+from duplicategenerator import utils
+
+
+def create_duplicates(dupgen, engine, org_rec, num_dup_records):
+    dupgen.engine = engine
+    dupgen._rng = random.Random(1)
+    dupgen._transformation_cache = utils.TransformationCache(
+        dupgen.transformation_cache_size
+    )
+    numpy_rng = numpy.random.default_rng(1)
+
+    all_rec_index = uniqueness.create_index(dupgen.unique_index)
+    for rec_dict in org_rec:
+        all_rec_index.add(rec_dict)
+
+    if engine == "numpy":
+        create_duplicate_records = dupgen._create_duplicate_records_batch
+    else:
+        create_duplicate_records = dupgen._create_duplicate_records
+
+    start = time.perf_counter()
+    dup_rec, org_rec_used, dup_links = create_duplicate_records(
+        org_rec,
+        dupgen._dup_count_sampler,
+        org_rec,
+        dupgen._select_sampler,
+        all_rec_index,
+        dupgen._freq_files,
+        num_dup_records,
+        0,
+        numpy_rng,
+    )
+    return time.perf_counter() - start
+
+
+def main(num_org_records=20000, num_dup_records=20000):
+    print("%-5s %14s %14s %8s" % ("type", "scalar (1/s)", "numpy (1/s)", "speedup"))
+
+    for type_modification in ["typ", "pho", "ocr", "all"]:
+        with contextlib.redirect_stdout(io.StringIO()):
+            dupgen = duplicategenerator.DuplicateGen(
+                num_org_records=num_org_records,
+                num_dup_records=num_dup_records,
+                max_num_dups=5,
+                max_num_field_modifi=2,
+                max_num_record_modifi=4,
+                prob_distribution="poisson",
+                type_modification=type_modification,
+            )
+            dupgen._dup_count_sampler = dupgen._duplicate_distribution()
+            dupgen._freq_files = dupgen._load_frequency_lookup_tables()
+
+        dupgen._field_plan = fields.compile_field_plan(
+            dupgen.field_list, dupgen._freq_files, dupgen.culture
+        )
+        dupgen._swap_pairs = fields.compile_swap_pairs(dupgen.field_swap_prob)
+        dupgen._select_sampler = utils.DiscreteSampler(
+            dupgen._field_plan, [field.select_prob for field in dupgen._field_plan]
+        )
+
+        org_rec = dupgen._create_original_records_batch(
+            dupgen._freq_files,
+            uniqueness.create_index(dupgen.unique_index),
+            numpy_rng=numpy.random.default_rng(1),
+        )
+
+        scalar_time = create_duplicates(dupgen, "scalar", org_rec, num_dup_records)
+        numpy_time = create_duplicates(dupgen, "numpy", org_rec, num_dup_records)
+
+        print(
+            "%-5s %14.0f %14.0f %8.1f"
+            % (
+                type_modification,
+                num_dup_records / scalar_time,
+                num_dup_records / numpy_time,
+                scalar_time / numpy_time,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
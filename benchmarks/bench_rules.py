@@ -0,0 +1,49 @@
+"""Benchmark of the phonetic and OCR transformation rules.
+
+Compares the per-call time of the original rule scan (which re-reads the
+rule file for every call) with the compiled and cached rule sets.
+
+   USAGE:
+     python -m benchmarks.bench_rules [num_values]
+"""
+
+import os
+import random
+import sys
+import time
+
+from duplicategenerator import utils
+
+
+def load_values(file_name, num_values):
+    this_dir = os.path.dirname(utils.__file__)
+    values = []
+    with open(os.path.join(this_dir, "data", file_name)) as fin:
+        for line in fin:
+            values.append(line.split(",")[0].strip())
+    random.seed(0)
+    return random.sample(values, min(num_values, len(values)))
+
+
+def time_per_call(func, values, t):
+    start = time.perf_counter()
+    for value in values:
+        func(value, t)
+    return (time.perf_counter() - start) / len(values)
+
+
+def main(num_values=2000):
+    values = load_values("surname-freq.csv", num_values)
+    values += load_values("givenname-freq.csv", num_values)
+
+    print("%-5s %14s %14s %9s" % ("type", "scan (us)", "compiled (us)", "speedup"))
+    for t in ["pho", "ocr"]:
+        utils.get_transformation_changes("warm", t)  # Compile outside timing
+
+        old = time_per_call(utils._get_transformation_scan, values, t)
+        new = time_per_call(utils.get_transformation_changes, values, t)
+        print("%-5s %14.1f %14.1f %8.1fx" % (t, old * 1e6, new * 1e6, old / new))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
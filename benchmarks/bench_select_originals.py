@@ -0,0 +1,67 @@
+"""Benchmark of the selection of unused original records.
+
+Compares the cost per selection of the former rejection loop (draw a random
+record number until an unused record is found) with the swap-remove list
+of unused record numbers used in 'DuplicateGen._create_duplicate_records',
+for each tenth of the used fraction of original records.
+
+   USAGE:
+     python -m benchmarks.bench_select_originals [num_org_records]
+"""
+
+import random
+import sys
+import time
+
+
+def select_rejection(num_org_records, timings):
+    org_rec_used = {}
+    for rec_cnt in range(num_org_records):
+        start = time.perf_counter()
+        rand_rec_num = random.randint(0, num_org_records)
+        org_rec_id = "rec-%i-org" % (rand_rec_num)
+        while (org_rec_id in org_rec_used) or (rand_rec_num == num_org_records):
+            rand_rec_num = random.randint(0, num_org_records)
+            org_rec_id = "rec-%i-org" % (rand_rec_num)
+        org_rec_used[org_rec_id] = 1
+        timings[rec_cnt * 10 // num_org_records] += time.perf_counter() - start
+
+
+def select_swap_remove(num_org_records, timings):
+    unused_rec_nums = list(range(num_org_records))
+    for rec_cnt in range(num_org_records):
+        start = time.perf_counter()
+        unused_ind = random.randint(0, len(unused_rec_nums) - 1)
+        rand_rec_num = unused_rec_nums[unused_ind]
+        org_rec_id = "rec-%i-org" % (rand_rec_num)
+        unused_rec_nums[unused_ind] = unused_rec_nums[-1]
+        unused_rec_nums.pop()
+        timings[rec_cnt * 10 // num_org_records] += time.perf_counter() - start
+
+
+def main(num_org_records=200000):
+    bucket_size = num_org_records / 10.0
+
+    timings = {}
+    for name, func in [
+        ("rejection", select_rejection),
+        ("swap-remove", select_swap_remove),
+    ]:
+        timings[name] = [0.0] * 10
+        func(num_org_records, timings[name])
+
+    print("%-10s %16s %16s" % ("used", "rejection (us)", "swap-remove (us)"))
+    for bucket in range(10):
+        print(
+            "%3d-%3d%%   %16.2f %16.2f"
+            % (
+                bucket * 10,
+                bucket * 10 + 10,
+                timings["rejection"][bucket] / bucket_size * 1e6,
+                timings["swap-remove"][bucket] / bucket_size * 1e6,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
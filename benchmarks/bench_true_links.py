@@ -0,0 +1,61 @@
+"""Benchmark of finding the true links of a dataset.
+
+Compares 'DuplicateGen.generate_true_links' (parses the record identifiers
+of the whole dataframe) with 'utils.true_link_pairs' on the integer-coded
+duplicates, for datasets where each original record has up to
+'max_num_dups' duplicates.
+
+   USAGE:
+     python -m benchmarks.bench_true_links [max_num_dups]
+"""
+
+import contextlib
+import io
+import sys
+import time
+
+import numpy
+import pandas
+
+import duplicategenerator
+from duplicategenerator import utils
+
+
+def main(max_num_dups=9):
+    print("%12s %12s %12s %12s" % ("originals", "links", "parse (s)", "pairs (s)"))
+
+    rng = numpy.random.default_rng(1)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        dupgen = duplicategenerator.DuplicateGen(10, 10, 1, 1, 1, "uniform", "typ")
+
+    for num_org_records in [10 ** 4, 10 ** 5, 10 ** 6]:
+        num_dups = rng.integers(0, max_num_dups + 1, num_org_records)
+        org_nums = numpy.repeat(numpy.arange(num_org_records), num_dups)
+        dup_nums = numpy.arange(len(org_nums)) - numpy.repeat(
+            numpy.cumsum(num_dups) - num_dups, num_dups
+        )
+
+        rec_ids = ["rec-%i-org" % (i) for i in range(num_org_records)] + [
+            "rec-%i-dup-%i" % (o, d) for o, d in zip(org_nums.tolist(), dup_nums.tolist())
+        ]
+        df = pandas.DataFrame(index=pandas.Index(rec_ids, name="rec_id"))
+
+        start = time.perf_counter()
+        true_links = dupgen.generate_true_links(df)
+        parse_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        link_pairs = utils.true_link_pairs(org_nums, dup_nums)
+        pairs_time = time.perf_counter() - start
+
+        assert len(true_links) == len(link_pairs[0])
+
+        print(
+            "%12d %12d %12.4f %12.4f"
+            % (num_org_records, len(true_links), parse_time, pairs_time)
+        )
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,84 @@
+"""Benchmark of the keyboard typo modifications.
+
+Applies each typographical modification ("sub_prob", "ins_prob", "del_prob"
+and "trans_prob") once to each value of a list of surnames, with the scalar
+functions ('utils.error_position' and 'utils.error_character', one value at
+a time as in the generation loop) and with the batch kernel of the 'typos'
+module, and reports the number of modified values per second.
+
+   USAGE:
+     python -m benchmarks.bench_typos [num_values]
+"""
+
+import random
+import sys
+import time
+
+import numpy
+
+from duplicategenerator import resources
+from duplicategenerator import typos
+from duplicategenerator import utils
+
+len_offsets = {"sub_prob": 0, "ins_prob": 1, "del_prob": 0, "trans_prob": -1}
+
+
+def scalar_typo(value, op, char_range, field_range, rng):
+    """One modification as done by the scalar generation loop."""
+
+    pos = utils.error_position(value, len_offsets[op], rng)
+
+    if op == "sub_prob":
+        if pos is not None:
+            new_char = utils.error_character(value[pos], char_range, rng)
+            value = value[:pos] + new_char + value[pos + 1 :]
+    elif op == "ins_prob":
+        new_char = rng.choice(field_range)
+        if pos is not None:
+            value = value[:pos] + new_char + value[pos:]
+    elif (op == "del_prob") and (len(value) > 1):
+        value = value[:pos] + value[pos + 1 :]
+    elif (op == "trans_prob") and (len(value) > 1):
+        value = value[:pos] + value[pos + 1] + value[pos] + value[pos + 2 :]
+
+    return value
+
+
+def main(num_values=200000):
+    sampler = resources.load_table("freq", "surname-freq.csv")
+    values = sampler.sample_array(num_values, numpy.random.default_rng(1)).tolist()
+    lengths = numpy.array([len(value) for value in values])
+
+    kernel = typos.TypoKernel()
+    char_range = "alpha"
+    field_range = typos.range_chars[char_range]
+
+    print("%-11s %14s %14s %8s" % ("operation", "scalar (1/s)", "batch (1/s)", "speedup"))
+
+    for op in ["sub_prob", "ins_prob", "del_prob", "trans_prob"]:
+        rng = random.Random(1)
+        start = time.perf_counter()
+        for value in values:
+            scalar_typo(value, op, char_range, field_range, rng)
+        scalar_time = time.perf_counter() - start
+
+        numpy_rng = numpy.random.default_rng(1)
+        start = time.perf_counter()
+        positions = typos.error_positions(lengths, len_offsets[op], numpy_rng)
+        ops = numpy.full(num_values, typos.op_codes[op])
+        kernel.apply(values, ops, positions, char_range, numpy_rng)
+        batch_time = time.perf_counter() - start
+
+        print(
+            "%-11s %14.0f %14.0f %8.1f"
+            % (
+                op,
+                num_values / scalar_time,
+                num_values / batch_time,
+                scalar_time / batch_time,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,114 @@
+"""Benchmark of the indexes used to check that all records are different.
+
+For each number of records, reports the memory per record (bytes) and the
+number of records inserted per second of:
+  - str       The former set of 'str(sorted(items))' record strings
+  - set       uniqueness.RecordSetIndex (set of canonical record bytes)
+  - hash      uniqueness.RecordHashIndex (table of 128-bit hashes)
+  - hash-verify  The hash table with exact verification
+
+The records are synthetic, with the fields of the default configuration.
+Only the 'hash' index is run for more than 'max_set_records' records (the
+set based indexes need several GB for 10M records). The memory of the set
+based indexes is measured with tracemalloc on a sample of 'sample_records'
+records; the memory of the hash table is its exact size.
+
+   USAGE:
+     python -m benchmarks.bench_unique_index [num_records ...]
+"""
+
+import sys
+import time
+import tracemalloc
+
+from duplicategenerator import uniqueness
+
+default_sizes = [1000000, 10000000, 50000000]
+max_set_records = 1000000
+sample_records = 100000
+block_size = 100000
+
+
+class RecordStrIndex:
+    """The former uniqueness check with record strings."""
+
+    def __init__(self):
+        self.rec_set = set()
+
+    def add(self, rec_data):
+        rec_list = list(rec_data.items())
+        rec_list.sort()
+        rec_str = str(rec_list)
+        if rec_str in self.rec_set:
+            return False
+        self.rec_set.add(rec_str)
+        return True
+
+
+def create_index(name):
+    if name == "str":
+        return RecordStrIndex()
+    return uniqueness.create_index(name)
+
+
+def records(first_rec_num, num_records):
+    return [
+        {
+            "culture": "eng",
+            "sex": "fm"[i % 2],
+            "given_name": "given%i" % (i % 7919),
+            "surname": "surname%i" % (i % 104729),
+            "date_of_birth": "19%02i%02i%02i" % (i % 100, i % 12 + 1, i % 28 + 1),
+            "phone_number": "02%08i" % (i),
+            "national_identifier": str(1000000 + i),
+        }
+        for i in range(first_rec_num, first_rec_num + num_records)
+    ]
+
+
+def insert_rate(name, num_records):
+    index = create_index(name)
+    insert_time = 0.0
+    for first_rec_num in range(0, num_records, block_size):
+        block = records(first_rec_num, min(block_size, num_records - first_rec_num))
+        start = time.perf_counter()
+        for rec_data in block:
+            index.add(rec_data)
+        insert_time += time.perf_counter() - start
+    return index, num_records / insert_time
+
+
+def set_bytes_per_record(name):
+    block = records(0, sample_records)
+    tracemalloc.start()
+    index = create_index(name)
+    for rec_data in block:
+        index.add(rec_data)
+    del block  # Values only referenced by the index remain counted
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return memory / float(sample_records)
+
+
+def main(sizes):
+    print("%-12s %11s %14s %14s" % ("index", "records", "bytes/record", "records/s"))
+
+    for name in ["str", "set", "hash-verify", "hash"]:
+        for num_records in sizes:
+            if (name != "hash") and (num_records > max_set_records):
+                continue
+
+            index, rate = insert_rate(name, num_records)
+            if name == "hash":
+                bytes_per_record = index.nbytes / float(num_records)
+            else:
+                bytes_per_record = set_bytes_per_record(name)
+            del index
+
+            print(
+                "%-12s %11d %14.1f %14.0f" % (name, num_records, bytes_per_record, rate)
+            )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or default_sizes)
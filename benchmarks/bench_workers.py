@@ -0,0 +1,49 @@
+"""Benchmark of the generation with several worker processes.
+
+Reports the generation time and the number of records per second of
+'DuplicateGen.generate' for 1 up to 'max_workers' worker processes (default
+the number of CPU cores).
+
+   USAGE:
+     python -m benchmarks.bench_workers [num_org_records] [max_workers]
+"""
+
+import contextlib
+import io
+import os
+import sys
+import time
+
+import duplicategenerator
+
+
+def main(num_org_records=20000, max_workers=None):
+    if max_workers is None:
+        max_workers = os.cpu_count()
+
+    num_dup_records = num_org_records // 4
+
+    print("%8s %10s %12s %9s" % ("workers", "time (s)", "records/s", "speedup"))
+
+    base_time = None
+    for workers in range(1, max_workers + 1):
+        dupgen = duplicategenerator.DuplicateGen(
+            num_org_records, num_dup_records, 3, 2, 4, "poisson", "all",
+            culture="eng",
+        )
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            all_rec = dupgen.generate("dict", workers=workers)
+        gen_time = time.perf_counter() - start
+
+        if base_time is None:
+            base_time = gen_time
+
+        print(
+            "%8d %10.2f %12.0f %9.2f"
+            % (workers, gen_time, len(all_rec) / gen_time, base_time / gen_time)
+        )
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,60 @@
+"""Benchmark of the output file formats.
+
+Generates a dataset once (in chunks), then writes the same chunks with each
+writer and reports the writing time (including the conversion of the
+chunks into the output type of the writer) and the file size.
+
+   USAGE:
+     python -m benchmarks.bench_writers [num_org_records] [chunk_size]
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import duplicategenerator
+from duplicategenerator import writers
+
+
+def main(num_org_records=100000, chunk_size=20000):
+    dupgen = duplicategenerator.DuplicateGen(
+        num_org_records, num_org_records // 4, 3, 2, 4, "poi", "typ",
+        culture="eng", engine="numpy", seed=1,
+    )
+    with contextlib.redirect_stdout(io.StringIO()):
+        chunks = list(dupgen._generate_chunks(chunk_size, 1, None))
+    num_records = sum(len(records) for (records, rec_ids) in chunks)
+
+    print("%-8s %10s %12s %12s" % ("format", "time (s)", "records/s", "size (MB)"))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for file_format in writers.formats:
+            if (file_format in ["parquet", "arrow"]) and (writers.pyarrow is None):
+                continue
+
+            file_name = os.path.join(tmp_dir, "output." + file_format)
+
+            start = time.perf_counter()
+            with writers.open_writer(file_name, file_format) as writer:
+                for records, rec_ids in chunks:
+                    writer.write(
+                        dupgen._format_records(records, rec_ids, writer.output)
+                    )
+            write_time = time.perf_counter() - start
+
+            print(
+                "%-8s %10.2f %12.0f %12.2f"
+                % (
+                    file_format,
+                    write_time,
+                    num_records / write_time,
+                    os.path.getsize(file_name) / 1e6,
+                )
+            )
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
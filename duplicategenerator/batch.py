@@ -0,0 +1,292 @@
+"""Vectorized creation of original records with NumPy.
+
+Instead of creating one record (and making one random call per field) at a
+time, the OriginalBatchGenerator creates whole columns of field values with
+a 'numpy.random.Generator': frequency field values, dates, phone numbers,
+identifiers and missing values. Field dependencies ('depend' and
+'lookup_dict') are resolved with one vectorized draw for each group of
+records with the same dependency value.
+
+The columns follow the same distributions as the records created one at a
+time by 'DuplicateGen._create_original_records'.
+"""
+
+import string
+
+import numpy
+
+from duplicategenerator import utils
+from duplicategenerator import config as cf
+
+# First day of the Gregorian calendar (15 October 1582) as epoch day number.
+# From this day on epoch days can be converted with NumPy dates.
+#
+gregorian_start_epoch = utils.date_to_epoch(15, 10, 1582)
+last_epoch = utils.date_to_epoch(31, 12, 9999)
+
+art_prefix = ["KSD", "NSU", "MBA", "KSG", "FPL", "RUK", "KUL", "KMC", "KLH", "KUB", "MPK"]
+
+
+# =============================================================================
+
+
+def epochs_to_iso(epochs):
+    """Convert an array of epoch day numbers into an array of ISO date strings
+     (yyyymmdd).
+  """
+
+    epochs = numpy.asarray(epochs, dtype=numpy.int64)
+
+    if (len(epochs) > 0) and (
+        (epochs.min() < gregorian_start_epoch) or (epochs.max() > last_epoch)
+    ):
+        iso_list = []
+        for daynum in epochs.tolist():
+            rand_date = utils.epoch_to_date(daynum)
+            iso_list.append(rand_date[2] + rand_date[1] + rand_date[0])
+        return numpy.array(iso_list, dtype=object)
+
+    dates = numpy.datetime64("1900-01-01") + epochs.astype("timedelta64[D]")
+    iso_dates = numpy.char.replace(numpy.datetime_as_string(dates, unit="D"), "-", "")
+
+    return iso_dates.astype(object)
+
+
+# -----------------------------------------------------------------------------
+
+
+def columns_to_records(columns, field_names):
+    """Turn a dictionary of columns (with None for missing values) into a list
+     of record dictionaries (without missing values).
+  """
+
+    names = [name for name in field_names if name in columns]
+    col_lists = [columns[name].tolist() for name in names]
+
+    records = []
+    for row in zip(*col_lists):
+        rec_dict = {}
+        for name, value in zip(names, row):
+            if value is not None:
+                rec_dict[name] = value
+        records.append(rec_dict)
+
+    return records
+
+
+# =============================================================================
+
+
+class OriginalBatchGenerator:
+    """Create original record values column by column.
+
+     field_list  The list of (validated) field dictionaries.
+     freq_files  Dictionary with a FrequencySampler for each frequency field.
+     culture     If given, the value of the 'culture' field.
+     rng         A 'numpy.random.Generator'.
+  """
+
+    def __init__(self, field_list, freq_files, culture=None, rng=None):
+        self.field_list = field_list
+        self.freq_files = freq_files
+        self.culture = culture
+        self.rng = rng if rng is not None else numpy.random.default_rng()
+
+    def create_columns(self, num_records):
+        """Return a dictionary with an object array of 'num_records' values for
+       each field (in the order of the field list). Missing values are None.
+    """
+
+        rng = self.rng
+        columns = {}
+
+        for field_dict in self.field_list:
+            field_name = field_dict["name"]
+            field_type = field_dict["type"]
+
+            if field_type == "freq":
+                col = self._freq_column(field_dict, num_records, columns)
+            elif field_type == "date":
+                col = self._date_column(field_dict, num_records, columns)
+            elif field_type == "phone":
+                col = self._phone_column(field_dict, num_records, columns)
+            elif field_type == "ident":
+                col = self._ident_column(field_dict, num_records)
+            else:  # 'others'
+                col = numpy.full(num_records, "NoRole", dtype=object)
+
+            if field_name != "culture":
+                col[rng.random(num_records) <= field_dict["miss_prob"]] = None
+
+            columns[field_name] = col
+
+        return columns
+
+    def create_records(self, num_records):
+        """Return a list of 'num_records' record dictionaries (without record
+       identifiers).
+    """
+
+        columns = self.create_columns(num_records)
+
+        return columns_to_records(
+            columns, [field_dict["name"] for field_dict in self.field_list]
+        )
+
+    # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+    def _depend_values(self, field_dict, num_records, columns, follow):
+        """Replace values by values randomly selected from the lookup dictionary
+       of the field, for all records where 'follow' is True and the value of
+       the field(s) this field depends on is in the lookup dictionary.
+
+       Returns an object array with the new values (None where the dependency
+       was not followed).
+    """
+
+        rng = self.rng
+        lookup_dict = field_dict["lookup_dict"]
+        depend_fields = field_dict["depend"].split(",")
+        new_values = numpy.full(num_records, None, dtype=object)
+
+        if len(depend_fields) == 1:  # A single dependency field
+            if depend_fields[0] not in columns:
+                return new_values
+
+            depend_col = columns[depend_fields[0]]
+            follow = follow & (depend_col != None)
+            rows = numpy.flatnonzero(follow)
+            keys, key_codes = numpy.unique(
+                depend_col[rows].astype(str), return_inverse=True
+            )
+            keys = [key.replace(" ", "") for key in keys.tolist()]
+
+        else:  # Several fields this field depends upon
+            depend_cols = [columns[df] for df in depend_fields if df in columns]
+
+            rows = numpy.flatnonzero(follow)
+
+            # Combine the codes of the values of all dependency fields
+            #
+            key_codes = numpy.zeros(len(rows), dtype=numpy.int64)
+            uniq_list = []
+            for depend_col in depend_cols:
+                col_values = depend_col[rows]
+                present = col_values != None
+                col_values = numpy.where(present, col_values, "").astype(str)
+                uniq, codes = numpy.unique(col_values, return_inverse=True)
+                uniq = [(val, True) for val in uniq.tolist()]
+                uniq.append(("", False))  # Code for a missing value
+                codes = numpy.where(present, codes, len(uniq) - 1)
+                key_codes = key_codes * len(uniq) + codes
+                uniq_list.append(uniq)
+
+            comb_codes, key_codes = numpy.unique(key_codes, return_inverse=True)
+
+            keys = []
+            for comb_code in comb_codes.tolist():
+                depend_value_list = []
+                for uniq in reversed(uniq_list):
+                    comb_code, code = divmod(comb_code, len(uniq))
+                    if uniq[code][1]:
+                        depend_value_list.insert(0, uniq[code][0])
+                keys.append("-".join(depend_value_list))
+
+        key_codes = numpy.asarray(key_codes).reshape(-1)
+
+        for key_num, key in enumerate(keys):
+            if key in lookup_dict:
+                lookup_values = numpy.array(lookup_dict[key], dtype=object)
+                key_rows = rows[key_codes == key_num]
+                new_values[key_rows] = lookup_values[
+                    rng.integers(0, len(lookup_values), len(key_rows))
+                ]
+
+        return new_values
+
+    def _follow_dependency(self, field_dict, num_records):
+        return self.rng.random(num_records) <= field_dict["depend_prob"]
+
+    def _freq_column(self, field_dict, num_records, columns):
+        field_name = field_dict["name"]
+
+        if (field_name == "culture") and (self.culture is not None):
+            col = numpy.full(num_records, self.culture, dtype=object)
+        else:
+            col = self.freq_files[field_name].sample_array(num_records, self.rng)
+
+        if "depend" in field_dict:
+            follow = self._follow_dependency(field_dict, num_records)
+            new_values = self._depend_values(field_dict, num_records, columns, follow)
+            col = numpy.where(new_values != None, new_values, col)
+
+        return col
+
+    def _date_column(self, field_dict, num_records, columns):
+        rng = self.rng
+        epochs = rng.integers(
+            field_dict["start_epoch"], field_dict["end_epoch"] - 1, num_records,
+            endpoint=True,
+        )
+        col = epochs_to_iso(epochs)
+
+        # Replace the year according to the 'age' field value (if available)
+        #
+        if (field_dict["name"] == "date_of_birth") and ("age" in columns):
+            age_col = columns["age"]
+            rows = numpy.flatnonzero(
+                (rng.random(num_records) < field_dict["depend_prob"])
+                & (age_col != None)
+            )
+            for row in rows.tolist():
+                year_birth = cf.current_year - int(age_col[row])
+                col[row] = str(year_birth) + col[row][4:]
+
+            # With a certain probability draw a new age (break dependency)
+            #
+            rows = rows[rng.random(len(rows)) > cf.age_dict["depend_prob"]]
+            age_col[rows] = self.freq_files["age"].sample_array(len(rows), rng)
+
+        return col
+
+    def _phone_column(self, field_dict, num_records, columns):
+        rng = self.rng
+        area_codes = numpy.array(field_dict["area_codes"], dtype=object)
+        area_col = area_codes[rng.integers(0, len(area_codes), num_records)]
+
+        if "depend" in field_dict:
+            follow = self._follow_dependency(field_dict, num_records)
+            new_values = self._depend_values(field_dict, num_records, columns, follow)
+            area_col = numpy.where(new_values != None, new_values, area_col)
+
+        num_digits = field_dict["num_digits"]
+        max_digit = int("9" * num_digits)
+        min_digit = int("1" * (int(1 + round(num_digits / 2.0))))
+        numbers = rng.integers(min_digit, max_digit, num_records, endpoint=True)
+        numbers = numpy.char.zfill(numbers.astype(str), num_digits)
+
+        return numpy.char.add(area_col.astype(str), numbers).astype(object)
+
+    def _ident_column(self, field_dict, num_records):
+        rng = self.rng
+        idents = rng.integers(
+            field_dict["start_id"], field_dict["end_id"] - 1, num_records,
+            endpoint=True,
+        ).astype(str)
+
+        # Hack for uganda ART Number
+        if field_dict["name"] == "medical_record_number":
+            prefixes = numpy.array([p + "-" for p in art_prefix])
+            idents = numpy.char.add(
+                prefixes[rng.integers(0, len(prefixes), num_records)], idents
+            )
+
+        if field_dict["name"] == "soc_sec_id":
+            # generate random 4 letters for Uganda NIN
+            letters = numpy.array(list(string.ascii_uppercase))
+            for n in range(4):
+                idents = numpy.char.add(
+                    idents, letters[rng.integers(0, len(letters), num_records)]
+                )
+
+        return idents.astype(object)
@@ -0,0 +1,345 @@
+"""Precompiled binary bundle of the data tables and attribute files.
+
+'build_bundle' compiles all frequency files, misspellings dictionaries and
+lookup dictionaries of the 'data' directory, and the JSON attribute files of
+the 'config' directory, into a single binary file. The tables are stored as
+NumPy arrays (integer codes, frequencies and alias tables) and string pools,
+so loading a table needs neither parsing of the text file nor building of
+its alias table.
+
+The bundle file starts with the bytes 'bundle_magic', followed by the
+version of the format and the length of a JSON header (two little-endian
+unsigned 32-bit integers), the header, and the arrays (each aligned to 64
+bytes). The file is memory-mapped, and a table is decoded only when it is
+loaded. For each table and attribute file the header contains the
+modification time and size of its source file: a table whose source file
+has changed since the bundle was built is not used (it is loaded from the
+text file instead), and a bundle of another version is ignored.
+
+'resources.load_table' and 'schema.load_attr_config' use the bundle
+automatically if it exists. It is rebuilt with:
+
+   python -m duplicategenerator build_bundle [--bundle_file file_name]
+"""
+
+import json
+import mmap
+import os
+import struct
+
+import numpy
+
+from duplicategenerator import utils
+
+# First bytes and version of the bundle format
+#
+bundle_magic = b"DUPGENBD"
+bundle_version = 1
+
+# Directories of the package and bundle file used by default
+#
+package_dir = os.path.dirname(os.path.abspath(__file__))
+data_dir = os.path.join(package_dir, "data")
+config_dir = os.path.join(package_dir, "config")
+bundle_file_name = os.path.join(package_dir, "data.bundle")
+
+# Alignment of the arrays in the file
+#
+array_alignment = 64
+
+# Opened bundles of this process, by file name: tuples of the modification
+# time and size of the bundle file, its header and its memory map (None if
+# the file is not a bundle of this version)
+#
+_bundle_cache = {}
+
+
+# =============================================================================
+
+
+def file_stamp(file_name):
+    """Return the modification time (in nanoseconds) and size of a file."""
+
+    file_stat = os.stat(file_name)
+    return (file_stat.st_mtime_ns, file_stat.st_size)
+
+
+# -----------------------------------------------------------------------------
+
+
+def table_kind(file_name):
+    """Return the kind of table ("freq", "misspell" or "lookup") of a data file,
+     from its name, or None if it is not a table.
+  """
+
+    if file_name.endswith("-freq.csv"):
+        return "freq"
+    elif file_name.endswith("-misspell.tbl"):
+        return "misspell"
+    elif file_name.endswith(".tbl"):
+        return "lookup"
+
+    return None
+
+
+# -----------------------------------------------------------------------------
+
+
+def string_pool(strings):
+    """Return a list of strings as one UTF-8 encoded array of bytes (the
+     strings separated by new lines, which none of them contains).
+  """
+
+    for value in strings:
+        if "\n" in value:
+            raise ValueError("String with a new line can not be bundled: %r" % (value))
+
+    return numpy.frombuffer("\n".join(strings).encode("utf8"), dtype=numpy.uint8)
+
+
+def pool_strings(pool, num_strings):
+    """Return the list of the 'num_strings' strings of a string pool."""
+
+    if num_strings == 0:
+        return []
+
+    return bytes(pool).decode("utf8").split("\n")
+
+
+# -----------------------------------------------------------------------------
+
+
+def compile_table(kind, table):
+    """Return the number of strings and the dictionary of arrays of a loaded
+     table: for a frequency sampler its values, frequencies and alias table,
+     for a misspellings or lookup dictionary its distinct strings, the codes
+     of its keys and the codes of their values (the values of key i are
+     'values[offsets[i]:offsets[i+1]]').
+  """
+
+    if kind == "freq":
+        return len(table.values), {
+            "strings": string_pool(table.values),
+            "freqs": numpy.array(table.freqs, dtype=numpy.int64),
+            "prob": numpy.array(table.prob, dtype=numpy.float64),
+            "alias": numpy.array(table.alias, dtype=numpy.int64),
+        }
+
+    string_codes = {}
+    key_codes = []
+    offsets = [0]
+    value_codes = []
+
+    for key, values in table.items():
+        key_codes.append(string_codes.setdefault(key, len(string_codes)))
+        for value in values:
+            value_codes.append(string_codes.setdefault(value, len(string_codes)))
+        offsets.append(len(value_codes))
+
+    return len(string_codes), {
+        "strings": string_pool(list(string_codes)),
+        "keys": numpy.array(key_codes, dtype=numpy.int32),
+        "offsets": numpy.array(offsets, dtype=numpy.int64),
+        "values": numpy.array(value_codes, dtype=numpy.int32),
+    }
+
+
+# -----------------------------------------------------------------------------
+
+
+def decode_table(kind, arrays, num_strings):
+    """Return the table (a 'utils.FrequencySampler', or a dictionary with tuples
+     of values) of the arrays of a compiled table.
+  """
+
+    strings = pool_strings(arrays["strings"], num_strings)
+
+    if kind == "freq":
+        return utils.FrequencySampler.from_alias_table(
+            strings, arrays["freqs"], arrays["prob"], arrays["alias"]
+        )
+
+    get_string = strings.__getitem__
+    offsets = arrays["offsets"].tolist()
+    value_codes = arrays["values"].tolist()
+
+    table = {}
+    for i, key_code in enumerate(arrays["keys"].tolist()):
+        table[strings[key_code]] = tuple(
+            map(get_string, value_codes[offsets[i] : offsets[i + 1]])
+        )
+
+    return table
+
+
+# -----------------------------------------------------------------------------
+
+
+def build_bundle(bundle_file=None):
+    """Compile the data tables and attribute files into a bundle file (by
+     default 'bundle_file_name'), and return a list with the kind, file name
+     and number of entries of each bundled table and attribute file.
+  """
+
+    if bundle_file is None:
+        bundle_file = bundle_file_name
+
+    header = {"version": bundle_version, "tables": {}, "configs": {}}
+    arrays = []  # Arrays in the order of the file
+    data_size = 0
+    contents = []
+
+    for file_name in sorted(os.listdir(data_dir)):
+        kind = table_kind(file_name)
+        if kind is None:
+            continue
+
+        source_file = os.path.join(data_dir, file_name)
+        stamp = file_stamp(source_file)
+
+        if kind == "freq":
+            table = utils.load_frequency_file(source_file)
+        elif kind == "misspell":
+            table = utils.load_misspellings_dict(source_file)
+        else:
+            table = utils.load_lookup_dict(source_file)
+
+        num_strings, table_arrays = compile_table(kind, table)
+
+        array_entries = {}
+        for array_name, table_array in table_arrays.items():
+            data_size += -data_size % array_alignment
+            array_entries[array_name] = [data_size, table_array.dtype.str, len(table_array)]
+            arrays.append((data_size, table_array))
+            data_size += table_array.nbytes
+
+        header["tables"]["%s:%s" % (kind, file_name)] = {
+            "stamp": list(stamp),
+            "num_strings": num_strings,
+            "arrays": array_entries,
+        }
+        contents.append((kind, file_name, len(table)))
+
+    for file_name in sorted(os.listdir(config_dir)):
+        if not file_name.endswith(".json"):
+            continue
+
+        source_file = os.path.join(config_dir, file_name)
+        stamp = file_stamp(source_file)
+        with open(source_file, "r") as json_file:
+            attr_data = json.load(json_file)
+
+        header["configs"][file_name] = {"stamp": list(stamp), "data": attr_data}
+        contents.append(("config", file_name, len(attr_data.get("attributes", {}))))
+
+    header_bytes = json.dumps(header).encode("utf8")
+    data_start = len(bundle_magic) + 8 + len(header_bytes)
+    data_start += -data_start % array_alignment
+
+    # Write into a temporary file first, so a bundle that is in use (memory-
+    # mapped) is replaced only once the new one is complete
+    #
+    tmp_file = bundle_file + ".tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(bundle_magic)
+        f.write(struct.pack("<II", bundle_version, len(header_bytes)))
+        f.write(header_bytes)
+        for offset, table_array in arrays:
+            f.write(b"\0" * (data_start + offset - f.tell()))
+            f.write(table_array.tobytes())
+    os.replace(tmp_file, bundle_file)
+
+    _bundle_cache.pop(os.path.abspath(bundle_file), None)
+
+    return contents
+
+
+# -----------------------------------------------------------------------------
+
+
+def open_bundle(bundle_file=None):
+    """Return the header and the arrays (a memory map, starting at the first
+     array) of a bundle file, or None if the file does not exist or is not a
+     bundle of this version. Opened bundles are cached until the bundle file
+     changes.
+  """
+
+    bundle_file = os.path.abspath(bundle_file or bundle_file_name)
+
+    try:
+        stamp = file_stamp(bundle_file)
+    except OSError:
+        return None
+
+    cache_entry = _bundle_cache.get(bundle_file)
+    if (cache_entry is not None) and (cache_entry[0] == stamp):
+        return cache_entry[1]
+
+    bundle = None
+    with open(bundle_file, "rb") as f:
+        prefix = f.read(len(bundle_magic) + 8)
+        if (len(prefix) == len(bundle_magic) + 8) and prefix.startswith(bundle_magic):
+            version, header_size = struct.unpack("<II", prefix[len(bundle_magic) :])
+            if version == bundle_version:
+                header = json.loads(f.read(header_size).decode("utf8"))
+                data_start = len(prefix) + header_size
+                data_start += -data_start % array_alignment
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                bundle = (header, memoryview(data)[data_start:])
+
+    _bundle_cache[bundle_file] = (stamp, bundle)
+
+    return bundle
+
+
+# -----------------------------------------------------------------------------
+
+
+def load_bundle_table(kind, file_name, stamp, bundle_file=None):
+    """Return the table of the given kind of a data file (absolute name) from
+     the bundle, or None if it is not in the bundle or its file has changed
+     ('stamp' is the current modification time and size of the file).
+  """
+
+    if os.path.dirname(file_name) != data_dir:
+        return None
+
+    bundle = open_bundle(bundle_file)
+    if bundle is None:
+        return None
+    header, data = bundle
+
+    table_entry = header["tables"].get("%s:%s" % (kind, os.path.basename(file_name)))
+    if (table_entry is None) or (tuple(table_entry["stamp"]) != tuple(stamp)):
+        return None
+
+    arrays = {}
+    for array_name, (offset, dtype, length) in table_entry["arrays"].items():
+        arrays[array_name] = numpy.frombuffer(
+            data, dtype=numpy.dtype(dtype), count=length, offset=offset
+        )
+
+    return decode_table(kind, arrays, table_entry["num_strings"])
+
+
+# -----------------------------------------------------------------------------
+
+
+def load_bundle_config(file_name, stamp, bundle_file=None):
+    """Return the (unparsed) data of a JSON attribute file of the 'config'
+     directory from the bundle, or None if it is not in the bundle or the file
+     has changed.
+  """
+
+    if os.path.dirname(file_name) != config_dir:
+        return None
+
+    bundle = open_bundle(bundle_file)
+    if bundle is None:
+        return None
+
+    config_entry = bundle[0]["configs"].get(os.path.basename(file_name))
+    if (config_entry is None) or (tuple(config_entry["stamp"]) != tuple(stamp)):
+        return None
+
+    return config_entry["data"]
@@ -1,4 +1,5 @@
 import argparse
+import contextlib
 import logging
 import os
 import random
@@ -7,7 +8,9 @@ import pandas
 
 
 from duplicategenerator.generate import DuplicateGen
+from duplicategenerator import bundle
 from duplicategenerator import utils
+from duplicategenerator import writers
 from duplicategenerator import config as cf
 
 # from generate import DuplicateGen
@@ -15,8 +18,40 @@ from duplicategenerator import config as cf
 # import config as cf
 
 
+def build_bundle_from_command_line(argv):
+
+    parser = argparse.ArgumentParser(
+        prog="Duplicate generator build_bundle",
+        description="Compile the data tables and attribute files into the binary bundle",
+    )
+
+    parser.add_argument(
+        "--bundle_file",
+        type=str,
+        default=None,
+        help="Name of the bundle file (default: data.bundle in the package directory)",
+    )
+
+    args = parser.parse_args(argv)
+
+    bundle_file = args.bundle_file or bundle.bundle_file_name
+    contents = bundle.build_bundle(bundle_file)
+
+    for kind, file_name, num_entries in contents:
+        print("  %-8s %-32s %8d" % (kind, file_name, num_entries))
+    print(
+        "Bundle %s written (%d files, %.2f MB)"
+        % (bundle_file, len(contents), os.path.getsize(bundle_file) / 1e6)
+    )
+
+
 def execute_from_command_line():
 
+    # Subcommand to rebuild the binary bundle of the data files
+    if sys.argv[1:2] == ["build_bundle"]:
+        build_bundle_from_command_line(sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser(
         prog="Duplicate generator", description="Duplicate generator commmand line tool"
     )
@@ -78,8 +113,78 @@ def execute_from_command_line():
         help="Configuration file for the field to be generated",
     )
 
+    parser.add_argument(
+        "--transformation_cache_size",
+        type=int,
+        default=10000,
+        help="Maximal number of field values for which the phonetic and OCR changes are cached (0 disables the cache)",
+    )
+
+    parser.add_argument(
+        "--engine",
+        choices=["scalar", "numpy"],
+        default="scalar",
+        help="Engine used to create the records (numpy creates original records column by column and duplicates in batches)",
+    )
+
+    parser.add_argument(
+        "--chunk_size",
+        type=int,
+        default=10000,
+        help="Number of original records (with their duplicates) generated and written at a time",
+    )
+
+    parser.add_argument(
+        "--format",
+        choices=writers.formats,
+        default="csv",
+        help="Format of the output file (parquet and arrow need the pyarrow package)",
+    )
+
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Seed of the random number generators (the same seed gives the same output file)",
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes generating the chunks in parallel",
+    )
+
+    parser.add_argument(
+        "--unique_index",
+        choices=["hash", "hash-verify", "set"],
+        default="hash",
+        help="Index used to check that all records are different (hash-verify also compares the records when hashes are equal)",
+    )
+
+    parser.add_argument(
+        "--true_links_file",
+        default=None,
+        help="Also write the true links (integer-coded pairs of records created from the same original record) into this file, in the same format as the output file",
+    )
+
+    parser.add_argument(
+        "--log-level",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        default="INFO",
+        help="Level of the messages logged on standard error (DEBUG also logs every record created and every modification made)",
+    )
+
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Print the statistics of the generation (times and records per second of each stage, counters of the modifications and of the retries) as JSON",
+    )
+
     args = parser.parse_args()
 
+    logging.basicConfig(level=args.log_level, format="%(message)s")
+
     dupgen = DuplicateGen(
         int(args.num_originals),
         int(args.num_duplicates),
@@ -91,12 +196,36 @@ def execute_from_command_line():
         False,  # verbose
         args.culture,
         args.config_file,
-        None,
-    )  # field_names
-    all_records = dupgen.generate(output="dataframe")
+        None,  # field_names
+        args.transformation_cache_size,
+        args.engine,
+        args.unique_index,
+        args.seed,
+    )
 
-    # WRITE CSV OUTPUT
-    all_records.to_csv(args.output_file,)
+    # WRITE OUTPUT, CHUNK BY CHUNK
+    with contextlib.ExitStack() as stack:
+        writer = stack.enter_context(
+            writers.open_writer(args.output_file, args.format)
+        )
+        true_links_writer = None
+        if args.true_links_file is not None:
+            true_links_writer = stack.enter_context(
+                writers.open_writer(args.true_links_file, args.format)
+            )
+
+        chunks = dupgen.generate_iter(
+            args.chunk_size,
+            output=writer.output,
+            workers=args.workers,
+            true_links_writer=true_links_writer,
+        )
+        for records in chunks:
+            with dupgen.generation_stats.stage("output"):
+                writer.write(records)
+
+    if args.stats:
+        print(dupgen.generation_stats.to_json(indent=2))
 
 
 if __name__ == "__main__":
@@ -20,8 +20,10 @@
 # - misspell_file    The name of a misspellings file.
 #
 # For fields of type 'date' the following keys must be given:
-# - start_date       A start date, must be a tuple (day,month,year).
-# - end_date         A end date, must be a tuple (day,month,year).
+# - start_date       A start date, must be a string "(day,month,year)" or a
+#                    list [day,month,year].
+# - end_date         A end date, must be a string "(day,month,year)" or a
+#                    list [day,month,year].
 #
 # For fields of type 'phone' the following keys must be given:
 # - area_codes       A list with possible area codes (as strings).
@@ -484,6 +486,13 @@ blank_value = " "
 #
 current_year = time.localtime()[0]  # Alternatively set manual
 
+# -----------------------------------------------------------------------------
+# Age field: probability that the age of a record is kept when the year of its
+# date of birth is set from it (otherwise a new age is drawn, breaking the
+# dependency)
+#
+age_dict = {"depend_prob": 0.9}
+
 
 # -----------------------------------------------------------------------------
 # Error type distribution
@@ -0,0 +1,358 @@
+"""Compiled field plan used by the record generation loops.
+
+Before records are generated, 'compile_field_plan' turns the field
+dictionaries of the generator (with their frequency tables and lookup
+dictionaries loaded) into a list of field objects, one per field and of a
+class for each field type. Everything the loops need is resolved once:
+the frequency sampler, the modification sampler, the parsed dependency
+fields, the date and identifier bounds, the phone number bounds, the
+character range and the misspellings dictionary.
+
+Each field object has two methods:
+  create_value(rng, rec_dict)    Value of the field in a new original record
+                                 (the fields created so far are in
+                                 'rec_dict', for dependencies).
+  new_value(rng, old_value)      Value that replaces 'old_value' in a
+                                 duplicate ("val_swap_prob" and
+                                 "new_val_prob" modifications).
+
+The values are drawn with the same random calls (and in the same order) as
+the field dictionaries were used before.
+"""
+
+import string
+
+from duplicategenerator import batch
+from duplicategenerator import utils
+from duplicategenerator import config as cf
+
+# Characters of each 'char_range' of a field
+#
+char_ranges = {
+    "digit": string.digits,
+    "alpha": string.ascii_lowercase,
+    "alphanum": string.digits + string.ascii_lowercase,
+}
+
+
+# =============================================================================
+
+
+def compile_field_plan(field_list, freq_files, culture=None):
+    """Return the list of field objects of the field dictionaries in
+     'field_list' (in the same order), with the frequency samplers in
+     'freq_files'. If 'culture' is given, it is the value of the "culture"
+     field of all original records.
+  """
+
+    return [
+        field_classes[field_dict["type"]](field_dict, freq_files, culture)
+        for field_dict in field_list
+    ]
+
+
+# -----------------------------------------------------------------------------
+
+
+def compile_swap_pairs(field_swap_prob):
+    """Return the list of field pairs of the 'field_swap_prob' dictionary (with
+     tuples of two field names as keys, see 'schema.parse_field_pair') as
+     tuples of the swap probability and the two field names.
+  """
+
+    return [
+        (swap_prob, fname_a, fname_b)
+        for (fname_a, fname_b), swap_prob in field_swap_prob.items()
+    ]
+
+
+# =============================================================================
+
+
+class Field:
+    """Base class of the field objects.
+
+     field_dict     The field dictionary (for the modification probabilities).
+     name           Name of the field.
+     can_miss       False for the "culture" field (never missing).
+     miss_prob      Probability of a missing value in original records.
+     select_prob    Probability to select the field for a modification.
+     prob_sampler   Sampler of the modification of the field.
+     char_range     Name of the character range of the field.
+     field_range    Characters of the character range (see 'char_ranges').
+     misspell_dict  Misspellings dictionary (or None).
+  """
+
+    __slots__ = (
+        "field_dict",
+        "name",
+        "can_miss",
+        "miss_prob",
+        "select_prob",
+        "prob_sampler",
+        "char_range",
+        "field_range",
+        "misspell_dict",
+    )
+
+    def __init__(self, field_dict, freq_files, culture=None):
+        self.field_dict = field_dict
+        self.name = field_dict["name"]
+        self.can_miss = self.name != "culture"
+        self.miss_prob = field_dict.get("miss_prob")
+        self.select_prob = field_dict["select_prob"]
+        if "prob_list" in field_dict:
+            self.prob_sampler = utils.DiscreteSampler.from_prob_list(field_dict["prob_list"])
+        else:
+            self.prob_sampler = None
+        self.char_range = field_dict["char_range"]
+        self.field_range = char_ranges[self.char_range]
+        self.misspell_dict = field_dict.get("misspell_dict")
+
+    def __repr__(self):
+        return "%s(%r)" % (type(self).__name__, self.name)
+
+    def create_value(self, rng, rec_dict):
+        raise NotImplementedError
+
+    def new_value(self, rng, old_value):
+        return old_value
+
+
+# -----------------------------------------------------------------------------
+
+
+class FreqField(Field):
+    """Field with values from a frequency file, optionally depending on the
+     values of other fields (through its lookup dictionary).
+  """
+
+    __slots__ = (
+        "sampler",
+        "fixed_value",
+        "depend_fields",
+        "depend_prob",
+        "lookup_dict",
+    )
+
+    def __init__(self, field_dict, freq_files, culture=None):
+        Field.__init__(self, field_dict, freq_files, culture)
+
+        self.sampler = freq_files.get(self.name)
+        self.fixed_value = culture if self.name == "culture" else None
+
+        if "depend" in field_dict:
+            depend_field = field_dict["depend"]
+            if "," not in depend_field:  # A single dependency field
+                self.depend_fields = depend_field
+            else:  # Several fields this field depends upon
+                self.depend_fields = depend_field.split(",")
+            self.depend_prob = field_dict["depend_prob"]
+            self.lookup_dict = field_dict.get("lookup_dict")
+        else:
+            self.depend_fields = None
+            self.depend_prob = None
+            self.lookup_dict = None
+
+    def create_value(self, rng, rec_dict):
+        if self.fixed_value is not None:
+            rand_val = self.fixed_value
+        else:
+            rand_val = self.sampler.sample(rng)
+
+        # Check for dependencies and follow if a certain probability is given
+        #
+        depend_fields = self.depend_fields
+        if (depend_fields is not None) and (rng.random() <= self.depend_prob):
+
+            if isinstance(depend_fields, str):  # A single dependency field
+                if depend_fields in rec_dict:
+
+                    # Get the value from the current record in the dependency field
+                    #
+                    depend_value = rec_dict[depend_fields].replace(" ", "")
+                    if depend_value in self.lookup_dict:
+                        rand_val = rng.choice(self.lookup_dict[depend_value])
+
+            else:  # Several fields this field depends upon
+                depend_value_list = []
+                for df in depend_fields:  # Create the dependency value
+                    if df in rec_dict:
+                        depend_value_list.append(rec_dict[df.replace(" ", "")])
+                depend_value = "-".join(depend_value_list)
+                if depend_value in self.lookup_dict:
+                    rand_val = rng.choice(self.lookup_dict[depend_value])
+
+        return rand_val
+
+    def new_value(self, rng, old_value):
+        return self.sampler.sample(rng)
+
+
+# -----------------------------------------------------------------------------
+
+
+class DateField(Field):
+    """Date field (ISO format yyyymmdd) with a value between the start and end
+     epoch days. The year of a "date_of_birth" field can depend on the "age"
+     field.
+  """
+
+    __slots__ = ("start_epoch", "end_epoch", "depend_on_age", "depend_prob", "age_sampler")
+
+    def __init__(self, field_dict, freq_files, culture=None):
+        Field.__init__(self, field_dict, freq_files, culture)
+
+        self.start_epoch = field_dict["start_epoch"]
+        self.end_epoch = field_dict["end_epoch"] - 1  # Last epoch day
+        self.depend_on_age = self.name == "date_of_birth"
+        self.depend_prob = field_dict.get("depend_prob")
+        self.age_sampler = freq_files.get("age")
+
+    def create_value(self, rng, rec_dict):
+        rand_num = rng.randint(self.start_epoch, self.end_epoch)
+        rand_date = utils.epoch_to_date(rand_num)  # Date triplet
+        rand_val = rand_date[2] + rand_date[1] + rand_date[0]  # ISO format: yyyymmdd
+
+        # Check for dependencies and follow if a certain probability is given
+        #
+        if (
+            self.depend_on_age
+            and (rng.random() < self.depend_prob)
+            and (rec_dict.get("age", None) != None)
+        ):
+
+            # Replace year with the year according to the 'age' field value
+            #
+            assert " " not in rec_dict["age"], rec_dict["age"]
+            assert rec_dict["age"] != "", 'Empty "rec_dict[age]"'
+
+            year_birth = cf.current_year - int(rec_dict["age"])
+            rand_val = str(year_birth) + rand_date[1] + rand_date[0]  # ISO format
+
+            # With a certain probability modify the age value (break dependency)
+            #
+            if rng.random() > cf.age_dict["depend_prob"]:
+                rec_dict["age"] = self.age_sampler.sample(rng)
+
+        return rand_val
+
+    def new_value(self, rng, old_value):
+        rand_num = rng.randint(self.start_epoch, self.end_epoch)
+        rand_date = utils.epoch_to_date(rand_num)
+        return rand_date[2] + rand_date[1] + rand_date[0]
+
+
+# -----------------------------------------------------------------------------
+
+
+class PhoneField(Field):
+    """Phone number field: an area code followed by a number with
+     'num_digits' digits. The area code can depend on another field.
+  """
+
+    __slots__ = (
+        "area_codes",
+        "num_digits",
+        "min_digit",
+        "max_digit",
+        "depend_field",
+        "depend_prob",
+        "lookup_dict",
+    )
+
+    def __init__(self, field_dict, freq_files, culture=None):
+        Field.__init__(self, field_dict, freq_files, culture)
+
+        self.area_codes = field_dict["area_codes"]
+        self.num_digits = field_dict["num_digits"]
+        self.max_digit = int("9" * self.num_digits)
+        self.min_digit = int("1" * (int(1 + round(self.num_digits / 2.0))))
+
+        self.depend_field = field_dict.get("depend")
+        self.depend_prob = field_dict.get("depend_prob")
+        self.lookup_dict = field_dict.get("lookup_dict")
+
+    def create_value(self, rng, rec_dict):
+        area_code = rng.choice(self.area_codes)
+
+        # Check for dependencies and follow if a certain probability is given
+        #
+        if (self.depend_field is not None) and (rng.random() <= self.depend_prob):
+            if self.depend_field in rec_dict:
+                depend_value = rec_dict[self.depend_field].replace(" ", "")
+                if depend_value in self.lookup_dict:
+                    area_code = rng.choice(self.lookup_dict[depend_value])
+
+        rand_num = rng.randint(self.min_digit, self.max_digit)
+        return area_code + str(rand_num).zfill(self.num_digits)
+
+    def new_value(self, rng, old_value):
+        area_code = rng.choice(self.area_codes)
+        rand_num = rng.randint(self.min_digit, self.max_digit)
+        return area_code + " " + str(rand_num).zfill(self.num_digits)
+
+
+# -----------------------------------------------------------------------------
+
+
+class IdentField(Field):
+    """Identification number field with a value between the start and end
+     identifiers ("medical_record_number" and "soc_sec_id" fields get a
+     prefix or suffix of letters).
+  """
+
+    __slots__ = ("start_id", "end_id", "art_prefix", "num_letters")
+
+    def __init__(self, field_dict, freq_files, culture=None):
+        Field.__init__(self, field_dict, freq_files, culture)
+
+        self.start_id = field_dict["start_id"]
+        self.end_id = field_dict["end_id"] - 1  # Last identifier
+
+        # Hack for uganda ART Number
+        self.art_prefix = batch.art_prefix if self.name == "medical_record_number" else None
+
+        # Random letters for Uganda NIN
+        self.num_letters = 4 if self.name == "soc_sec_id" else 0
+
+    def create_value(self, rng, rec_dict):
+        rand_num = rng.randint(self.start_id, self.end_id)
+        rand_val = str(rand_num)
+
+        if self.art_prefix is not None:
+            rand_val = rng.choice(self.art_prefix) + "-" + rand_val
+
+        if self.num_letters > 0:
+            rand_uganda = "".join(
+                [rng.choice(string.ascii_letters) for n in range(self.num_letters)]
+            ).upper()
+            rand_val = str(rand_num) + rand_uganda
+
+        return rand_val
+
+    def new_value(self, rng, old_value):
+        return str(rng.randint(self.start_id, self.end_id))
+
+
+# -----------------------------------------------------------------------------
+
+
+class OthersField(Field):
+    """Field with the same value in all original records."""
+
+    __slots__ = ()
+
+    def create_value(self, rng, rec_dict):
+        return "NoRole"
+
+
+# Field class of each field type
+#
+field_classes = {
+    "freq": FreqField,
+    "date": DateField,
+    "phone": PhoneField,
+    "ident": IdentField,
+    "others": OthersField,
+}
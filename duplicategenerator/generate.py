@@ -116,18 +116,13 @@
 
             http://datamining.anu.edu.au/projects/linkage-publications.html
 
-   NOTE: Depending upon parameter settings it is possible that the program
-         'hangs' when generating duplicate or family/household records. This
-         is because due to the randomness of the records generated it is not
-         possible to select another 'original' record for modification. The
-         remedy currently is to stop the program and re-start it, possibly
-         with different parameter settings (like smaller number of duplicates
-         or family/household records, or larger number of original records).
+   NOTE: Depending upon parameter settings it is possible that all original
+         records have been used before all duplicate records are created.
+         In this case a ValueError is raised, and the program has to be
+         re-started with different parameter settings (like smaller number
+         of duplicates, or larger number of original records).
 
    TODO:
-     - fix problem of endless loop when randomly selecting duplicate or
-       family/household records.
-
      - add substitution matrix with character substitution probabilities
        (instead of keyboard based substitutions).
 
@@ -149,20 +144,49 @@
 # =============================================================================
 # Imports go here
 
+import collections
+import concurrent.futures
 import copy
 import math
 import random
-import string
 import sys
 import time
 import os
 import pandas
 import numpy
 import json
-
+import logging
+
+from duplicategenerator import batch
+from duplicategenerator import fields
+from duplicategenerator import planner
+from duplicategenerator import resources
+from duplicategenerator import schema
+from duplicategenerator import stats
+from duplicategenerator import typos
+from duplicategenerator import uniqueness
 from duplicategenerator import utils
+from duplicategenerator import writers
 from duplicategenerator import config as cf
 
+# The steps of the generation are logged at the INFO level, and the trace
+# events of each record (original records, modifications made in the
+# duplicates) at the DEBUG level
+#
+logger = logging.getLogger(__name__)
+
+
+def _show_trace_events():
+    """ Show the trace events of the generation on standard output, unless the
+        logger of this module already has a handler
+    """
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+
 
 class DuplicateGen:
     
@@ -178,7 +202,11 @@ class DuplicateGen:
         verbose_output=False,
         culture=None,
         attr_file_name=None,
-        field_names_prob=None ):
+        field_names_prob=None,
+        transformation_cache_size=10000,
+        engine="scalar",
+        unique_index="hash",
+        seed=None ):
 
 
                 
@@ -190,7 +218,45 @@ class DuplicateGen:
         self.prob_distribution = prob_distribution
         self.type_modification = type_modification
 
+        # Verbose output shows the trace events (see the module logger)
         self.VERBOSE_OUTPUT = verbose_output
+        if verbose_output:
+            _show_trace_events()
+
+        # Maximal number of values for which the phonetic and OCR changes are
+        # cached (0 disables the cache), and the cache counters of the last
+        # call to generate()
+        self.transformation_cache_size = transformation_cache_size
+        self.transformation_cache_info = None
+        self._transformation_cache = None
+
+        # Times and counters of the last call to generate() or generate_iter()
+        # (a stats.GenerationStats)
+        self.generation_stats = stats.GenerationStats()
+
+        # Engine used to create the records: 'scalar' (one record at a time)
+        # or 'numpy' (vectorized, original records column by column and
+        # duplicates in batches, see batch and planner modules)
+        self.engine = engine
+
+        # Index used to check that all records are different: 'hash' (128-bit
+        # record hashes), 'hash-verify' (hashes and exact records) or 'set'
+        self.unique_index = unique_index
+
+        # Seed of the random number generators (None for a different dataset
+        # in each run). All random numbers of a run are drawn from generators
+        # private to this object, derived from the seed
+        self.seed = seed
+        self._rng = None
+
+        # Columns dictionary-encoded in Arrow output (set when the frequency
+        # tables are loaded)
+        self._dictionary_columns = []
+
+        # Compiled fields and field pairs to swap (see fields module, set when
+        # the frequency tables are loaded)
+        self._field_plan = None
+        self._swap_pairs = None
 
         # if none all culture
         # culture should be ISO format
@@ -201,10 +267,13 @@ class DuplicateGen:
         # have to check file format json
         self.attr_file_name = attr_file_name
 
-        self.single_typo_prob = self._load_attr_configuration("single_typo_prob")
-        self.field_swap_prob = self._load_attr_configuration("field_swap_prob")
-        self.error_type_distribution = self._load_attr_configuration(
-            "error_type_distribution"
+        # The configuration is shared (read-only) with all generators, each
+        # generator has its own copies of the dictionaries it changes
+        #
+        self.single_typo_prob = dict(self._load_attr_configuration("single_typo_prob"))
+        self.field_swap_prob = dict(self._load_attr_configuration("field_swap_prob"))
+        self.error_type_distribution = dict(
+            self._load_attr_configuration("error_type_distribution")
         )
 
         self.field_names_prob = field_names_prob
@@ -214,14 +283,16 @@ class DuplicateGen:
         # set field_list based on field_names
         self.field_list = []
         if self.field_names is None:
-            self.field_list = list(self._load_attr_configuration("attributes").values())
+            self.field_list = [
+                dict(field_dict)
+                for field_dict in self._load_attr_configuration("attributes").values()
+            ]
         else:
-            for field_dict in list(
-                self._load_attr_configuration("attributes").values()
-            ):
+            for field_dict in self._load_attr_configuration("attributes").values():
                 for field in self.field_names:
                     if field_dict["name"] == field:
-                        # overwrite select_prob
+                        # overwrite select_prob (in the copy of this generator)
+                        field_dict = dict(field_dict)
                         field_dict["select_prob"] = self.field_names_prob[field]
                         self.field_list.append(field_dict)
 
@@ -274,6 +345,48 @@ class DuplicateGen:
             raise ValueError("Number of duplicate records must be zero or positive")
         self._num_dup_records = value
 
+    @property
+    def transformation_cache_size(self):
+        return self._transformation_cache_size
+
+    @transformation_cache_size.setter
+    def transformation_cache_size(self, value):
+        if value < 0:
+            raise ValueError("Transformation cache size must be zero or positive")
+        self._transformation_cache_size = value
+
+    @property
+    def engine(self):
+        return self._engine
+
+    @engine.setter
+    def engine(self, value):
+        if value not in ["scalar", "numpy"]:
+            raise ValueError('Illegal engine must be one of: "scalar" or "numpy"')
+        self._engine = value
+
+    @property
+    def unique_index(self):
+        return self._unique_index
+
+    @unique_index.setter
+    def unique_index(self, value):
+        if value not in uniqueness.index_names:
+            raise ValueError(
+                'Illegal unique index must be one of: "hash", "hash-verify" or "set"'
+            )
+        self._unique_index = value
+
+    @property
+    def seed(self):
+        return self._seed
+
+    @seed.setter
+    def seed(self, value):
+        if (value is not None) and (value < 0):
+            raise ValueError("Seed must be zero or positive")
+        self._seed = value
+
     @property
     def attr_file_name(self):
         return self._attr_file_name
@@ -357,7 +470,6 @@ class DuplicateGen:
         for field_dict in list(self._load_attr_configuration("attributes").values()):
             names_prob[field_dict["name"]] = field_dict["select_prob"]
 
-        print(names_prob.keys())
         if value is None:
             self._field_names_prob = names_prob
         else:
@@ -388,7 +500,7 @@ class DuplicateGen:
 
             #  field name
             if "name" not in field_dict:
-                print("Error: No field name given for field dictionary")
+                logger.error("No field name given for field dictionary")
                 raise Exception
             elif field_dict["name"] == "rec_id":
                 raise ValueError(
@@ -427,9 +539,9 @@ class DuplicateGen:
                         'Field of type "date" has no start and/or end date given'
                     )
 
-                else:  # Process start and end date
-                    start_date = eval(field_dict["start_date"])
-                    end_date = eval(field_dict["end_date"])
+                else:  # Process start and end date (parsed into tuples)
+                    start_date = field_dict["start_date"]
+                    end_date = field_dict["end_date"]
 
                     start_epoch = utils.date_to_epoch(
                         start_date[0], start_date[1], start_date[2]
@@ -453,6 +565,8 @@ class DuplicateGen:
                         field_dict["area_codes"] = [
                             field_dict["area_codes"]
                         ]  # Make it a list
+                    elif isinstance(field_dict["area_codes"], tuple):  # Read-only
+                        field_dict["area_codes"] = list(field_dict["area_codes"])
                     if not isinstance(field_dict["area_codes"], list):
                         raise ValueError(
                             "Area codes given are not a string or a list: %s"
@@ -533,278 +647,158 @@ class DuplicateGen:
         return select_prob_sum
 
     def _duplicate_distribution(self):
-        """ Create a distribution for the number of duplicates for an original record """
-
-        num_dup = 1
-        prob_sum = 0.0
-        prob_dist_list = [(num_dup, prob_sum)]
-
-        if (
-            self.prob_distribution == "uni"
-        ):  # Uniform distribution of duplicates - - - -
-
-            uniform_val = 1.0 / float(self.max_num_dups)
-
-            for i in range(self.max_num_dups - 1):
-                num_dup += 1
-                prob_dist_list.append((num_dup, uniform_val + prob_dist_list[-1][1]))
-
-        elif (
-            self.prob_distribution == "poi"
-        ):  # Poisson distribution of duplicates - - -
-
-            def fac(n):  # Factorial of an integer number (recursive calculation)
-                if n > 1.0:
-                    return n * fac(n - 1.0)
-                else:
-                    return 1.0
-
-            poisson_num = []  # A list of poisson numbers
-            poisson_sum = 0.0  # The sum of all poisson number
-
-            # The mean (lambda) for the poisson numbers
-            #
-            mean = 1.0 + (float(self.num_dup_records) / float(self.num_org_records))
-
-            for i in range(self.max_num_dups):
-                poisson_num.append((math.exp(-mean) * (mean ** i)) / fac(i))
-                poisson_sum += poisson_num[-1]
+        """ Create a distribution for the number of duplicates for an original record
 
-            for i in range(self.max_num_dups):  # Scale so they sum up to 1.0
-                poisson_num[i] = poisson_num[i] / poisson_sum
-
-            for i in range(self.max_num_dups - 1):
-                num_dup += 1
-                prob_dist_list.append((num_dup, poisson_num[i] + prob_dist_list[-1][1]))
-
-        elif (
-            self.prob_distribution == "zip"
-        ):  # Zipf distribution of duplicates - - - - -
-            zipf_theta = 0.5
-
-            denom = 0.0
-            for i in range(self.num_org_records):
-                denom += 1.0 / (i + 1) ** (1.0 - zipf_theta)
-
-            zipf_c = 1.0 / denom
-            zipf_num = []  # A list of Zipf numbers
-            zipf_sum = 0.0  # The sum of all Zipf number
+        Return
+        --------
+        sampler : utils.DiscreteSampler of the number of duplicates (its
+                'prob_list' is the cumulative list form)
 
-            for i in range(self.max_num_dups):
-                zipf_num.append(zipf_c / ((i + 1) ** (1.0 - zipf_theta)))
-                zipf_sum += zipf_num[-1]
+        """
 
-            for i in range(self.max_num_dups):  # Scale so they sum up to 1.0
-                zipf_num[i] = zipf_num[i] / zipf_sum
+        # The mean (lambda) for the poisson numbers
+        #
+        mean = 1.0 + (float(self.num_dup_records) / float(self.num_org_records))
 
-            for i in range(self.max_num_dups - 1):
-                num_dup += 1
-                prob_dist_list.append((num_dup, zipf_num[i] + prob_dist_list[-1][1]))
+        dup_count_sampler = self._count_distribution(
+            self.prob_distribution, self.max_num_dups, mean
+        )
 
-        print()
-        print(
-            "Create %i original and %i duplicate records"
-            % (self.num_org_records, self.num_dup_records)
+        logger.info(
+            "Create %i original and %i duplicate records",
+            self.num_org_records,
+            self.num_dup_records,
         )
-        print(
-            "  Distribution of number of duplicates (maximal %i duplicates):"
-            % (self.max_num_dups)
+        logger.info(
+            "  Distribution of number of duplicates (maximal %i duplicates): %s",
+            self.max_num_dups,
+            dup_count_sampler.prob_list,
         )
-        print("  %s" % (prob_dist_list))
 
-        return prob_dist_list
+        return dup_count_sampler
 
     def _set_distribution(self, min_bound, max_bound, type_distrib):
-        """ Set a distribution for family age gaps """
-
-        num_dup = 1
-        prob_sum = 0.0
-        prob_dist_list = [(num_dup, prob_sum)]
-        num_dup_records_distrib = max_bound
-        num_org_records_distrib = max_bound
-
-        gap = max_bound - min_bound
+        """ Set a distribution for family age gaps (a utils.DiscreteSampler) """
 
         self.prob_distribution = type_distrib
-        max_num_dups_distrib = gap
 
-        if self.prob_distribution == "uni":  # Uniform distribution
-
-            uniform_val = 1.0 / float(max_num_dups_distrib)
+        # Mean for the poisson numbers (as many 'duplicates' as 'originals')
+        #
+        return self._count_distribution(type_distrib, max_bound - min_bound, 2.0)
 
-            for i in range(max_num_dups_distrib - 1):
-                num_dup += 1
-                prob_dist_list.append((num_dup, uniform_val + prob_dist_list[-1][1]))
+    def _count_distribution(self, type_distrib, max_count, mean):
+        """
+        Create a distribution of counts from 1 to 'max_count'
 
-        elif self.prob_distribution == "poi":  # Poisson distribution
+        The probabilities are computed in closed form with NumPy: uniform
+        ("uni"), Poisson ("poi", the probabilities of 0 to max_count-1 events
+        with the given mean, computed from log factorials) or Zipf ("zip",
+        with theta 0.5). Any other type of distribution always gives a count
+        of 1.
 
-            def fac(n):  # Factorial of an integer number (recursive calculation)
-                if n > 1.0:
-                    return n * fac(n - 1.0)
-                else:
-                    return 1.0
+        Return
+        --------
+        sampler : utils.DiscreteSampler of the counts
 
-            poisson_num = []  # A list of poisson numbers
-            poisson_sum = 0.0  # The sum of all poisson number
+        """
+        counts = numpy.arange(1, max_count + 1)
 
-            # The mean (lambda) for the poisson numbers
-            #
-            mean = 1.0 + (
-                float(num_dup_records_distrib) / float(num_org_records_distrib)
-            )
+        if type_distrib == "uni":  # Uniform distribution - - - - - - - - - - - - -
+            probs = numpy.full(max_count, 1.0 / float(max_count))
 
-            for i in range(max_num_dups_distrib):
-                poisson_num.append((math.exp(-mean) * (mean ** i)) / fac(i))
-                poisson_sum += poisson_num[-1]
+        elif type_distrib == "poi":  # Poisson distribution - - - - - - - - - - - -
+            log_fac = numpy.concatenate(([0.0], numpy.cumsum(numpy.log(counts[:-1]))))
+            log_probs = (counts - 1) * math.log(mean) - log_fac
+            probs = numpy.exp(log_probs - log_probs.max())
 
-            for i in range(max_num_dups_distrib):  # Scale so they sum up to 1.0
-                poisson_num[i] = poisson_num[i] / poisson_sum
+        elif type_distrib == "zip":  # Zipf distribution - - - - - - - - - - - - - -
+            zipf_theta = 0.5
+            probs = 1.0 / counts ** (1.0 - zipf_theta)
 
-            for i in range(max_num_dups_distrib - 1):
-                num_dup += 1
-                prob_dist_list.append((num_dup, poisson_num[i] + prob_dist_list[-1][1]))
+        else:
+            counts = counts[:1]
+            probs = numpy.ones(1)
 
-        elif self.prob_distribution == "zip":  # Zipf distribution
-            zipf_theta = 0.5
+        probs = probs / probs.sum()  # Scale so they sum up to 1.0
 
-            denom = 0.0
-            for i in range(num_org_records_distrib):
-                denom += 1.0 / (i + 1) ** (1.0 - zipf_theta)
+        cum_probs = numpy.concatenate(([0.0], numpy.cumsum(probs)[:-1]))
+        prob_dist_list = list(zip(counts.tolist(), cum_probs.tolist()))
 
-            zipf_c = 1.0 / denom
-            zipf_num = []  # A list of Zipf numbers
-            zipf_sum = 0.0  # The sum of all Zipf number
+        return utils.DiscreteSampler.from_prob_list(prob_dist_list)
 
-            for i in range(max_num_dups_distrib):
-                zipf_num.append(zipf_c / ((i + 1) ** (1.0 - zipf_theta)))
-                zipf_sum += zipf_num[-1]
+    def _load_attr_configuration(self, type="attributes"):
+        """
+        Return a (read-only) section of the attribute configuration (the
+        attribute file, or the default configuration), checked and parsed
+        by schema.parse_attr_config and cached for the whole process (see
+        schema.load_attr_config)
 
-            for i in range(max_num_dups_distrib):  # Scale so they sum up to 1.0
-                zipf_num[i] = zipf_num[i] / zipf_sum
+        """
+        return schema.load_attr_config(self._attr_file_name)[type]
 
-            for i in range(max_num_dups_distrib - 1):
-                num_dup += 1
-                prob_dist_list.append((num_dup, zipf_num[i] + prob_dist_list[-1][1]))
+    def _load_frequency_lookup_tables(self):
+        """ Load frequency files and misspellings and lookup dictionaries
 
-        return prob_dist_list
+        The tables are loaded once per process and shared by all generators
+        (see resources.load_table), so they must not be changed.
 
-    def _load_attr_configuration(self, type="attributes"):
-        if self._attr_file_name is None:
-            attr_data = cf.DEFAULT_ATTR_CONFIG
-            return attr_data[type]
-        else:
-            ## Exception handling
-            with open(self.attr_file_name, "r") as json_file:
-                attr_data = json.load(json_file)
-            return attr_data[type]
+        Return
+        --------
+        freq_files : Dictionary with a frequency sampler for each frequency field
 
-    def _load_frequency_lookup_tables(self):
-        """ Load frequency files and misspellings dictionaries """
+        """
+        trace = logger.isEnabledFor(logging.DEBUG)  # Checked once, not per event
 
         freq_files = {}
-        freq_files_length = {}
 
-        i = 0  # Loop counter
         # import freq file , misspell file and lookup file
         for field_dict in self.field_list:
             field_name = field_dict["name"]
 
-            # import freq file, shuffle data and return data in a list
+            # import freq file and return a sampler over its distinct values
             if field_dict["type"] == "freq":  # Check for 'freq' field type
-
                 file_name = field_dict["freq_file"]  # Get the corresponding file name
-                this_dir, this_filename = os.path.split(__file__)
-                file_name = os.path.join(this_dir, "data", file_name)
-
-                if file_name != None:
-                    try:
-                        fin = open(file_name)  # Open file for reading
-                    except:
-                        print("  Error: Can not open frequency file %s" % (file_name))
-                        raise Exception
-                    value_list = []  # List with all values of the frequency file
-
-                    for line in fin:
-                        line = line.strip()
-                        line_list = line.split(",")
-                        if len(line_list) != 2:
-                            print(
-                                "  Error: Illegal format in  frequency file %s: %s"
-                                % (file_name, line)
-                            )
-                            raise Exception
-
-                        line_val = line_list[0].strip()
-                        line_freq = int(line_list[1])
-
-                        # Append value as many times as given in frequency file
-                        #
-                        new_list = [line_val] * line_freq
-                        value_list += new_list
-
-                    random.shuffle(value_list)  # Randomly shuffle the list of values
-
-                    freq_files[field_name] = value_list
-                    freq_files_length[field_name] = len(value_list)
-
-                    if self.VERBOSE_OUTPUT == True:
-                        print(
-                            '  Loaded frequency file for field "%s" from file: %s'
-                            % (field_dict["name"], file_name)
-                        )
-                        print()
+                freq_files[field_name] = resources.load_table("freq", file_name)
 
-                else:
-                    print(
-                        '  Error: No file name defined for frequency field "%s"'
-                        % (field_dict["name"])
+                if trace:
+                    logger.debug(
+                        '  Loaded frequency file for field "%s" from file: %s',
+                        field_name,
+                        resources.data_file_name(file_name),
                     )
-                    raise Exception
-                # end of freg files
 
             # import misspell file,  return a dict
             if "misspell_file" in field_dict:  # Load misspellings dictionary file
                 misspell_file_name = field_dict["misspell_file"]
-
-                this_dir, this_filename = os.path.split(__file__)
-                misspell_file_name = os.path.join(this_dir, "data", misspell_file_name)
-
-                field_dict["misspell_dict"] = utils.load_misspellings_dict(
-                    misspell_file_name
+                field_dict["misspell_dict"] = resources.load_table(
+                    "misspell", misspell_file_name
                 )
 
-                if self.VERBOSE_OUTPUT == True:
-                    print(
-                        '  Loaded misspellings dictionary for field "%s" from file: "%s'
-                        % (field_dict["name"], misspell_file_name)
+                if trace:
+                    logger.debug(
+                        '  Loaded misspellings dictionary for field "%s" from file: "%s',
+                        field_name,
+                        resources.data_file_name(misspell_file_name),
                     )
-                    print()
 
             # import lookup_file,  and return data lookup dict
             if "lookup_file" in field_dict:  # Load lookup dictionary file
                 lookup_file_name = field_dict["lookup_file"]
+                field_dict["lookup_dict"] = resources.load_table(
+                    "lookup", lookup_file_name
+                )
 
-                this_dir, this_filename = os.path.split(__file__)
-                lookup_file_name = os.path.join(this_dir, "data", lookup_file_name)
-
-                field_dict["lookup_dict"] = utils.load_lookup_dict(lookup_file_name)
-
-                if self.VERBOSE_OUTPUT == True:
-                    print(
-                        '  Loaded lookup dictionary for field "%s" from file: "%s'
-                        % (field_dict["name"], lookup_file_name)
+                if trace:
+                    logger.debug(
+                        '  Loaded lookup dictionary for field "%s" from file: "%s',
+                        field_name,
+                        resources.data_file_name(lookup_file_name),
                     )
-                    print()
-
-                self.field_list[
-                    i
-                ] = field_dict  # Store dictionary back into dictionary list
 
-            i += 1
-
-        return freq_files, freq_files_length
+        return freq_files
 
-    def _create_original_records(self, freq_files_length, freq_files, all_rec_set):
+    def _create_original_records(
+        self, freq_files, all_rec_index, num_records=None, first_rec_num=0):
         """ 
         Function to  create original records 
         
@@ -814,232 +808,221 @@ class DuplicateGen:
         
         Parameters
         ----------
-        freq_files_length : List of number of values for a  each frequency file
-        freq_files : List of list of values for each frequency file
-        all_rec_set: Set of all records (without identifier) used for checking that all records are different 
+        freq_files : Dictionary with a frequency sampler for each frequency file
+        all_rec_index: Index of all records (without identifier) used for checking that all records are different (see uniqueness) 
+        num_records : Number of records to create (default all original records)
+        first_rec_num : Number of the first record created (used in the identifiers)
         
         Return
         --------
-        org_rec : Dictionary for original records
+        org_rec : List of original records (record dictionaries without
+                identifier, the identifier of record 'i' is the one of
+                original record number 'first_rec_num + i')
         
         """
-        #random.seed(42)
-        org_rec = {}  # Dictionary for original records
+        trace = logger.isEnabledFor(logging.DEBUG)  # Checked once, not per event
+        rng = self._rng  # Random number generator of this generator
+        if num_records is None:
+            num_records = self.num_org_records
+
+        field_plan = self._field_plan  # Compiled fields (see fields module)
+
+        org_rec = []  # List of original records
         rec_cnt = 0
 
         # Loop to create orginal records
-        while rec_cnt < self.num_org_records:
-            rec_id = "rec-%i-org" % (rec_cnt)  # The records identifier
-
-            rec_dict = {"rec_id": rec_id}  # Save record identifier
+        while rec_cnt < num_records:
+            rec_dict = {}  # Record dictionary (without identifier)
 
             # Now randomly create all the fields in a record  - - - - - - - - - - - - - -
             #
-            for field_dict in self.field_list:
-                field_name = field_dict["name"]
-
-                if (field_name != "culture") & (
-                    random.random() <= field_dict["miss_prob"]
-                ):
-                    rand_val = cf.missing_value
-
-                elif field_dict["type"] == "freq":  # A frequency file based field
+            for field in field_plan:
 
-                    # pass the culture parameter
-                    if (field_name == "culture") & (self.culture is not None):
-                        rand_val = self.culture
-                    else:
-                        rand_num = random.randint(0, freq_files_length[field_name] - 1)
-                        rand_val = freq_files[field_name][rand_num]
-
-                    # Check for dependencies and follow if a certain probability is given
-                    #
-                    if ("depend" in field_dict) and (
-                        random.random() <= field_dict["depend_prob"]):
+                # (The random number is drawn for all fields, also the ones
+                # that can't be missing)
+                #
+                if (rng.random() <= field.miss_prob) and field.can_miss:
+                    continue  # Missing value (not saved)
 
-                        depend_field = field_dict[
-                            "depend"
-                        ]  # The field this field depends on
+                rand_val = field.create_value(rng, rec_dict)
 
-                        if "," not in depend_field:  # A single dependency field
-                            if (
-                                depend_field in rec_dict
-                            ):  # Randomly select a depdendent value
+                # Save value into record dictionary
+                #
+                if rand_val != cf.missing_value:  # Don't save missing values
+                    rec_dict[field.name] = rand_val
 
-                                # Get the value from the current record in the dependency field
-                                #
+            #### end of random field value assignation
 
-                                depend_value = rec_dict[depend_field].replace(" ", "")
-                                if depend_value in field_dict["lookup_dict"]:
-                                    rand_val = random.choice(
-                                        field_dict["lookup_dict"][depend_value]
-                                    )
+            # Check for uniqueness of the record
+            #
+            if all_rec_index.add(rec_dict):  # Check if same record already created
+                org_rec.append(rec_dict)  # Insert into original records
+                rec_cnt += 1
 
-                        else:  # Several fields this field depends upon
-                            depend_field_list = depend_field.split(",")
-                            depend_value_list = []
-                            depend_value = ""
-                            for df in depend_field_list:  # Create the dependency value
-                                if df in rec_dict:
-                                    df = df.replace(" ", "")
-                                    depend_value_list.append(rec_dict[df])
-                                    # depend_value += '-' + rec_dict[df]
-                            depend_value = "-".join(depend_value_list)
-                            if depend_value in field_dict["lookup_dict"]:
-                                rand_val = random.choice(
-                                    field_dict["lookup_dict"][depend_value]
-                                )
-                                # print('XX: got combined dependency value: %s' % (rand_val), depend_field, depend_value)
-                                #####################
-
-                elif field_dict["type"] == "date":  # A date field     
-                    rand_num = random.randint(
-                        field_dict["start_epoch"], field_dict["end_epoch"] - 1
+                # Print original record - - - - - - - - - - - - - - - - - - - - - - - - - -
+                #
+                if trace:
+                    logger.debug(
+                        "  Original:\n    Record ID         : %-30s%s",
+                        utils.record_id(first_rec_num + rec_cnt - 1),
+                        "".join(
+                            "\n    %-18s: %-30s"
+                            % (field_name, rec_dict.get(field_name, cf.missing_value))
+                            for field_name in self.field_names
+                        ),
                     )
-                    rand_date = utils.epoch_to_date(rand_num)  # Date triuplet
-                    rand_val = (
-                        rand_date[2] + rand_date[1] + rand_date[0]
-                    )  # ISO format: yyyymmdd
 
-                    # Check for dependencies and follow if a certain probability is given
-                    #
-                    if (
-                        (field_dict["name"] == "date_of_birth")
-                        and (random.random() < field_dict["depend_prob"])
-                        and (rec_dict.get("age", None) != None)
-                    ):
+            else:
+                self.generation_stats.counters["unique_collisions"] += 1
+                if trace:
+                    logger.debug(
+                        '***** Record "%s" already created',
+                        sorted(rec_dict.items()),
+                    )
+        # end of loop for orinal records
 
-                        # Replace year with the year according to the 'age' field value
-                        #
-                        assert " " not in rec_dict["age"], rec_dict["age"]
-                        assert rec_dict["age"] != "", 'Empty "rec_dict[age]"'
+        return org_rec
 
-                        year_birth = cf.current_year - int(rec_dict["age"])
-                        rand_val = (
-                            str(year_birth) + rand_date[1] + rand_date[0]
-                        )  # ISO format
+    def _create_original_records_batch(
+        self, freq_files, all_rec_index, num_records=None, first_rec_num=0,
+        numpy_rng=None):
+        """
+        Function to create original records with the vectorized NumPy engine
 
-                        # With a certain probability modify the age value (break dependency)
-                        #
-                        if random.random() > cf.age_dict["depend_prob"]:
-                            rand_num = random.randint(0, freq_files_length["age"] - 1)
-                            rec_dict["age"] = freq_files["age"][rand_num]
+        The field values are created column by column for all the missing
+        records at once (see batch.OriginalBatchGenerator). Records that are
+        not unique are dropped and created again in the next batch.
 
-                        # print('XX:  randomly replaced age:', rec_dict) #################
+        Parameters
+        ----------
+        freq_files : Dictionary with a frequency sampler for each frequency file
+        all_rec_index: Index of all records (without identifier) used for checking that all records are different (see uniqueness)
+        num_records : Number of records to create (default all original records)
+        first_rec_num : Number of the first record created (used in the identifiers)
+        numpy_rng : NumPy random generator (default a new unseeded generator)
 
-                elif field_dict["type"] == "phone":  # A phone number field
+        Return
+        --------
+        org_rec : List of original records (see _create_original_records)
 
-                    area_code = random.choice(field_dict["area_codes"])
+        """
+        trace = logger.isEnabledFor(logging.DEBUG)  # Checked once, not per event
+        if numpy_rng is None:
+            numpy_rng = numpy.random.default_rng()
 
-                    # Check for dependencies and follow if a certain probability is given
-                    #
-                    if ("depend" in field_dict) and (
-                        random.random() <= field_dict["depend_prob"]
-                    ):
-
-                        depend_field = field_dict["depend"]
-
-                        if depend_field in rec_dict:
-                            depend_value = rec_dict[depend_field]
-                            depend_value = depend_value.replace(" ", "")
-                            if depend_value in field_dict["lookup_dict"]:
-                                area_code = random.choice(
-                                    field_dict["lookup_dict"][depend_value]
-                                )
-
-                    max_digit = int("9" * field_dict["num_digits"])
-                    min_digit = int(
-                        "1" * (int(1 + round(field_dict["num_digits"] / 2.0)))
-                    )
-                    rand_num = random.randint(min_digit, max_digit)
-                    # rand_val = area_code+' '+str(rand_num).zfill(field_dict['num_digits'])
-                    rand_val = area_code + str(rand_num).zfill(field_dict["num_digits"])
+        batch_gen = batch.OriginalBatchGenerator(
+            self.field_list, freq_files, self.culture, numpy_rng
+        )
 
-                elif field_dict["type"] == "ident":  # A identification number field
-                    rand_num = random.randint(
-                        field_dict["start_id"], field_dict["end_id"] - 1
-                    )
-                    rand_val = str(rand_num)
-                    
-                    # Hack for uganda ART Number
-                    if(field_dict['name'] == 'medical_record_number'):
-                        art_prefix = ['KSD','NSU','MBA','KSG','FPL','RUK','KUL','KMC','KLH','KUB','MPK']
-                        rand_mrn = random.choice(art_prefix).upper() + "-"
-                        rand_val = rand_mrn+str(rand_num)
-
-                    if field_dict["name"] == "soc_sec_id":
-                        # generate random 4 letters for Uganda NIN
-                        rand_uganda = "".join(
-                            [random.choice(string.ascii_letters) for n in range(4)]
-                        ).upper()
-                        rand_val = str(rand_num) + rand_uganda
-
-                elif field_dict["type"] == "others":
-                    rand_val = "NoRole"
+        if num_records is None:
+            num_records = self.num_org_records
 
-                # Save value into record dictionary
-                #
-                if rand_val != cf.missing_value:  # Don't save missing values
-                    rec_dict[field_name] = rand_val
+        org_rec = []  # List of original records
+        rec_cnt = 0
 
-            #### end of random field value assignation
+        while rec_cnt < num_records:
+            for rec_data in batch_gen.create_records(num_records - rec_cnt):
 
-            # Create a string representation which can be used to check for uniqueness
-            #
-            rec_data = rec_dict.copy()  # Make a copy of the record dictionary
-            del rec_data["rec_id"]  # Remove the record identifier
-            rec_list = list(rec_data.items())
-            rec_list.sort()
-            rec_str = str(rec_list)
-
-            if rec_str not in all_rec_set:  # Check if same record already created
-                all_rec_set.add(rec_str)
-                org_rec[rec_id] = rec_dict  # Insert into original records
-                rec_cnt += 1
+                if all_rec_index.add(rec_data):  # Check if same record already created
+                    org_rec.append(rec_data)  # Insert into original records
+                    rec_cnt += 1
 
-                # Print original record - - - - - - - - - - - - - - - - - - - - - - - - - -
-                #
-                if self.VERBOSE_OUTPUT == True:
-                    print("  Original:")
-                    print("    Record ID         : %-30s" % (rec_dict["rec_id"]))
-                    for field_name in self.field_names:
-                        print(
-                            "    %-18s: %-30s"
-                            % (field_name, rec_dict.get(field_name, cf.missing_value))
+                else:
+                    self.generation_stats.counters["unique_collisions"] += 1
+                    if trace:
+                        logger.debug(
+                            '***** Record "%s" already created',
+                            sorted(rec_data.items()),
                         )
-                    print()
-
-            else:
-                if self.VERBOSE_OUTPUT == True:
-                    print('***** Record "%s" already created' % (rec_str))
-        # end of loop for orinal records
 
         return org_rec
 
     def _create_duplicate_records(
         self,
         org_rec,
-        prob_dist_list,
+        dup_count_sampler,
         new_org_rec,
-        select_prob_list,
-        all_rec_set,
-        freq_files_length,
-        freq_files):
+        select_sampler,
+        all_rec_index,
+        freq_files,
+        num_dup_records=None,
+        first_rec_num=0,
+        numpy_rng=None):
         """  
         Create duplicate records 
         
+        Duplicates are only created from the original records in 'org_rec',
+        which are numbered from 'first_rec_num' on. By default the number of
+        duplicates created is the number of duplicate records of the
+        generator.
+
+        The number of duplicates of each original record is drawn for all
+        records at once with the NumPy random generator 'numpy_rng'.
+
+        Return
+        --------
+        dup_rec : List of duplicate records (record dictionaries without
+                identifier)
+        org_rec_used : Set with the numbers of the original records used to
+                create duplicates
+        dup_links : Arrays with the number of the original record and the
+                number of the duplicate of each duplicate (their identifiers)
+
         """
-        #random.seed(42)
-        dup_rec = {}  # Dictionary for duplicate records
+        trace = logger.isEnabledFor(logging.DEBUG)  # Checked once, not per event
+        rng = self._rng  # Random number generator of this generator
+        if num_dup_records is None:
+            num_dup_records = self.num_dup_records
+
+        dup_rec = []  # List of duplicate records
+
+        # Cache for the phonetic and OCR changes of field values
+        transformation_cache = self._transformation_cache
+
+        # Counters of the modifications that changed a value or not, and of
+        # the other events (see the stats module)
+        counters = self.generation_stats.counters
+        op_applied = self.generation_stats.op_applied
+        op_noops = self.generation_stats.op_noops
+
+        # Field pairs that can be swapped, and the index of each field in the
+        # field plan (the position of its modification counter)
+        swap_pairs = self._swap_pairs
+        field_index = {field.name: i for i, field in enumerate(self._field_plan)}
+        num_fields = len(self._field_plan)
+
+        # Sampler of the fields that can still be modified in a duplicate
+        # (fields are removed once they have their maximal number of
+        # modifications)
+        field_sampler = utils.DynamicSampler(
+            self._field_plan, [field.select_prob for field in self._field_plan]
+        )
+
+        org_rec_used = set()  # Numbers of original records used to create
+        # duplicates
+
+        # Numbers of the original record and of the duplicate of all
+        # duplicates created (the true links, integer-coded)
+        link_org_nums = []
+        link_dup_nums = []
+
+        # Numbers of the original records not used so far. A record is only
+        # removed (swapped with the last one) once duplicates have been
+        # created from it, so each selection is O(1)
+        #
+        unused_rec_nums = list(range(first_rec_num, first_rec_num + len(org_rec)))
 
-        org_rec_used = {}  # Dictionary with record IDs of original records used to
-        # create duplicates
+        # Number of duplicates to create from each original record
+        #
+        if numpy_rng is None:
+            numpy_rng = numpy.random.default_rng()
+        dup_counts = dup_count_sampler.sample_array(len(org_rec), numpy_rng).tolist()
 
-        if self.num_dup_records > 0:
+        if num_dup_records > 0:
 
             rec_cnt = 0  # Record counter
 
-            while rec_cnt < self.num_dup_records:
+            while rec_cnt < num_dup_records:
 
                 if (
                     self.type_modification == "all"
@@ -1051,7 +1034,7 @@ class DuplicateGen:
                         list_type_of_error += [error_type] * int(
                             cf.error_type_distribution[error_type] * 100
                         )
-                    type_modification_to_apply = random.choice(list_type_of_error)
+                    type_modification_to_apply = rng.choice(list_type_of_error)
 
                 else:
                     type_modification_to_apply = self.type_modification
@@ -1059,28 +1042,29 @@ class DuplicateGen:
                 # Find an original record that has so far not been used to create - - - - -
                 # duplicates
                 #
-                rand_rec_num = random.randint(0, self.num_org_records)
-                org_rec_id = "rec-%i-org" % (rand_rec_num)
+                if len(unused_rec_nums) == 0:
+                    raise ValueError(
+                        "All original records have been used, cannot create "
+                        + "%i more duplicate records" % (num_dup_records - rec_cnt)
+                    )
 
-                while (org_rec_id in org_rec_used) or (org_rec_id not in org_rec):
-                     rand_rec_num = random.randint(
-                         0, self.num_org_records
-                     )  # Get new record number
-                     org_rec_id = "rec-%i-org" % (rand_rec_num)
-                     #print("Finding original record :",org_rec_id)
+                unused_ind = rng.randint(0, len(unused_rec_nums) - 1)
+                rand_rec_num = unused_rec_nums[unused_ind]
 
-                # Randomly choose how many duplicates to create from this record
+                # Number of duplicates to create from this record
                 #
-                num_dups = utils.random_select(prob_dist_list)
+                num_dups = dup_counts[rand_rec_num - first_rec_num]
 
-                if self.VERBOSE_OUTPUT == True:
-                    print(
-                        "  Use record %s to create %i duplicates"
-                        % (org_rec_id, num_dups)
+                if trace:
+                    logger.debug(
+                        "  Use record %s to create %i duplicates",
+                        utils.record_id(rand_rec_num),
+                        num_dups,
                     )
-                    print()
 
-                org_rec_dict = new_org_rec[org_rec_id]  # Get the original record
+                org_rec_dict = new_org_rec[
+                    rand_rec_num - first_rec_num
+                ]  # Get the original record
 
                 d = 0  # Loop counter for duplicates for this record
 
@@ -1088,29 +1072,27 @@ class DuplicateGen:
                 #
                 max_retry_num_dups = 10
                 retry_num_dups= 0
-                while (d < num_dups) and (rec_cnt < self.num_dup_records) and \
+                while (d < num_dups) and (rec_cnt < num_dup_records) and \
                      (retry_num_dups < max_retry_num_dups):
 
-                    if self.VERBOSE_OUTPUT == True:
-                        print("  Generate duplicate %d:" % (d + 1))
+                    if trace:
+                        logger.debug("  Generate duplicate %d:", d + 1)
 
                     # Create a duplicate of the original record
                     #
                     dup_rec_dict = (
                         org_rec_dict.copy()
                     )  # Make a copy of the original record
-                    dup_rec_id = "rec-%i-dup-%i" % (rand_rec_num, d)
-                    dup_rec_dict["rec_id"] = dup_rec_id
 
                     # Count the number of modifications in this record
                     #
                     num_modif_in_record = 0
 
-                    # Set the field modification counters to zero for all fields
+                    # Set the field modification counters to zero for all fields,
+                    # and all fields can be modified
                     #
-                    field_mod_count_dict = {}
-                    for field_dict in self.field_list:
-                        field_mod_count_dict[field_dict["name"]] = 0
+                    field_mod_counts = [0] * num_fields
+                    field_sampler.reset()
 
                     # Do random swapping between fields if two or more modifications in
                     # record
@@ -1122,22 +1104,16 @@ class DuplicateGen:
                             # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
                             # Random swapping of values between a pair of field values
                             #
-                            field_swap_pair_list = list(self.field_swap_prob.keys())
-                            random.shuffle(field_swap_pair_list)
+                            field_swap_pair_list = list(swap_pairs)
+                            rng.shuffle(field_swap_pair_list)
 
-                            for field_pair in field_swap_pair_list:
+                            for swap_prob, fname_a, fname_b in field_swap_pair_list:
 
-                                if (
-                                    random.random() <= self.field_swap_prob[field_pair]
-                                ) and (
+                                if (rng.random() <= swap_prob) and (
                                     num_modif_in_record
                                     <= (self.max_num_record_modifi - 2)
                                 ):
 
-                                    # convert to tuple
-                                    field_pair = eval(field_pair)
-                                    fname_a, fname_b = field_pair
-
                                     # Make sure both fields are in the record dictionary
                                     #
                                     if (fname_a in dup_rec_dict) and (
@@ -1152,18 +1128,26 @@ class DuplicateGen:
                                         dup_rec_dict[fname_b] = fvalue_a
 
                                         num_modif_in_record += 2
-
-                                        field_mod_count_dict[fname_a] = (
-                                            field_mod_count_dict[fname_a] + 1
-                                        )
-                                        field_mod_count_dict[fname_b] = (
-                                            field_mod_count_dict[fname_b] + 1
-                                        )
-
-                                        if self.VERBOSE_OUTPUT == True:
-                                            print(
-                                                '    Swapped fields "%s" and "%s": "%s" <-> "%s"'
-                                                % (fname_a, fname_b, fvalue_a, fvalue_b)
+                                        op_applied["field_swap_prob"] += 1
+
+                                        for swap_ind in (
+                                            field_index[fname_a],
+                                            field_index[fname_b],
+                                        ):
+                                            field_mod_counts[swap_ind] += 1
+                                            if (
+                                                field_mod_counts[swap_ind]
+                                                >= self.max_num_field_modifi
+                                            ):
+                                                field_sampler.remove(swap_ind)
+
+                                        if trace:
+                                            logger.debug(
+                                                '    Swapped fields "%s" and "%s": "%s" <-> "%s"',
+                                                fname_a,
+                                                fname_b,
+                                                fvalue_a,
+                                                fvalue_b,
                                             )
 
                     # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
@@ -1171,35 +1155,41 @@ class DuplicateGen:
                     #
                     max_retry_modif_in_record = 10
                     retry_modif_in_record = 0
+                    max_idle_modif_in_record = 100  # Field selections in a row
+                    idle_modif_in_record = 0  # without a change
                     while (num_modif_in_record < self.max_num_record_modifi) and \
-                             (retry_modif_in_record < max_retry_modif_in_record) :
+                             (retry_modif_in_record < max_retry_modif_in_record) and \
+                             (idle_modif_in_record < max_idle_modif_in_record):
+
+                        num_modif_before = num_modif_in_record
+
+                        # Stop if all fields have their maximal number of
+                        # modifications
+                        #
+                        if field_sampler.num_left == 0:
+                            break
 
                         # Randomly choose a field
                         #
-                        field_dict = utils.random_select(select_prob_list)
-                        field_name = field_dict["name"]
+                        field = select_sampler.sample(rng)
+                        field_ind = field_index[field.name]
 
-                        # Make sure this field hasn't been modified already
+                        # If this field has its maximal number of modifications,
+                        # choose one of the fields that can still be modified
                         #
-                        while (
-                            field_mod_count_dict[field_name]
-                            == self.max_num_field_modifi
-                        ):
-                            field_dict = utils.random_select(select_prob_list)
-                            field_name = field_dict["name"]
-
-                        if field_dict["char_range"] == "digit":
-                            field_range = string.digits
-                        elif field_dict["char_range"] == "alpha":
-                            field_range = string.ascii_lowercase
-                        elif field_dict["char_range"] == "alphanum":
-                            field_range = string.digits + string.ascii_lowercase
+                        if field_mod_counts[field_ind] >= self.max_num_field_modifi:
+                            field_ind = field_sampler.sample_index(rng)
+                            field = self._field_plan[field_ind]
+
+                        field_name = field.name
+                        field_dict = field.field_dict
+                        field_range = field.field_range
 
                         # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
                         # Randomly select the number of modifications to be done in this field
                         # (and make sure we don't too many modifications in the record)
                         #
-                        num_field_mod_to_do = random.randint(
+                        num_field_mod_to_do = rng.randint(
                             1, self.max_num_field_modifi
                         )
 
@@ -1223,6 +1213,7 @@ class DuplicateGen:
                         for m in range(num_field_mod_to_do):
                             old_field_val = dup_rec_dict.get(field_name, None)
                             dup_field_val = old_field_val  # Modify this value
+                            mod_op = None  # Modification done (None if none drawn)
 
                             # -------------------------------------------------------------------
                             # Typographical modifications
@@ -1231,7 +1222,7 @@ class DuplicateGen:
 
                                 # Randomly choose a modification
                                 #
-                                mod_op = utils.random_select(field_dict["prob_list"])
+                                mod_op = field.prob_sampler.sample(rng)
 
                                 # Do the selected modification
                                 # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
@@ -1241,24 +1232,24 @@ class DuplicateGen:
                                 #
                                 if (
                                     (mod_op == "misspell_prob")
-                                    and ("misspell_dict" in field_dict)
-                                    and (old_field_val in field_dict["misspell_dict"])
+                                    and (field.misspell_dict is not None)
+                                    and (old_field_val in field.misspell_dict)
                                 ):
 
-                                    misspell_list = field_dict["misspell_dict"][
-                                        old_field_val
-                                    ]
+                                    misspell_list = field.misspell_dict[old_field_val]
 
                                     if len(misspell_list) == 1:
                                         dup_field_val = misspell_list[0]
                                     else:  # Randomly choose a value
-                                        dup_field_val = random.choice(misspell_list)
+                                        dup_field_val = rng.choice(misspell_list)
 
-                                    if self.VERBOSE_OUTPUT == True:
-                                        print(
+                                    if trace:
+                                        logger.debug(
                                             '    Exchanged value "%s" in field "%s" with "%s"'
-                                            % (old_field_val, field_name, dup_field_val)
-                                            + " from misspellings dictionary"
+                                            " from misspellings dictionary",
+                                            old_field_val,
+                                            field_name,
+                                            dup_field_val,
                                         )
 
                                 # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
@@ -1268,69 +1259,17 @@ class DuplicateGen:
                                     old_field_val != None
                                 ):
 
-                                    if (
-                                        field_dict["type"] == "freq"
-                                    ):  # Frequency file based field
-                                        rand_num = random.randint(
-                                            0, freq_files_length[field_name] - 1
-                                        )
-                                        dup_field_val = freq_files[field_name][rand_num]
-
-                                    elif field_dict["type"] == "date":  # A date field
-                                        rand_num = random.randint(
-                                            field_dict["start_epoch"],
-                                            field_dict["end_epoch"] - 1,
-                                        )
-                                        rand_date = utils.epoch_to_date(rand_num)
-                                        dup_field_val = (
-                                            rand_date[2] + rand_date[1] + rand_date[0]
-                                        )
-
-                                    elif (
-                                        field_dict["type"] == "phone"
-                                    ):  # A phone number field
-                                        area_code = random.choice(
-                                            field_dict["area_codes"]
-                                        )
-                                        max_digit = int("9" * field_dict["num_digits"])
-                                        min_digit = int(
-                                            "1"
-                                            * (
-                                                int(
-                                                    1
-                                                    + round(
-                                                        field_dict["num_digits"] / 2.0
-                                                    )
-                                                )
-                                            )
-                                        )
-                                        rand_num = random.randint(min_digit, max_digit)
-                                        dup_field_val = (
-                                            area_code
-                                            + " "
-                                            + str(rand_num).zfill(
-                                                field_dict["num_digits"]
-                                            )
-                                        )
-
-                                    elif (
-                                        field_dict["type"] == "ident"
-                                    ):  # Identification no. field
-                                        rand_num = random.randint(
-                                            field_dict["start_id"],
-                                            field_dict["end_id"] - 1,
-                                        )
-                                        dup_field_val = str(rand_num)
+                                    dup_field_val = field.new_value(
+                                        rng, old_field_val
+                                    )  # New value of the field type
 
                                     if dup_field_val != old_field_val:
-                                        if self.VERBOSE_OUTPUT == True:
-                                            print(
-                                                '    Exchanged value in field "%s": "%s" -> "%s"'
-                                                % (
-                                                    field_name,
-                                                    old_field_val,
-                                                    dup_field_val,
-                                                )
+                                        if trace:
+                                            logger.debug(
+                                                '    Exchanged value in field "%s": "%s" -> "%s"',
+                                                field_name,
+                                                old_field_val,
+                                                dup_field_val,
                                             )
 
                                 # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
@@ -1344,10 +1283,12 @@ class DuplicateGen:
                                         cf.missing_value
                                     )  # Set to a missing value
 
-                                    if self.VERBOSE_OUTPUT == True:
-                                        print(
-                                            '    Set field "%s" to missing value: "%s" -> "%s"'
-                                            % (field_name, old_field_val, dup_field_val)
+                                    if trace:
+                                        logger.debug(
+                                            '    Set field "%s" to missing value: "%s" -> "%s"',
+                                            field_name,
+                                            old_field_val,
+                                            dup_field_val,
                                         )
 
                                 # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
@@ -1367,7 +1308,7 @@ class DuplicateGen:
                                     if num_words == 2:  # If only 2 words given
                                         swap_index = 0
                                     else:  # If more words given select position randomly
-                                        swap_index = random.randint(0, num_words - 2)
+                                        swap_index = rng.randint(0, num_words - 2)
 
                                     tmp_word = word_list[swap_index]
                                     word_list[swap_index] = word_list[swap_index + 1]
@@ -1376,14 +1317,12 @@ class DuplicateGen:
                                     dup_field_val = " ".join(word_list)
 
                                     if dup_field_val != old_field_val:
-                                        if self.VERBOSE_OUTPUT == True:
-                                            print(
-                                                '    Swapped words in field "%s": "%s" -> "%s"'
-                                                % (
-                                                    field_name,
-                                                    old_field_val,
-                                                    dup_field_val,
-                                                )
+                                        if trace:
+                                            logger.debug(
+                                                '    Swapped words in field "%s": "%s" -> "%s"',
+                                                field_name,
+                                                old_field_val,
+                                                dup_field_val,
                                             )
 
                                 # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
@@ -1393,69 +1332,16 @@ class DuplicateGen:
                                     old_field_val != None
                                 ):
 
-                                    if (
-                                        field_dict["type"] == "freq"
-                                    ):  # Frequency file based field
-                                        rand_num = random.randint(
-                                            0, freq_files_length[field_name] - 1
-                                        )
-                                        dup_field_val = freq_files[field_name][rand_num]
-
-                                    elif field_dict["type"] == "date":  # A date field
-                                        rand_num = random.randint(
-                                            field_dict["start_epoch"],
-                                            field_dict["end_epoch"] - 1,
-                                        )
-                                        rand_date = utils.epoch_to_date(rand_num)
-                                        dup_field_val = (
-                                            rand_date[2] + rand_date[1] + rand_date[0]
-                                        )
-
-                                    elif (
-                                        field_dict["type"] == "phone"
-                                    ):  # A phone number field
-                                        area_code = random.choice(
-                                            field_dict["area_codes"]
-                                        )
-                                        max_digit = int("9" * field_dict["num_digits"])
-                                        min_digit = int(
-                                            "1"
-                                            * (
-                                                int(
-                                                    1
-                                                    + round(
-                                                        field_dict["num_digits"] / 2.0
-                                                    )
-                                                )
-                                            )
-                                        )
-                                        rand_num = random.randint(min_digit, max_digit)
-                                        dup_field_val = (
-                                            area_code
-                                            + " "
-                                            + str(rand_num).zfill(
-                                                field_dict["num_digits"]
-                                            )
-                                        )
+                                    dup_field_val = field.new_value(
+                                        rng, old_field_val
+                                    )  # New value of the field type
 
-                                    elif (
-                                        field_dict["type"] == "ident"
-                                    ):  # A identification number
-                                        rand_num = random.randint(
-                                            field_dict["start_id"],
-                                            field_dict["end_id"] - 1,
-                                        )
-                                        dup_field_val = str(rand_num)
-
-                                    if self.VERBOSE_OUTPUT == True:
-                                        print(
-                                            "    Exchanged missing value "
-                                            + '"%s" in field "%s" with "%s"'
-                                            % (
-                                                cf.missing_value,
-                                                field_name,
-                                                dup_field_val,
-                                            )
+                                    if trace:
+                                        logger.debug(
+                                            '    Exchanged missing value "%s" in field "%s" with "%s"',
+                                            cf.missing_value,
+                                            field_name,
+                                            dup_field_val,
                                         )
 
                                 # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
@@ -1466,7 +1352,7 @@ class DuplicateGen:
                                     # Get an substitution position randomly
                                     #
                                     rand_sub_pos = utils.error_position(
-                                        dup_field_val, 0
+                                        dup_field_val, 0, rng
                                     )
 
                                     if (
@@ -1475,7 +1361,10 @@ class DuplicateGen:
 
                                         old_char = dup_field_val[rand_sub_pos]
                                         new_char = utils.error_character(
-                                            old_char, field_dict["char_range"]
+                                            old_char,
+                                            field.char_range,
+                                            rng,
+                                            typo_prob=self.single_typo_prob,
                                         )
 
                                         new_field_val = (
@@ -1487,17 +1376,14 @@ class DuplicateGen:
                                         if new_field_val != dup_field_val:
                                             dup_field_val = new_field_val
 
-                                            if self.VERBOSE_OUTPUT == True:
-                                                print(
-                                                    "    Substituted character "
-                                                    + '"%s" with "%s" in field '
-                                                    % (old_char, new_char)
-                                                    + '"%s": "%s" -> "%s"'
-                                                    % (
-                                                        field_name,
-                                                        old_field_val,
-                                                        dup_field_val,
-                                                    )
+                                            if trace:
+                                                logger.debug(
+                                                    '    Substituted character "%s" with "%s" in field "%s": "%s" -> "%s"',
+                                                    old_char,
+                                                    new_char,
+                                                    field_name,
+                                                    old_field_val,
+                                                    dup_field_val,
                                                 )
 
                                 # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
@@ -1508,9 +1394,9 @@ class DuplicateGen:
                                     # Get an insert position randomly
                                     #
                                     rand_ins_pos = utils.error_position(
-                                        dup_field_val, +1
+                                        dup_field_val, +1, rng
                                     )
-                                    rand_char = random.choice(field_range)
+                                    rand_char = rng.choice(field_range)
 
                                     if (
                                         rand_ins_pos != None
@@ -1521,16 +1407,13 @@ class DuplicateGen:
                                             + dup_field_val[rand_ins_pos:]
                                         )
 
-                                        if self.VERBOSE_OUTPUT == True:
-                                            print(
-                                                "    Inserted char "
-                                                + '"%s" into field "%s": "%s" -> "%s"'
-                                                % (
-                                                    rand_char,
-                                                    field_name,
-                                                    old_field_val,
-                                                    dup_field_val,
-                                                )
+                                        if trace:
+                                            logger.debug(
+                                                '    Inserted char "%s" into field "%s": "%s" -> "%s"',
+                                                rand_char,
+                                                field_name,
+                                                old_field_val,
+                                                dup_field_val,
                                             )
 
                                 # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
@@ -1545,7 +1428,7 @@ class DuplicateGen:
                                     # Get a delete position randomly
                                     #
                                     rand_del_pos = utils.error_position(
-                                        dup_field_val, 0
+                                        dup_field_val, 0, rng
                                     )
 
                                     del_char = dup_field_val[rand_del_pos]
@@ -1555,16 +1438,13 @@ class DuplicateGen:
                                         + dup_field_val[rand_del_pos + 1 :]
                                     )
 
-                                    if self.VERBOSE_OUTPUT == True:
-                                        print(
-                                            "    Deleted character "
-                                            + '"%s" in field "%s": "%s" -> "%s"'
-                                            % (
-                                                del_char,
-                                                field_name,
-                                                old_field_val,
-                                                dup_field_val,
-                                            )
+                                    if trace:
+                                        logger.debug(
+                                            '    Deleted character "%s" in field "%s": "%s" -> "%s"',
+                                            del_char,
+                                            field_name,
+                                            old_field_val,
+                                            dup_field_val,
                                         )
 
                                 # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
@@ -1579,7 +1459,7 @@ class DuplicateGen:
                                     # Get a transposition position randomly
                                     #
                                     rand_trans_pos = utils.error_position(
-                                        dup_field_val, -1
+                                        dup_field_val, -1, rng
                                     )
 
                                     trans_chars = dup_field_val[
@@ -1598,15 +1478,13 @@ class DuplicateGen:
                                     if new_field_val != dup_field_val:
                                         dup_field_val = new_field_val
 
-                                        if self.VERBOSE_OUTPUT == True:
-                                            print(
-                                                '    Transposed characters "%s" in field "%s": "%s"'
-                                                % (
-                                                    trans_chars,
-                                                    field_name,
-                                                    old_field_val,
-                                                )
-                                                + '-> "%s"' % (dup_field_val)
+                                        if trace:
+                                            logger.debug(
+                                                '    Transposed characters "%s" in field "%s": "%s"-> "%s"',
+                                                trans_chars,
+                                                field_name,
+                                                old_field_val,
+                                                dup_field_val,
                                             )
 
                                 # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
@@ -1624,13 +1502,13 @@ class DuplicateGen:
                                     dup_field_val = dup_field_val.strip()
 
                                     rand_ins_pos = utils.error_position(
-                                        dup_field_val, 0
+                                        dup_field_val, 0, rng
                                     )
                                     while (dup_field_val[rand_ins_pos - 1] == " ") or (
                                         dup_field_val[rand_ins_pos] == " "
                                     ):
                                         rand_ins_pos = utils.error_position(
-                                            dup_field_val, 0
+                                            dup_field_val, 0, rng
                                         )
 
                                     new_field_val = (
@@ -1642,15 +1520,12 @@ class DuplicateGen:
                                     if new_field_val != dup_field_val:
                                         dup_field_val = new_field_val
 
-                                        if self.VERBOSE_OUTPUT == True:
-                                            print(
-                                                '    Inserted space " " into field '
-                                                + '"%s": "%s" -> "%s"'
-                                                % (
-                                                    field_name,
-                                                    old_field_val,
-                                                    dup_field_val,
-                                                )
+                                        if trace:
+                                            logger.debug(
+                                                '    Inserted space " " into field "%s": "%s" -> "%s"',
+                                                field_name,
+                                                old_field_val,
+                                                dup_field_val,
                                             )
 
                                 # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
@@ -1671,7 +1546,7 @@ class DuplicateGen:
                                             " "
                                         )  # Get index of the space
                                     else:
-                                        rand_space = random.randint(1, num_spaces - 1)
+                                        rand_space = rng.randint(1, num_spaces - 1)
                                         space_ind = dup_field_val.index(
                                             " ", 0
                                         )  # Index of first space
@@ -1689,15 +1564,12 @@ class DuplicateGen:
                                     if new_field_val != dup_field_val:
                                         dup_field_val = new_field_val
 
-                                        if self.VERBOSE_OUTPUT == True:
-                                            print(
-                                                '    Deleted space " " from field '
-                                                + '"%s": "%s" -> "%s"'
-                                                % (
-                                                    field_name,
-                                                    old_field_val,
-                                                    dup_field_val,
-                                                )
+                                        if trace:
+                                            logger.debug(
+                                                '    Deleted space " " from field "%s": "%s" -> "%s"',
+                                                field_name,
+                                                old_field_val,
+                                                dup_field_val,
                                             )
 
                             # -------------------------------------------------------------------
@@ -1707,15 +1579,13 @@ class DuplicateGen:
                                 and ("pho_prob" in field_dict)
                                 and (old_field_val != None)):
 
-                                if random.random() <= field_dict["pho_prob"]:
-                                    phonetic_changes = utils.get_transformation(
+                                if rng.random() <= field_dict["pho_prob"]:
+                                    mod_op = "pho_prob"
+                                    list_pc = transformation_cache.get_changes(
                                         old_field_val, type_modification_to_apply
                                     )
-                                    if "," in phonetic_changes:
-                                        tmpstr = phonetic_changes.split(",")
-                                        pc = tmpstr[1][:-1]  # Remove the last ';'
-                                        list_pc = pc.split(";")
-                                        ch = random.choice(list_pc)
+                                    if list_pc:
+                                        ch = rng.choice(list_pc)
                                         if ch != "":
                                             dup_field_val = utils.apply_change(
                                                 old_field_val, ch
@@ -1724,16 +1594,13 @@ class DuplicateGen:
                                             retry_modif_in_record +=1
                                    
 
-                                        if self.VERBOSE_OUTPUT == True:
-                                            print(
-                                                "    Phonetic modification "
-                                                + '"%s" in field "%s": "%s" -> "%s"'
-                                                % (
-                                                    ch,
-                                                    field_name,
-                                                    old_field_val,
-                                                    dup_field_val,
-                                                )
+                                        if trace:
+                                            logger.debug(
+                                                '    Phonetic modification "%s" in field "%s": "%s" -> "%s"',
+                                                ch,
+                                                field_name,
+                                                old_field_val,
+                                                dup_field_val,
                                             )
 
                             # -------------------------------------------------------------------
@@ -1743,15 +1610,13 @@ class DuplicateGen:
                                 and ("ocr_prob" in field_dict)
                                 and (old_field_val != None)):
 
-                                if random.random() <= field_dict["ocr_prob"]:
-                                    ocr_changes = utils.get_transformation(
+                                if rng.random() <= field_dict["ocr_prob"]:
+                                    mod_op = "ocr_prob"
+                                    list_pc = transformation_cache.get_changes(
                                         old_field_val, type_modification_to_apply
                                     )
-                                    if "," in ocr_changes:
-                                        tmpstr = ocr_changes.split(",")
-                                        pc = tmpstr[1][:-1]  # Remove the last ';'
-                                        list_pc = pc.split(";")
-                                        ch = random.choice(list_pc)
+                                    if list_pc:
+                                        ch = rng.choice(list_pc)
                                         if ch != "":
                                             dup_field_val = utils.apply_change(
                                                 old_field_val, ch
@@ -1759,15 +1624,13 @@ class DuplicateGen:
                                         else:
                                             retry_modif_in_record +=1
 
-                                        if self.VERBOSE_OUTPUT == True:
-                                            print(
-                                                '    OCR modification  "%s" from field "%s": "%s" -> "%s"'
-                                                % (
-                                                    ch,
-                                                    field_name,
-                                                    old_field_val,
-                                                    dup_field_val,
-                                                )
+                                        if trace:
+                                            logger.debug(
+                                                '    OCR modification  "%s" from field "%s": "%s" -> "%s"',
+                                                ch,
+                                                field_name,
+                                                old_field_val,
+                                                dup_field_val,
                                             )
 
                                 # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
@@ -1775,12 +1638,13 @@ class DuplicateGen:
                                 # characters)
                                 #
                                 elif (
-                                    random.random() <= field_dict["ocr_fail_prob"]
+                                    rng.random() <= field_dict["ocr_fail_prob"]
                                 ) and (len(old_field_val) > 1):
+                                    mod_op = "ocr_fail_prob"
 
                                     # Get a delete position randomly
                                     #
-                                    rand_del_pos = utils.error_position(dup_field_val, 0)
+                                    rand_del_pos = utils.error_position(dup_field_val, 0, rng)
 
                                     del_char = dup_field_val[rand_del_pos]
 
@@ -1790,16 +1654,13 @@ class DuplicateGen:
                                         + dup_field_val[rand_del_pos + 1 :]
                                     )
 
-                                    if self.VERBOSE_OUTPUT == True:
-                                        print(
-                                            "    OCR Failure character "
-                                            + '"%s" in field "%s": "%s" -> "%s"'
-                                            % (
-                                                del_char,
-                                                field_name,
-                                                old_field_val,
-                                                dup_field_val,
-                                            )
+                                    if trace:
+                                        logger.debug(
+                                            '    OCR Failure character "%s" in field "%s": "%s" -> "%s"',
+                                            del_char,
+                                            field_name,
+                                            old_field_val,
+                                            dup_field_val,
                                         )
 
                                 # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
@@ -1807,21 +1668,22 @@ class DuplicateGen:
                                 # contain at least two characters)
                                 #
                                 elif (
-                                    random.random() <= field_dict["ocr_ins_sp_prob"]
+                                    rng.random() <= field_dict["ocr_ins_sp_prob"]
                                 ) and (len(dup_field_val.strip()) > 1):
+                                    mod_op = "ocr_ins_sp_prob"
 
                                     # Randomly select the place where to insert a space (make sure
                                     # no spaces are next to this place)
                                     #
                                     dup_field_val = dup_field_val.strip()
                                     rand_ins_pos = utils.error_position(
-                                        dup_field_val, 0
+                                        dup_field_val, 0, rng
                                     )
                                     while (dup_field_val[rand_ins_pos - 1] == " ") or (
                                         dup_field_val[rand_ins_pos] == " "
                                     ):
                                         rand_ins_pos = utils.error_position(
-                                            dup_field_val, 0
+                                            dup_field_val, 0, rng
                                         )
 
                                     new_field_val = (
@@ -1833,15 +1695,12 @@ class DuplicateGen:
                                     if new_field_val != dup_field_val:
                                         dup_field_val = new_field_val
 
-                                        if self.VERBOSE_OUTPUT == True:
-                                            print(
-                                                '    OCR Inserted space " " into field '
-                                                + '"%s": "%s" -> "%s"'
-                                                % (
-                                                    field_name,
-                                                    old_field_val,
-                                                    dup_field_val,
-                                                )
+                                        if trace:
+                                            logger.debug(
+                                                '    OCR Inserted space " " into field "%s": "%s" -> "%s"',
+                                                field_name,
+                                                old_field_val,
+                                                dup_field_val,
                                             )
 
                                 # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
@@ -1849,8 +1708,9 @@ class DuplicateGen:
                                 # contain a space character)
                                 #
                                 elif (
-                                    random.random() <= field_dict["ocr_del_sp_prob"]
+                                    rng.random() <= field_dict["ocr_del_sp_prob"]
                                 ) and (" " in dup_field_val):
+                                    mod_op = "ocr_del_sp_prob"
 
                                     # Count number of spaces and randomly select one to be deleted
                                     #
@@ -1861,7 +1721,7 @@ class DuplicateGen:
                                             " "
                                         )  # Get index of the space
                                     else:
-                                        rand_space = random.randint(1, num_spaces - 1)
+                                        rand_space = rng.randint(1, num_spaces - 1)
                                         space_ind = dup_field_val.index(
                                             " ", 0
                                         )  # Index of first space
@@ -1879,54 +1739,66 @@ class DuplicateGen:
                                     if new_field_val != dup_field_val:
                                         dup_field_val = new_field_val
 
-                                        if self.VERBOSE_OUTPUT == True:
-                                            print(
-                                                '    OCR Deleted space " " from field '
-                                                + '"%s": "%s" -> "%s"'
-                                                % (
-                                                    field_name,
-                                                    old_field_val,
-                                                    dup_field_val,
-                                                )
+                                        if trace:
+                                            logger.debug(
+                                                '    OCR Deleted space " " from field "%s": "%s" -> "%s"',
+                                                field_name,
+                                                old_field_val,
+                                                dup_field_val,
                                             )
 
                             # Now check if the modified field value is different - - - - - - - -
                             #
+                            if mod_op is not None:
+                                if dup_field_val != old_field_val:
+                                    op_applied[mod_op] += 1
+                                else:
+                                    op_noops[mod_op] += 1
+
                             if (old_field_val == org_field_val) and (
                                 dup_field_val != old_field_val
                             ):  # The first field modification
-                                field_mod_count_dict[field_name] = 1
+                                field_mod_counts[field_ind] = 1
                                 num_modif_in_record += 1
 
                             elif (old_field_val != org_field_val) and (
                                 dup_field_val != old_field_val
                             ):  # Following field mods.
-                                field_mod_count_dict[field_name] += 1
+                                field_mod_counts[field_ind] += 1
                                 num_modif_in_record += 1
 
+                            if field_mod_counts[field_ind] >= self.max_num_field_modifi:
+                                field_sampler.remove(field_ind)
+
                             if dup_field_val != old_field_val:
                                 dup_rec_dict[field_name] = dup_field_val
-                    
+
+                        # Stop if the remaining fields cannot be changed (for
+                        # example values without phonetic changes)
+                        #
+                        if num_modif_in_record == num_modif_before:
+                            idle_modif_in_record += 1
+                        else:
+                            idle_modif_in_record = 0
+
+                    if retry_modif_in_record >= max_retry_modif_in_record:
+                        counters["retry_modif_in_record_exhausted"] += 1
+                    elif idle_modif_in_record >= max_idle_modif_in_record:
+                        counters["idle_modif_in_record_exhausted"] += 1
+
                     # END WHILE LOOP DUPLICATE RECORDS
                     # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
                     # Now check if the duplicate record differs from the original
                     #
-                    rec_data = (
-                        dup_rec_dict.copy()
-                    )  # Make a copy of the record dictionary
-                    del rec_data["rec_id"]  # Remove the record identifier
-                    rec_list = list(rec_data.items())
-                    rec_list.sort()
-                    rec_str = str(rec_list)
-
-                    if (rec_str not in all_rec_set):  # Check if same record has not already
-                        # been created
-                        all_rec_set.add(rec_str)
-                        org_rec_used[org_rec_id] = 1
-
-                        dup_rec[
-                            dup_rec_id
-                        ] = dup_rec_dict  # Insert into duplicate records
+                    if all_rec_index.add(dup_rec_dict):  # Check if same record has not
+                        # already been created
+                        org_rec_used.add(rand_rec_num)
+
+                        dup_rec.append(dup_rec_dict)  # Insert into duplicate records
+
+                        # True link of the duplicate to its original record
+                        link_org_nums.append(rand_rec_num)
+                        link_dup_nums.append(d)
 
                         d += 1  # Duplicate counter (loop counter)
 
@@ -1935,134 +1807,878 @@ class DuplicateGen:
                         # Print original and duplicate records field by field - - - - - - - - -
                         #
                    
-                        if self.VERBOSE_OUTPUT == True:
-                            print("  Original and duplicate records:")
-                            print(
-                                "    Number of modifications in record: %d"
-                                % (num_modif_in_record)
-                            )
-                            print(
-                                "    Record ID         : %-30s | %-30s"
-                                % (org_rec_dict["rec_id"], dup_rec_dict["rec_id"])
-                            )
-                            for field_name in self.field_names:
-                                print(
-                                    "    %-18s: %-30s | %-30s"
+                        if trace:
+                            logger.debug(
+                                "  Original and duplicate records:"
+                                "\n    Number of modifications in record: %d"
+                                "\n    Record ID         : %-30s | %-30s%s",
+                                num_modif_in_record,
+                                utils.record_id(rand_rec_num),
+                                utils.record_id(rand_rec_num, d - 1),
+                                "".join(
+                                    "\n    %-18s: %-30s | %-30s"
                                     % (
                                         field_name,
                                         org_rec_dict.get(field_name, cf.missing_value),
                                         dup_rec_dict.get(field_name, cf.missing_value),
                                     )
-                                )
-                            print()
+                                    for field_name in self.field_names
+                                ),
+                            )
 
                     else:
-                        retry_num_dups += 1 
-                        if self.VERBOSE_OUTPUT == True:
-                            print(
-                                '  No random modifications for record "%s" -> Choose another'
-                                % (dup_rec_id)
+                        counters["unique_collisions"] += 1
+                        retry_num_dups += 1
+                        if trace:
+                            logger.debug(
+                                '  No random modifications for record "%s" -> Choose another',
+                                utils.record_id(rand_rec_num, d),
                             )
-                                
-                    if self.VERBOSE_OUTPUT == True:
-                        print()
 
-        return dup_rec, org_rec_used
+                if retry_num_dups >= max_retry_num_dups:
+                    counters["retry_num_dups_exhausted"] += 1
 
-    def generate(self, output="dict"):
-        """ 
-        Main function to generate the synthetic duplicate personal dataset
-        
-        Parameters
-        -----------
-        
-        output : Return type of the dataset ( a dictionary or 
-                a dataframe)
-        
+                # Remove the original record from the unused records (also if
+                # no unique duplicate could be created from it)
+                #
+                if (rand_rec_num in org_rec_used) or \
+                   (retry_num_dups >= max_retry_num_dups):
+                    unused_rec_nums[unused_ind] = unused_rec_nums[-1]
+                    unused_rec_nums.pop()
+
+        dup_links = (
+            numpy.array(link_org_nums, dtype=numpy.int64),
+            numpy.array(link_dup_nums, dtype=numpy.int64),
+        )
+
+        return dup_rec, org_rec_used, dup_links
+
+    def _create_duplicate_records_batch(
+        self,
+        org_rec,
+        dup_count_sampler,
+        new_org_rec,
+        select_sampler,
+        all_rec_index,
+        freq_files,
+        num_dup_records=None,
+        first_rec_num=0,
+        numpy_rng=None):
         """
-        # Initialise random number generator  - - - - - - - - - - - - - - - - - - - - -
+        Create duplicate records with the vectorized NumPy engine
+
+        The duplicates are created in batches: the original records to use
+        (in a random order), their number of duplicates and their error types
+        are selected for all the missing duplicates at once, and the
+        modifications of the duplicates are planned and applied by a
+        planner.DuplicatePlanner. Duplicates that are not unique are created
+        again in the next batch (at most 10 times for each original record),
+        and original records from which no duplicate was created (without
+        running out of retries) are used again later.
+
+        The arguments are the ones of _create_duplicate_records (the fields
+        are selected with their select probabilities by the planner, so
+        'select_sampler' is not used).
+
+        Return
+        --------
+        dup_rec : List of duplicate records (see _create_duplicate_records)
+        org_rec_used : Set with the numbers of the original records used to
+                create duplicates
+        dup_links : Arrays with the number of the original record and the
+                number of the duplicate of each duplicate (their identifiers)
+
+        """
+        trace = logger.isEnabledFor(logging.DEBUG)  # Checked once, not per event
+        if num_dup_records is None:
+            num_dup_records = self.num_dup_records
+        if numpy_rng is None:
+            numpy_rng = numpy.random.default_rng()
+
+        dup_planner = planner.DuplicatePlanner(
+            self._field_plan,
+            self._swap_pairs,
+            self.max_num_field_modifi,
+            self.max_num_record_modifi,
+            self._transformation_cache,
+            typos.TypoKernel(self.single_typo_prob),
+            self._rng,
+            numpy_rng,
+        )
+
+        # Error types of the duplicates, with their probabilities
         #
+        if self.type_modification == "all":
+            error_types = list(self.error_type_distribution)
+            error_probs = numpy.array(
+                [int(cf.error_type_distribution[error_type] * 100) for error_type in error_types],
+                dtype=numpy.float64,
+            )
+            error_probs /= error_probs.sum()
+        else:
+            error_types = [self.type_modification]
+            error_probs = numpy.ones(1)
+        error_type_codes = numpy.array(
+            [planner.error_codes[error_type] for error_type in error_types]
+        )
+
+        dup_rec = []  # List of duplicate records
+        org_rec_used = set()  # Numbers of original records used
+        link_org_nums = []
+        link_dup_nums = []
+
+        counters = self.generation_stats.counters  # See the stats module
+
+        max_retry_num_dups = 10
 
-        #random.seed(42)
-        #random.seed(42)
-        start_time = time.time()
-        # Create list of select probabilities - - - - - - - - - - - - - - - - - - - - -
+        # Number of duplicates to create from each original record, and the
+        # original records not used so far
         #
-        select_prob_list = []
-        prob_sum = 0.0
+        dup_counts = dup_count_sampler.sample_array(len(org_rec), numpy_rng)
+        unused = numpy.ones(len(org_rec), dtype=bool)
 
-        for field_dict in self.field_list:
-            select_prob_list.append((field_dict, prob_sum))
-            prob_sum += field_dict["select_prob"]
+        org_values = planner.records_to_values(new_org_rec, dup_planner.field_names)
 
-        # CREATE DISTRIBUTION
+        rec_cnt = 0  # Record counter
 
-        prob_dist_list = self._duplicate_distribution()
+        while rec_cnt < num_dup_records:
+            num_missing = num_dup_records - rec_cnt
 
-        # LOAD FREQUENCY AND LOOKUP TABLES
-        print("Step 1: Load and process frequency tables and misspellings dictionaries")
-        freq_files, freq_files_length = self._load_frequency_lookup_tables()
+            # Select original records in a random order until they have
+            # enough duplicates (the last one maybe fewer than drawn)
+            #
+            unused_ind = numpy_rng.permutation(numpy.flatnonzero(unused))
+            if len(unused_ind) == 0:
+                raise ValueError(
+                    "All original records have been used, cannot create "
+                    + "%i more duplicate records" % (num_missing)
+                )
+
+            cum_counts = numpy.cumsum(dup_counts[unused_ind])
+            num_sel = min(int(numpy.searchsorted(cum_counts, num_missing)) + 1, len(unused_ind))
+            sel_ind = unused_ind[:num_sel]
+            num_dups = numpy.array(dup_counts[sel_ind], dtype=numpy.int64)
+            num_dups[-1] -= max(int(cum_counts[num_sel - 1]) - num_missing, 0)
+            unused[sel_ind] = False
+
+            sel_types = error_type_codes[
+                numpy_rng.choice(len(error_types), num_sel, p=error_probs)
+            ]
+
+            # Create the duplicates of the selected records, again for the
+            # ones that are not unique
+            #
+            dup_lists = {i: [] for i in sel_ind.tolist()}
+            num_retries = dict.fromkeys(dup_lists, 0)
+
+            pending_ind = numpy.repeat(sel_ind, num_dups)
+            pending_types = numpy.repeat(sel_types, num_dups)
+
+            while len(pending_ind) > 0:
+                dup_batch = planner.DuplicateBatch(
+                    org_values[pending_ind], dup_planner.field_names, pending_types
+                )
+                dup_planner.modify(dup_batch)
+
+                counters["retry_modif_in_record_exhausted"] += int(
+                    (dup_batch.num_retries >= planner.max_num_retries).sum()
+                )
+                counters["idle_modif_in_record_exhausted"] += int(
+                    (dup_batch.num_idle_rounds >= planner.max_num_idle_rounds).sum()
+                )
 
-        # CREATE ORIGINAL RECORDS
-        print("Step 2: Create original records")
+                retry = []
+                for k, (i, dup_rec_dict) in enumerate(
+                    zip(pending_ind.tolist(), dup_batch.records())
+                ):
+                    if num_retries[i] >= max_retry_num_dups:
+                        continue
+
+                    if all_rec_index.add(dup_rec_dict):  # Check if same record
+                        # has not already been created
+                        dup_lists[i].append(dup_rec_dict)
+                        rec_cnt += 1
+
+                    else:
+                        counters["unique_collisions"] += 1
+                        num_retries[i] += 1
+                        if num_retries[i] < max_retry_num_dups:
+                            retry.append(k)
+                        else:
+                            counters["retry_num_dups_exhausted"] += 1
+
+                        if trace:
+                            logger.debug(
+                                '  No random modifications for record "%s" -> Choose another',
+                                utils.record_id(first_rec_num + i, len(dup_lists[i])),
+                            )
+
+                pending_ind = pending_ind[retry]
+                pending_types = pending_types[retry]
+
+            # Insert the duplicates (in the order of their original records),
+            # the records without duplicates can be used again (unless all
+            # their duplicates were not unique)
+            #
+            for i, dup_list in dup_lists.items():
+                if len(dup_list) == 0:
+                    unused[i] = num_retries[i] < max_retry_num_dups
+                    continue
+
+                rand_rec_num = first_rec_num + i
+                org_rec_used.add(rand_rec_num)
 
-        all_rec_set = set()  # Set of all records (without identifier) used for
-        # checking that all records are different
+                dup_rec += dup_list
+                link_org_nums += [rand_rec_num] * len(dup_list)
+                link_dup_nums += range(len(dup_list))
 
-        org_rec = self._create_original_records(
-            freq_files_length, freq_files, all_rec_set
+        op_applied, op_noops = dup_planner.op_counts()
+        self.generation_stats.op_applied.update(op_applied)
+        self.generation_stats.op_noops.update(op_noops)
+
+        dup_links = (
+            numpy.array(link_org_nums, dtype=numpy.int64),
+            numpy.array(link_dup_nums, dtype=numpy.int64),
         )
-        new_org_rec = org_rec
-
-        # CREATE DUPLICATE RECORDS
-
-        print("Step 3: Create duplicate records")
-        dup_rec, org_rec_used = self._create_duplicate_records(
-            org_rec,
-            prob_dist_list,
-            new_org_rec,
-            select_prob_list,
-            all_rec_set,
-            freq_files_length,
-            freq_files,
+
+        return dup_rec, org_rec_used, dup_links
+
+    def _format_records(self, records, rec_ids, output):
+        """
+        Return a list of records (without identifiers) in the requested output
+        format, with the identifiers 'rec_ids' (arrays of original record and
+        duplicate numbers, see utils.record_ids) rendered as strings
+
+        """
+        if output not in ["list", "dict", "dataframe", "arrow"]:
+            raise ValueError(
+                'Illegal output type must be one of: "dict", "dataframe", "arrow" or "list"'
+            )
+
+        rec_id_list = utils.record_ids(*rec_ids)
+
+        if output == "list":
+            return [
+                {"rec_id": rec_id, **rec_dict}
+                for rec_id, rec_dict in zip(rec_id_list, records)
+            ]
+        elif output == "dict":
+            return {
+                rec_id: {"rec_id": rec_id, **rec_dict}
+                for rec_id, rec_dict in zip(rec_id_list, records)
+            }
+
+        columns = [field_dict["name"] for field_dict in self.field_list]
+
+        if output == "dataframe":
+            return pandas.DataFrame(
+                records,
+                columns=columns,
+                index=pandas.Index(rec_id_list, dtype=object, name="rec_id"),
+            )
+
+        return writers.records_to_arrow(
+            records, columns, self._dictionary_columns, rec_id_list
         )
 
-        all_rec = new_org_rec  #
+    def _create_chunk_records(
+        self,
+        freq_files,
+        dup_count_sampler,
+        select_sampler,
+        all_rec_index,
+        num_org,
+        num_dup,
+        first_rec_num,
+        numpy_rng=None):
+        """
+        Create a chunk of 'num_org' original records (numbered from
+        'first_rec_num' on) and 'num_dup' duplicates of them. The NumPy
+        random generator 'numpy_rng' is used by the "numpy" engine.
+
+        Return
+        --------
+        records : List with the original records followed by the duplicates
+                (without identifiers)
+        rec_ids : Arrays with the number of the original record and the
+                number of the duplicate (-1 for original records) of each
+                record, the integer-coded identifiers of the records
 
-        print("Step 4: Merge original and duplicate records")
-        if self.num_dup_records > 0:
-            all_rec.update(dup_rec)
+        """
+        generation_stats = self.generation_stats
 
-        if output == "dict":
-            return all_rec
-        elif output == "dataframe":
-            return pandas.DataFrame(all_rec.values()).set_index("rec_id")
+        with generation_stats.stage("originals"):
+            if self.engine == "numpy":
+                org_rec = self._create_original_records_batch(
+                    freq_files, all_rec_index, num_org, first_rec_num, numpy_rng
+                )
+            else:
+                org_rec = self._create_original_records(
+                    freq_files, all_rec_index, num_org, first_rec_num
+                )
+        generation_stats.num_records["originals"] += len(org_rec)
 
-    def generate_true_links(self, df_all_rec):
+        if self.engine == "numpy":
+            create_duplicate_records = self._create_duplicate_records_batch
+        else:
+            create_duplicate_records = self._create_duplicate_records
+
+        with generation_stats.stage("duplicates"):
+            dup_rec, org_rec_used, dup_links = create_duplicate_records(
+                org_rec,
+                dup_count_sampler,
+                org_rec,
+                select_sampler,
+                all_rec_index,
+                freq_files,
+                num_dup,
+                first_rec_num,
+                numpy_rng,
+            )
+        generation_stats.num_records["duplicates"] += len(dup_rec)
+
+        rec_ids = (
+            numpy.concatenate(
+                [numpy.arange(first_rec_num, first_rec_num + num_org), dup_links[0]]
+            ),
+            numpy.concatenate(
+                [numpy.full(num_org, -1, dtype=numpy.int64), dup_links[1]]
+            ),
+        )
+
+        return org_rec + dup_rec, rec_ids
+
+    def _merge_shard_records(self, records, rec_ids, all_rec_index):
+        """
+        Remove the records of a shard that were already created in another
+        shard (each shard only checks its own records for uniqueness).
+
+        If an original record is removed, its duplicates are removed as well.
+        Return the remaining records and their identifiers.
+
+        """
+        merged_records = []
+        removed_org_nums = set()
+        keep = numpy.ones(len(records), dtype=bool)
+
+        for rec_num, (rec_dict, org_num, dup_num) in enumerate(
+            zip(records, rec_ids[0].tolist(), rec_ids[1].tolist())
+        ):
+            if (dup_num >= 0) and (org_num in removed_org_nums):
+                keep[rec_num] = False
+                continue
+
+            if all_rec_index.add(rec_dict):  # Check if same record already created
+                merged_records.append(rec_dict)
+            else:
+                self.generation_stats.counters["unique_collisions"] += 1
+                keep[rec_num] = False
+                if dup_num < 0:
+                    removed_org_nums.add(org_num)
+
+        if len(merged_records) < len(records):
+            logger.info(
+                "  Removed %i records already created in another shard",
+                len(records) - len(merged_records),
+            )
+
+        return merged_records, (rec_ids[0][keep], rec_ids[1][keep])
+
+    def _replace_merged_records(
+        self,
+        records,
+        rec_ids,
+        shard_rec_ids,
+        freq_files,
+        dup_count_sampler,
+        select_sampler,
+        all_rec_index,
+        numpy_rng):
+        """
+        Create new records for the records of a shard removed when it was
+        merged (see _merge_shard_records), so that all the requested original
+        and duplicate records are created as with a single process.
+
+        The new original records get the numbers of the removed ones. The new
+        duplicates are created from them and from the original records of the
+        shard without duplicates.
+
+        Parameters
+        ----------
+        records : Records of the shard left after merging
+        rec_ids : Identifiers of these records (see _create_chunk_records)
+        shard_rec_ids : Identifiers of all records of the shard
+        numpy_rng : NumPy random generator of the new records (the
+                generator's random.Random is used as well)
+
+        Return
+        --------
+        records : List with the original records followed by the duplicates
+        rec_ids : Arrays with the number of the original record and the
+                number of the duplicate of each record
+
+        """
+        org_nums, dup_nums = rec_ids
+        is_org = dup_nums < 0
+        num_org = int(is_org.sum())
+
+        removed_org_nums = numpy.setdiff1d(
+            shard_rec_ids[0][shard_rec_ids[1] < 0], org_nums[is_org]
+        )
+        num_removed_dup = int((shard_rec_ids[1] >= 0).sum()) - (len(records) - num_org)
+
+        generation_stats = self.generation_stats
+        generation_stats.counters["shard_records_replaced"] += (
+            len(removed_org_nums) + num_removed_dup
+        )
+
+        with generation_stats.stage("originals"):
+            if self.engine == "numpy":
+                new_org_rec = self._create_original_records_batch(
+                    freq_files, all_rec_index, len(removed_org_nums), 0, numpy_rng
+                )
+            else:
+                new_org_rec = self._create_original_records(
+                    freq_files, all_rec_index, len(removed_org_nums), 0
+                )
+        generation_stats.num_records["originals"] += len(new_org_rec)
+
+        # Original records that can be used to create the new duplicates
+        #
+        unused_org_ind = numpy.flatnonzero(
+            is_org & ~numpy.isin(org_nums, org_nums[~is_org])
+        )
+        pool_org_nums = numpy.concatenate([removed_org_nums, org_nums[unused_org_ind]])
+        pool_org_rec = new_org_rec + [records[i] for i in unused_org_ind.tolist()]
+
+        if self.engine == "numpy":
+            create_duplicate_records = self._create_duplicate_records_batch
+        else:
+            create_duplicate_records = self._create_duplicate_records
+
+        with generation_stats.stage("duplicates"):
+            new_dup_rec, org_rec_used, dup_links = create_duplicate_records(
+                pool_org_rec,
+                dup_count_sampler,
+                pool_org_rec,
+                select_sampler,
+                all_rec_index,
+                freq_files,
+                num_removed_dup,
+                0,
+                numpy_rng,
+            )
+        generation_stats.num_records["duplicates"] += len(new_dup_rec)
+
+        logger.info(
+            "  Created %i original and %i duplicate records again",
+            len(new_org_rec),
+            len(new_dup_rec),
+        )
+
+        records = (
+            records[:num_org] + new_org_rec + records[num_org:] + new_dup_rec
+        )
+        rec_ids = (
+            numpy.concatenate(
+                [
+                    org_nums[:num_org],
+                    removed_org_nums,
+                    org_nums[num_org:],
+                    pool_org_nums[dup_links[0]],
+                ]
+            ),
+            numpy.concatenate(
+                [
+                    dup_nums[:num_org],
+                    numpy.full(len(new_org_rec), -1, dtype=numpy.int64),
+                    dup_nums[num_org:],
+                    dup_links[1],
+                ]
+            ),
+        )
+
+        return records, rec_ids
+
+    def generate_iter(
+        self, chunk_size=10000, output="list", workers=1, true_links_writer=None
+    ):
+        """
+        Generate the synthetic duplicate personal dataset in chunks
+
+        Each chunk contains up to 'chunk_size' original records together with
+        all the duplicates created from them, so chunks are self-contained
+        and can be written out (and dropped) one after the other. Only the
+        index used to check that all records are different is kept over all
+        chunks.
+
+        All random number streams are derived from the seed of the generator
+        (a 'numpy.random.SeedSequence'), so with the same seed (and the same
+        chunk size and number of workers) the same records are generated.
+
+        With more than one worker, the chunks (shards) are created in
+        parallel by worker processes, each with its own random number
+        streams (spawned from the seed sequence). Records that were already
+        created in another shard are removed when the shards are merged (in
+        order), and new records are created in their place (with the random
+        number streams of an additional seed sequence), so all the requested
+        records are generated.
+
+        The true links between the records of each chunk are written with
+        'true_links_writer' (one of the writers of the 'writers' module) if
+        given, integer-coded (see 'utils.true_link_pairs'), so they don't
+        have to be rebuilt from the record identifiers.
+
+        Parameters
+        -----------
+
+        chunk_size : Number of original records per chunk
+        output : Type of each chunk, a list of record dictionaries ("list"),
+                a dictionary ("dict"), a dataframe ("dataframe") or an Arrow
+                table ("arrow", needs the pyarrow package)
+        workers : Number of worker processes
+        true_links_writer : Writer of the true links (or None)
+
+        """
+        if chunk_size <= 0:
+            raise ValueError("Chunk size must be positive")
+        if workers <= 0:
+            raise ValueError("Number of workers must be positive")
+        self._format_records([], ([], []), output)  # Check output type
+
+        for records, rec_ids in self._generate_chunks(
+            chunk_size, workers, true_links_writer
+        ):
+            with self.generation_stats.stage("output"):
+                chunk = self._format_records(records, rec_ids, output)
+            self.generation_stats.num_records["output"] += len(records)
+
+            yield chunk
+
+    def _generate_chunks(self, chunk_size, workers, true_links_writer):
+        """
+        Generate the chunks of generate_iter() as lists of records (without
+        identifiers) together with their integer-coded identifiers (see
+        _create_chunk_records)
+
+        """
+        self.generation_stats = stats.GenerationStats()
+
+        # CREATE DISTRIBUTION
+
+        dup_count_sampler = self._duplicate_distribution()
+
+        # LOAD FREQUENCY AND LOOKUP TABLES
+        logger.info("Step 1: Load and process frequency tables and misspellings dictionaries")
+        with self.generation_stats.stage("tables"):
+            freq_files = self._load_frequency_lookup_tables()
+
+            # Frequency fields with few distinct values (like culture, sex or
+            # state) are dictionary-encoded in Arrow output
+            #
+            self._dictionary_columns = [
+                field_name
+                for field_name, sampler in freq_files.items()
+                if len(sampler) <= writers.max_dictionary_size
+            ]
+
+            # Compile the fields (with their tables) and the field pairs to swap
+            # used in the generation loops
+            #
+            self._field_plan = fields.compile_field_plan(
+                self.field_list, freq_files, self.culture
+            )
+            self._swap_pairs = fields.compile_swap_pairs(self.field_swap_prob)
+
+            # Create sampler of fields to modify from their select probabilities - - - -
+            #
+            select_sampler = utils.DiscreteSampler(
+                self._field_plan, [field.select_prob for field in self._field_plan]
+            )
+
+        # CREATE ORIGINAL AND DUPLICATE RECORDS, CHUNK BY CHUNK
+        logger.info("Step 2: Create original and duplicate records")
+
+        all_rec_index = uniqueness.create_index(self.unique_index)  # Index of all
+        # records (without identifier) used for checking that all records are different
+
+        # Number of original and duplicate records and number of the first
+        # record of each chunk. The number of duplicates is in proportion to
+        # the number of originals
+        #
+        chunk_list = []
+        num_org_done = 0
+        num_dup_done = 0
+
+        while num_org_done < self.num_org_records:
+            num_org = min(chunk_size, self.num_org_records - num_org_done)
+            num_dup = (
+                self.num_dup_records * (num_org_done + num_org)
+            ) // self.num_org_records - num_dup_done
+
+            chunk_list.append((num_org, num_dup, num_org_done))
+
+            num_org_done += num_org
+            num_dup_done += num_dup
+
+        seed_seq = numpy.random.SeedSequence(self.seed)
+
+        if workers == 1:
+            self._rng, numpy_rng = _random_generators(seed_seq)
+            self._transformation_cache = utils.TransformationCache(
+                self.transformation_cache_size
+            )
+
+            for (num_org, num_dup, first_rec_num) in chunk_list:
+                records, rec_ids = self._create_chunk_records(
+                    freq_files,
+                    dup_count_sampler,
+                    select_sampler,
+                    all_rec_index,
+                    num_org,
+                    num_dup,
+                    first_rec_num,
+                    numpy_rng,
+                )
+                self.transformation_cache_info = self._transformation_cache.info()
+                self._write_true_links(true_links_writer, rec_ids)
+
+                yield records, rec_ids
+
+            self._transformation_cache = None
+            self._rng = None
+            return
+
+        # Create the shards in worker processes, with at most two shards per
+        # worker waiting to be merged. The records removed when merging are
+        # created again with the random number streams of the last seed
+        # sequence
+        #
+        seed_seq_list = seed_seq.spawn(len(chunk_list) + 1)
+        numpy_rng = None
+
+        self.transformation_cache_info = None
+
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_shard_worker,
+            initargs=(self, freq_files, dup_count_sampler, select_sampler),
+        ) as executor:
+            shard_futures = collections.deque()
+            shard_num = 0
+
+            while (shard_num < len(chunk_list)) or shard_futures:
+                while (shard_num < len(chunk_list)) and (
+                    len(shard_futures) < 2 * workers
+                ):
+                    shard_futures.append(
+                        executor.submit(
+                            _create_shard_records,
+                            chunk_list[shard_num],
+                            seed_seq_list[shard_num],
+                        )
+                    )
+                    shard_num += 1
+
+                records, rec_ids, cache_info, shard_stats = (
+                    shard_futures.popleft().result()
+                )
+                self.generation_stats.merge(shard_stats)
+                with self.generation_stats.stage("merging"):
+                    merged_records, merged_rec_ids = self._merge_shard_records(
+                        records, rec_ids, all_rec_index
+                    )
+                self.generation_stats.num_records["merging"] += len(merged_records)
+                self._add_transformation_cache_info(cache_info)
+
+                if len(merged_records) < len(records):
+                    if numpy_rng is None:
+                        self._rng, numpy_rng = _random_generators(seed_seq_list[-1])
+                        self._transformation_cache = utils.TransformationCache(
+                            self.transformation_cache_size
+                        )
+                    merged_records, merged_rec_ids = self._replace_merged_records(
+                        merged_records,
+                        merged_rec_ids,
+                        rec_ids,
+                        freq_files,
+                        dup_count_sampler,
+                        select_sampler,
+                        all_rec_index,
+                        numpy_rng,
+                    )
+
+                self._write_true_links(true_links_writer, merged_rec_ids)
+
+                yield merged_records, merged_rec_ids
+
+        self._transformation_cache = None
+        self._rng = None
+
+    def _write_true_links(self, true_links_writer, rec_ids):
+        """ Write the true links between the records 'rec_ids' of a chunk """
+
+        if true_links_writer is not None:
+            org_nums, dup_nums = rec_ids
+            is_dup = dup_nums >= 0
+            true_links_writer.write(
+                writers.format_true_links(
+                    utils.true_link_pairs(org_nums[is_dup], dup_nums[is_dup]),
+                    true_links_writer.output,
+                )
+            )
+
+    def _add_transformation_cache_info(self, cache_info):
+        """ Add the cache counters of a shard to the counters of all shards """
+
+        if self.transformation_cache_info is None:
+            self.transformation_cache_info = cache_info
+            return
+
+        all_info = self.transformation_cache_info
+        for counter in ["hits", "misses", "evictions"]:
+            all_info[counter] += cache_info[counter]
+        all_info["size"] = max(all_info["size"], cache_info["size"])
+
+    def generate(self, output="dict", workers=1, true_links_writer=None):
         """ 
-        Function to return all true links
-            
+        Main function to generate the synthetic duplicate personal dataset
+        
+        Parameters
+        -----------
+        
+        output : Return type of the dataset ( a dictionary, 
+                a dataframe or an Arrow table ("arrow"))
+        workers : Number of worker processes (each creates one shard of
+                the records)
+        true_links_writer : Writer of the true links (or None, see
+                'generate_iter')
+        
         """
+        if workers <= 0:
+            raise ValueError("Number of workers must be positive")
+        self._format_records([], ([], []), output)  # Check output type
 
-        index = df_all_rec.index.to_series()
-        keys = index.str.extract("rec-(\d+)", expand=True)[0]
+        all_rec = []
+        all_org_nums = []
+        all_dup_nums = []
 
-        index_int = numpy.arange(len(df_all_rec))
+        chunk_size = -(-self.num_org_records // workers)  # One shard per worker
 
-        df_helper = pandas.DataFrame({"key": keys, "index": index_int})
+        for records, rec_ids in self._generate_chunks(
+            chunk_size, workers, true_links_writer
+        ):
+            all_rec += records
+            all_org_nums.append(rec_ids[0])
+            all_dup_nums.append(rec_ids[1])
 
-        # merge the two frame and make MultiIndex.
-        pairs_df = df_helper.merge(df_helper, on="key")[["index_x", "index_y"]]
-        pairs_df = pairs_df[pairs_df["index_x"] > pairs_df["index_y"]]
+        logger.info("Step 3: Merge original and duplicate records")
+
+        generation_stats = self.generation_stats
+        with generation_stats.stage("merging"):
+            rec_ids = (numpy.concatenate(all_org_nums), numpy.concatenate(all_dup_nums))
+        if workers == 1:  # Otherwise counted when the shards were merged
+            generation_stats.num_records["merging"] += len(rec_ids[0])
+
+        with generation_stats.stage("output"):
+            all_rec = self._format_records(all_rec, rec_ids, output)
+        generation_stats.num_records["output"] += len(rec_ids[0])
+
+        return all_rec
+
+    def generate_true_links(self, df_all_rec):
+        """ 
+        Function to return all true links
+
+        The record identifiers are parsed into their integer codes once, and
+        the records with the same original record number are paired by
+        sorting them (see utils.group_pairs).
+            
+        """
+
+        org_nums, dup_nums = utils.parse_record_ids(
+            df_all_rec.index.to_numpy(dtype=object)
+        )
+        index_y, index_x = utils.group_pairs(org_nums)
 
         return pandas.MultiIndex(
             levels=[df_all_rec.index.values, df_all_rec.index.values],
-            codes=[pairs_df["index_x"].values, pairs_df["index_y"].values],
+            codes=[index_x, index_y],
             names=[None, None],
             verify_integrity=False,
         )
 
 
+# =============================================================================
+# Functions run in the worker processes of DuplicateGen.generate_iter()
+
+_shard_worker_state = None  # Generator, frequency tables and distributions
+
+
+def _random_generators(seed_seq):
+    """
+    Return a 'random.Random' and a 'numpy.random.Generator' with independent
+    streams spawned from 'seed_seq'
+
+    """
+    random_seed_seq, numpy_seed_seq = seed_seq.spawn(2)
+
+    rng = random.Random(
+        int.from_bytes(random_seed_seq.generate_state(4).tobytes(), "little")
+    )
+
+    return rng, numpy.random.default_rng(numpy_seed_seq)
+
+
+def _init_shard_worker(dupgen, freq_files, dup_count_sampler, select_sampler):
+    """ Keep the state shared by all shards created in a worker process """
+
+    global _shard_worker_state
+
+    _shard_worker_state = (dupgen, freq_files, dup_count_sampler, select_sampler)
+
+
+def _create_shard_records(chunk, seed_seq):
+    """
+    Create the records of one shard with random number streams seeded from
+    'seed_seq'
+
+    Return
+    --------
+    records : List with the original records followed by the duplicates
+    rec_ids : Numbers of the original record and of the duplicate of each
+            record (see DuplicateGen._create_chunk_records)
+    cache_info : Counters of the transformation cache of the shard
+    shard_stats : Statistics of the shard (a stats.GenerationStats)
+
+    """
+    dupgen, freq_files, dup_count_sampler, select_sampler = _shard_worker_state
+    num_org, num_dup, first_rec_num = chunk
+
+    dupgen._rng, numpy_rng = _random_generators(seed_seq)
+    dupgen._transformation_cache = utils.TransformationCache(
+        dupgen.transformation_cache_size
+    )
+    dupgen.generation_stats = stats.GenerationStats()
+    records, rec_ids = dupgen._create_chunk_records(
+        freq_files,
+        dup_count_sampler,
+        select_sampler,
+        uniqueness.create_index(dupgen.unique_index),
+        num_org,
+        num_dup,
+        first_rec_num,
+        numpy_rng,
+    )
+
+    return (
+        records,
+        rec_ids,
+        dupgen._transformation_cache.info(),
+        dupgen.generation_stats,
+    )
+
+
 if __name__ == "__main__":
     pass
     # Test code
@@ -0,0 +1,607 @@
+"""Batched planning and application of the modifications of duplicates.
+
+The scalar loop of 'DuplicateGen._create_duplicate_records' creates one
+duplicate at a time and makes several random calls for each modification
+(the error type, the field, the number of modifications in the field and
+the modification itself). With the "numpy" engine the duplicates are
+instead modified in batches with a DuplicatePlanner:
+
+  1. Planning: for all duplicates of a batch at once, the field swaps, the
+     fields to modify, the number of modifications in each field and the
+     modifications themselves are drawn as NumPy arrays with a
+     'numpy.random.Generator', respecting the maximal number of
+     modifications per field and per record.
+  2. Application: the planned keyboard typos ("sub_prob", "ins_prob",
+     "del_prob" and "trans_prob") are applied to all values at once with the
+     'typos.TypoKernel'. The other modifications (misspellings, new values,
+     word swaps, spaces, and the phonetic and OCR changes) are applied one
+     value at a time, as by the scalar loop.
+
+As in the scalar loop, a modification that does not change a value is not
+counted, so fields are selected again in further rounds until each
+duplicate has its maximal number of modifications (or no field can be
+modified any more). Each round plans one field selection for all
+duplicates still being modified.
+
+The modifications follow the same distributions as the ones of the scalar
+loop, but the random numbers are drawn differently, so the duplicates differ
+from the ones created with the "scalar" engine.
+"""
+
+import numpy
+
+from duplicategenerator import typos
+from duplicategenerator import utils
+from duplicategenerator import config as cf
+
+# Codes of the error types of duplicates
+#
+error_codes = {"typ": 0, "pho": 1, "ocr": 2}
+
+# Offsets of the maximal error position of the keyboard typos (see
+# 'utils.error_position')
+#
+typo_len_offsets = {"sub_prob": 0, "ins_prob": 1, "del_prob": 0, "trans_prob": -1}
+
+# Probabilities of the OCR modifications (one bit of the planned OCR
+# modifications each)
+#
+ocr_prob_names = ["ocr_prob", "ocr_fail_prob", "ocr_ins_sp_prob", "ocr_del_sp_prob"]
+
+# Maximal number of phonetic or OCR changes in a duplicate that lead to no
+# change (as 'max_retry_modif_in_record' in the scalar loop)
+#
+max_num_retries = 10
+
+# Maximal number of rounds in a row without a change in a duplicate (for
+# duplicates whose remaining fields cannot be modified, for example fields
+# without phonetic changes)
+#
+max_num_idle_rounds = 100
+
+
+# =============================================================================
+
+
+def records_to_values(records, field_names):
+    """Return a two-dimensional object array with the values of the fields
+     'field_names' (the columns) of a list of record dictionaries (the
+     rows), with None for missing values.
+  """
+
+    values = numpy.empty((len(records), len(field_names)), dtype=object)
+    for j, name in enumerate(field_names):
+        values[:, j] = [rec_dict.get(name) for rec_dict in records]
+
+    return values
+
+
+# -----------------------------------------------------------------------------
+
+
+def insert_space(value, rng):
+    """Return 'value' (stripped) with a space inserted at a random position
+     that is not next to another space.
+  """
+
+    value = value.strip()
+
+    ins_pos = utils.error_position(value, 0, rng)
+    while (value[ins_pos - 1] == " ") or (value[ins_pos] == " "):
+        ins_pos = utils.error_position(value, 0, rng)
+
+    return value[:ins_pos] + " " + value[ins_pos:]
+
+
+def delete_space(value):
+    """Return 'value' without its first space (the space deleted by the
+     scalar loop).
+  """
+
+    space_ind = value.index(" ")
+
+    return value[:space_ind] + value[space_ind + 1 :]
+
+
+def modify_value(field, mod_op, value, rng):
+    """Return 'value' after one typographical modification 'mod_op' (the name
+     of its probability) that is not a keyboard typo, drawn with 'rng' (a
+     'random.Random' instance).
+  """
+
+    if (mod_op == "misspell_prob") and (field.misspell_dict is not None) and (
+        value in field.misspell_dict
+    ):
+        misspell_list = field.misspell_dict[value]
+        if len(misspell_list) == 1:
+            return misspell_list[0]
+        return rng.choice(misspell_list)
+
+    if mod_op in ("val_swap_prob", "new_val_prob"):
+        return field.new_value(rng, value)
+
+    if mod_op == "miss_prob":
+        return cf.missing_value
+
+    if (mod_op == "wrd_swap_prob") and (" " in value):
+        word_list = value.split(" ")
+        if len(word_list) == 2:
+            swap_index = 0
+        else:
+            swap_index = rng.randint(0, len(word_list) - 2)
+        word_list[swap_index], word_list[swap_index + 1] = (
+            word_list[swap_index + 1],
+            word_list[swap_index],
+        )
+        return " ".join(word_list)
+
+    if (mod_op == "spc_ins_prob") and (len(value.strip()) > 1):
+        return insert_space(value, rng)
+
+    if (mod_op == "spc_del_prob") and (" " in value):
+        return delete_space(value)
+
+    return value
+
+
+# =============================================================================
+
+
+class DuplicateBatch:
+    """The values and modification counters of a batch of duplicates.
+
+     org_values   Object array with the values of the original record of
+                  each duplicate (see 'records_to_values').
+     field_names  Names of the fields (the columns of 'org_values').
+     error_types  Codes of the error type of each duplicate (see
+                  'error_codes').
+  """
+
+    def __init__(self, org_values, field_names, error_types):
+        num = len(org_values)
+
+        self.field_names = list(field_names)
+        self.org_values = org_values
+        self.values = org_values.copy()  # Missing values are None
+        self.error_types = numpy.asarray(error_types, dtype=numpy.int64)
+
+        self.field_counts = numpy.zeros(self.values.shape, dtype=numpy.int64)
+        self.num_modif = numpy.zeros(num, dtype=numpy.int64)
+        self.num_retries = numpy.zeros(num, dtype=numpy.int64)
+        self.num_idle_rounds = numpy.zeros(num, dtype=numpy.int64)
+        self.done = numpy.zeros(num, dtype=bool)
+
+    def __len__(self):
+        return len(self.values)
+
+    def records(self):
+        """Return the duplicates as list of record dictionaries (without
+       missing values).
+    """
+
+        field_names = self.field_names
+
+        return [
+            {name: value for name, value in zip(field_names, row) if value is not None}
+            for row in self.values.tolist()
+        ]
+
+
+# -----------------------------------------------------------------------------
+
+
+class ModificationPlan:
+    """The modifications of one round, for the duplicates being modified.
+
+     rows      Indices of the duplicates (in the batch).
+     fields    Index of the field selected in each duplicate.
+     num_mods  Number of modifications of the field.
+     ops       Two-dimensional array with the planned modifications (one
+               column for each possible modification): the index of the
+               modification in the sampler of the field for typographical
+               errors (-1 for none), 1 for a phonetic modification (else 0),
+               and for OCR errors a bit for each probability in
+               'ocr_prob_names'.
+  """
+
+    __slots__ = ("rows", "fields", "num_mods", "ops")
+
+    def __init__(self, rows, fields, num_mods, ops):
+        self.rows = rows
+        self.fields = fields
+        self.num_mods = num_mods
+        self.ops = ops
+
+
+# -----------------------------------------------------------------------------
+
+
+class DuplicatePlanner:
+    """Plan and apply the modifications of batches of duplicates.
+
+     field_plan             List of field objects (see 'fields').
+     swap_pairs             List of field pairs that can be swapped (see
+                            'fields.compile_swap_pairs').
+     max_num_field_modifi   Maximal number of modifications per field.
+     max_num_record_modifi  Maximal number of modifications per record.
+     transformation_cache   Cache of the phonetic and OCR changes (see
+                            'utils.TransformationCache').
+     typo_kernel            The 'typos.TypoKernel' of the keyboard typos.
+     rng                    A 'random.Random' instance (for the
+                            modifications applied one value at a time).
+     numpy_rng              A 'numpy.random.Generator'.
+  """
+
+    def __init__(
+        self,
+        field_plan,
+        swap_pairs,
+        max_num_field_modifi,
+        max_num_record_modifi,
+        transformation_cache,
+        typo_kernel,
+        rng,
+        numpy_rng,
+    ):
+        self.field_plan = field_plan
+        self.field_names = [field.name for field in field_plan]
+        self.max_num_field_modifi = max_num_field_modifi
+        self.max_num_record_modifi = max_num_record_modifi
+        self.transformation_cache = transformation_cache
+        self.typo_kernel = typo_kernel
+        self.rng = rng
+        self.numpy_rng = numpy_rng
+
+        self.select_probs = numpy.array(
+            [field.select_prob for field in field_plan], dtype=numpy.float64
+        )
+
+        # Field pairs as arrays of the swap probability and the two field
+        # indices (pairs with a field not in the plan are never swapped)
+        #
+        field_index = {name: i for i, name in enumerate(self.field_names)}
+        swap_pairs = [
+            (swap_prob, field_index[fname_a], field_index[fname_b])
+            for (swap_prob, fname_a, fname_b) in swap_pairs
+            if (fname_a in field_index) and (fname_b in field_index)
+        ]
+        self.swap_probs = numpy.array([pair[0] for pair in swap_pairs], dtype=numpy.float64)
+        self.swap_fields_a = numpy.array([pair[1] for pair in swap_pairs], dtype=numpy.int64)
+        self.swap_fields_b = numpy.array([pair[2] for pair in swap_pairs], dtype=numpy.int64)
+
+        # Probabilities of the phonetic and OCR modifications of each field
+        # (zero for fields without them)
+        #
+        self.pho_probs = numpy.array(
+            [field.field_dict.get("pho_prob", 0.0) for field in field_plan],
+            dtype=numpy.float64,
+        )
+        self.ocr_probs = numpy.zeros((len(field_plan), len(ocr_prob_names)))
+        for i, field in enumerate(field_plan):
+            if "ocr_prob" in field.field_dict:
+                self.ocr_probs[i] = [
+                    field.field_dict.get(prob_name, 0.0) for prob_name in ocr_prob_names
+                ]
+
+        # Names of the typographical modifications of each field (in the
+        # order of its sampler), and their codes in the typo kernel (-1 for
+        # the other modifications, and last for no modification)
+        #
+        self.op_names = []
+        self.typo_codes = []
+        for field in field_plan:
+            names = list(field.prob_sampler.values) if field.prob_sampler else []
+            self.op_names.append(names)
+            self.typo_codes.append(
+                numpy.array(
+                    [typos.op_codes.get(name, typos.no_op) for name in names] + [typos.no_op],
+                    dtype=numpy.int64,
+                )
+            )
+
+        # Names of all modifications, the index of each modification of each
+        # field in these names, and the number of modifications that changed
+        # a value (applied) or not (no-ops), see 'op_counts'
+        #
+        self.count_names = sorted(
+            set(name for names in self.op_names for name in names)
+            | set(ocr_prob_names)
+            | {"pho_prob", "field_swap_prob"}
+        )
+        count_index = {name: i for i, name in enumerate(self.count_names)}
+        self.count_codes = [
+            numpy.array([count_index[name] for name in names], dtype=numpy.int64)
+            for names in self.op_names
+        ]
+        self.ocr_count_codes = [count_index[name] for name in ocr_prob_names]
+        self.pho_count_code = count_index["pho_prob"]
+        self.swap_count_code = count_index["field_swap_prob"]
+
+        self.num_applied = numpy.zeros(len(self.count_names), dtype=numpy.int64)
+        self.num_noops = numpy.zeros(len(self.count_names), dtype=numpy.int64)
+
+    # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+    def modify(self, dup_batch):
+        """Modify the duplicates of 'dup_batch' (a DuplicateBatch): first swap
+       field values, then modify fields in rounds until all duplicates are
+       done.
+    """
+
+        if self.max_num_record_modifi > 1:
+            self.swap_fields(dup_batch)
+
+        while True:
+            plan = self.plan_round(dup_batch)
+            if plan is None:
+                break
+
+            num_modif = dup_batch.num_modif[plan.rows]
+            self.apply_plan(dup_batch, plan)
+
+            # Duplicates without a change in many rounds are done
+            #
+            idle = dup_batch.num_modif[plan.rows] == num_modif
+            num_idle_rounds = numpy.where(idle, dup_batch.num_idle_rounds[plan.rows] + 1, 0)
+            dup_batch.num_idle_rounds[plan.rows] = num_idle_rounds
+            dup_batch.done[plan.rows[num_idle_rounds >= max_num_idle_rounds]] = True
+
+    def swap_fields(self, dup_batch):
+        """Randomly swap the values of field pairs in the duplicates with
+       typographical errors. The pairs of each duplicate are tried in a
+       random order, each with its swap probability.
+    """
+
+        numpy_rng = self.numpy_rng
+        num_pairs = len(self.swap_probs)
+        rows = numpy.flatnonzero(dup_batch.error_types == error_codes["typ"])
+        if (num_pairs == 0) or (len(rows) == 0):
+            return
+
+        values = dup_batch.values
+        pair_order = numpy.argsort(numpy_rng.random((len(rows), num_pairs)), axis=1)
+        rand_nums = numpy_rng.random((len(rows), num_pairs))
+
+        for k in range(num_pairs):
+            pairs = pair_order[:, k]
+            fields_a = self.swap_fields_a[pairs]
+            fields_b = self.swap_fields_b[pairs]
+            values_a = values[rows, fields_a]
+            values_b = values[rows, fields_b]
+
+            swap = rand_nums[:, k] <= self.swap_probs[pairs]
+            swap &= dup_batch.num_modif[rows] <= self.max_num_record_modifi - 2
+            swap &= numpy.not_equal(values_a, None) & numpy.not_equal(values_b, None)
+
+            swap_rows = rows[swap]
+            values[swap_rows, fields_a[swap]] = values_b[swap]
+            values[swap_rows, fields_b[swap]] = values_a[swap]
+            dup_batch.field_counts[swap_rows, fields_a[swap]] += 1
+            dup_batch.field_counts[swap_rows, fields_b[swap]] += 1
+            dup_batch.num_modif[swap_rows] += 2
+            self.num_applied[self.swap_count_code] += len(swap_rows)
+
+    def plan_round(self, dup_batch):
+        """Plan one field selection (with its modifications) for each duplicate
+       of 'dup_batch' that can still be modified, and return it as
+       ModificationPlan (None if all duplicates are done).
+    """
+
+        numpy_rng = self.numpy_rng
+        max_field = self.max_num_field_modifi
+
+        active = (dup_batch.num_modif < self.max_num_record_modifi) & ~dup_batch.done
+        active &= dup_batch.num_retries < max_num_retries
+        rows = numpy.flatnonzero(active)
+
+        # Select a field among the fields with fewer than the maximal number
+        # of modifications (duplicates without such a field are done)
+        #
+        weights = (dup_batch.field_counts[rows] < max_field) * self.select_probs
+        cum_weights = numpy.cumsum(weights, axis=1)
+        totals = weights.sum(axis=1)
+
+        dup_batch.done[rows[totals <= 0.0]] = True
+        keep = totals > 0.0
+        rows, cum_weights, totals = rows[keep], cum_weights[keep], totals[keep]
+        if len(rows) == 0:
+            return None
+
+        rand_weights = numpy_rng.random(len(rows)) * totals
+        fields = (cum_weights <= rand_weights[:, None]).sum(axis=1)
+        fields = numpy.minimum(fields, len(self.field_plan) - 1)
+
+        # Number of modifications in the field (not more than the record
+        # can still have)
+        #
+        num_mods = numpy_rng.integers(1, max_field + 1, len(rows))
+        num_mods = numpy.minimum(
+            num_mods, self.max_num_record_modifi - dup_batch.num_modif[rows]
+        )
+
+        # The modifications, drawn for each error type and field
+        #
+        ops = numpy.zeros((len(rows), max_field), dtype=numpy.int64)
+        error_types = dup_batch.error_types[rows]
+
+        typ_rows = numpy.flatnonzero(error_types == error_codes["typ"])
+        for f in numpy.unique(fields[typ_rows]).tolist():
+            sel = typ_rows[fields[typ_rows] == f]
+            prob_sampler = self.field_plan[f].prob_sampler
+            if prob_sampler is None:
+                ops[sel] = -1
+            else:
+                ops[sel] = prob_sampler.sample_indices(len(sel) * max_field, numpy_rng).reshape(
+                    len(sel), max_field
+                )
+
+        pho_rows = numpy.flatnonzero(error_types == error_codes["pho"])
+        pho_probs = self.pho_probs[fields[pho_rows]]
+        ops[pho_rows] = numpy_rng.random((len(pho_rows), max_field)) <= pho_probs[:, None]
+
+        ocr_rows = numpy.flatnonzero(error_types == error_codes["ocr"])
+        ocr_probs = self.ocr_probs[fields[ocr_rows]]
+        ocr_hits = (
+            numpy_rng.random((len(ocr_rows), max_field, len(ocr_prob_names)))
+            <= ocr_probs[:, None, :]
+        )
+        ops[ocr_rows] = (ocr_hits * (1 << numpy.arange(len(ocr_prob_names)))).sum(axis=2)
+
+        return ModificationPlan(rows, fields, num_mods, ops)
+
+    # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+    def apply_plan(self, dup_batch, plan):
+        """Apply the modifications of a ModificationPlan to 'dup_batch', one
+       modification of each duplicate at a time, and update the
+       modification counters.
+    """
+
+        values = dup_batch.values
+        is_typ = dup_batch.error_types[plan.rows] == error_codes["typ"]
+
+        for m in range(self.max_num_field_modifi):
+
+            # Only the planned modifications of values that are not missing
+            # (no modification is -1 for typographical errors, else 0)
+            #
+            sel = plan.num_mods > m
+            sel &= numpy.where(is_typ, plan.ops[:, m] >= 0, plan.ops[:, m] != 0)
+            sel &= numpy.not_equal(values[plan.rows, plan.fields], None)
+            if not sel.any():
+                continue
+
+            rows = plan.rows[sel]
+            fields = plan.fields[sel]
+            old_values = values[rows, fields]
+            new_values, count_codes = self.apply_ops(
+                dup_batch, rows, fields, plan.ops[sel, m], old_values
+            )
+
+            # Count the modifications that changed a value (the first one of a
+            # field that was changed back to its original value starts again)
+            #
+            changed = numpy.not_equal(new_values, old_values)
+            done = count_codes >= 0
+            num_counts = len(self.count_names)
+            self.num_applied += numpy.bincount(count_codes[done & changed], minlength=num_counts)
+            self.num_noops += numpy.bincount(count_codes[done & ~changed], minlength=num_counts)
+            first = numpy.equal(old_values, dup_batch.org_values[rows, fields])
+
+            first_mod = changed & first
+            next_mod = changed & ~first
+            dup_batch.field_counts[rows[first_mod], fields[first_mod]] = 1
+            dup_batch.field_counts[rows[next_mod], fields[next_mod]] += 1
+            dup_batch.num_modif[rows] += changed
+
+            values[rows[changed], fields[changed]] = new_values[changed]
+
+    def apply_ops(self, dup_batch, rows, fields, ops, old_values):
+        """Return an object array with the new values of 'old_values' (the
+       values of the duplicates 'rows' in the fields 'fields') after the
+       planned modifications 'ops' (one for each value, none missing), and
+       an array with the index of the modification done on each value in
+       'count_names' (-1 if none was possible).
+    """
+
+        error_types = dup_batch.error_types[rows]
+        is_typ = error_types == error_codes["typ"]
+        new_values = old_values.copy()
+        count_codes = numpy.full(len(rows), self.pho_count_code, dtype=numpy.int64)
+
+        # Keyboard typos, with the typo kernel for each character range
+        #
+        typo_codes = numpy.full(len(rows), typos.no_op, dtype=numpy.int64)
+        for f in numpy.unique(fields[is_typ]).tolist():
+            sel = is_typ & (fields == f)
+            typo_codes[sel] = self.typo_codes[f][ops[sel]]
+            count_codes[sel] = self.count_codes[f][ops[sel]]
+        is_typo = typo_codes != typos.no_op
+
+        char_ranges = numpy.array(
+            [self.field_plan[f].char_range for f in fields.tolist()], dtype=object
+        )
+        for char_range in numpy.unique(char_ranges[is_typo]).tolist():
+            sel = numpy.flatnonzero(is_typo & (char_ranges == char_range))
+            typo_values = old_values[sel].tolist()
+            lengths = numpy.fromiter(map(len, typo_values), dtype=numpy.int64, count=len(sel))
+            len_offsets = numpy.zeros(len(sel), dtype=numpy.int64)
+            for op_name, len_offset in typo_len_offsets.items():
+                len_offsets[typo_codes[sel] == typos.op_codes[op_name]] = len_offset
+            positions = typos.error_positions(lengths, len_offsets, self.numpy_rng)
+
+            new_values[sel] = self.typo_kernel.apply(
+                typo_values, typo_codes[sel], positions, char_range, self.numpy_rng
+            )
+
+        # The other modifications, one value at a time
+        #
+        for i in numpy.flatnonzero(~is_typo).tolist():
+            value = old_values[i]
+            op = int(ops[i])
+
+            if is_typ[i]:
+                field = self.field_plan[fields[i]]
+                new_values[i] = modify_value(
+                    field, self.op_names[fields[i]][op], value, self.rng
+                )
+            elif error_types[i] == error_codes["pho"]:
+                new_values[i] = self._transform(dup_batch, rows[i], value, "pho")
+            else:
+                new_values[i], ocr_op = self._ocr_modify(dup_batch, rows[i], value, op)
+                count_codes[i] = self.ocr_count_codes[ocr_op] if ocr_op >= 0 else -1
+
+        return new_values, count_codes
+
+    def _transform(self, dup_batch, row, value, error_type):
+        """Return 'value' after a random phonetic or OCR change (if it has
+       any), and count the empty changes as retries.
+    """
+
+        list_pc = self.transformation_cache.get_changes(value, error_type)
+        if list_pc:
+            ch = self.rng.choice(list_pc)
+            if ch != "":
+                return utils.apply_change(value, ch)
+            dup_batch.num_retries[row] += 1
+
+        return value
+
+    def _ocr_modify(self, dup_batch, row, value, ocr_bits):
+        """Return 'value' after the first planned OCR modification (an OCR
+       change, a failed character, an inserted or a deleted space) that is
+       possible, and the index of this modification in 'ocr_prob_names' (-1
+       if none is possible).
+    """
+
+        if ocr_bits & 1:
+            return self._transform(dup_batch, row, value, "ocr"), 0
+
+        if (ocr_bits & 2) and (len(value) > 1):
+            fail_pos = utils.error_position(value, 0, self.rng)
+            return value[:fail_pos] + " " + value[fail_pos + 1 :], 1
+
+        if (ocr_bits & 4) and (len(value.strip()) > 1):
+            return insert_space(value, self.rng), 2
+
+        if (ocr_bits & 8) and (" " in value):
+            return delete_space(value), 3
+
+        return value, -1
+
+    # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+    def op_counts(self):
+        """Return two dictionaries with the number of modifications (by the
+       name of their probability) that changed a value and that did not,
+       over all batches modified so far (modifications never done are left
+       out).
+    """
+
+        applied = dict(zip(self.count_names, self.num_applied.tolist()))
+        noops = dict(zip(self.count_names, self.num_noops.tolist()))
+
+        return (
+            {name: num for name, num in applied.items() if num},
+            {name: num for name, num in noops.items() if num},
+        )
@@ -0,0 +1,189 @@
+"""Process-wide registry of the loaded data tables.
+
+The frequency files, misspellings dictionaries and lookup dictionaries of the
+fields (in the 'data' directory) are loaded by 'load_table' once per
+process, and shared by all generators and all calls of 'generate'. A table
+is cached by its absolute file name, and loaded again only if the
+modification time or size of the file changes. Tables are taken from the
+precompiled binary bundle (see 'bundle') if it is up to date, and else
+parsed from their text files.
+
+The shared tables must not be changed: the misspellings and lookup
+dictionaries are returned as read-only dictionaries ('FrozenDict') with
+tuples of values (equal strings stored once), and the frequency tables as
+'utils.FrequencySampler' objects.
+
+'table_info' reports, for each loaded table, the time needed to load it
+and an estimate of its memory size.
+"""
+
+import os
+import sys
+import time
+
+from duplicategenerator import bundle
+from duplicategenerator import utils
+
+# Loader of each kind of table
+#
+table_loaders = {
+    "freq": utils.load_frequency_file,
+    "misspell": utils.load_misspellings_dict,
+    "lookup": utils.load_lookup_dict,
+}
+
+# Directory of the data files (file names in field dictionaries are relative
+# to it)
+#
+data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+# Loaded tables of this process, by kind and absolute file name: tuples of
+# the modification time and size of the file when it was loaded, the table
+# and its information dictionary
+#
+_table_cache = {}
+
+
+# =============================================================================
+
+
+class FrozenDict(dict):
+    """A dictionary that can not be changed after its creation (lookups are as
+     fast as with a plain dictionary).
+  """
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("'%s' object is read-only" % (type(self).__name__))
+
+    __setitem__ = __delitem__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+    __ior__ = _read_only
+
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+
+# -----------------------------------------------------------------------------
+
+
+def data_file_name(file_name):
+    """Return the absolute name of a data file given relative to the 'data'
+     directory.
+  """
+
+    return os.path.abspath(os.path.join(data_dir, file_name))
+
+
+# -----------------------------------------------------------------------------
+
+
+def freeze_table(table):
+    """Return a read-only version of a misspellings or lookup dictionary (with
+     tuples of values, and each distinct string stored once). Other tables
+     are returned unchanged.
+  """
+
+    if not isinstance(table, dict):
+        return table
+
+    strings = {}
+    return FrozenDict(
+        (key, tuple(strings.setdefault(value, value) for value in values))
+        for key, values in table.items()
+    )
+
+
+# -----------------------------------------------------------------------------
+
+
+def table_size(table):
+    """Return an estimate of the memory size of a table in bytes (the
+     containers, the strings and the arrays of a sampler).
+  """
+
+    if isinstance(table, utils.DiscreteSampler):
+        size = sys.getsizeof(table) + sys.getsizeof(table.values)
+        size += sum(sys.getsizeof(value) for value in table.values)
+        for table_array in [table.prob, table.alias, getattr(table, "freqs", None)]:
+            if table_array is not None:
+                size += sys.getsizeof(table_array)
+        return size
+
+    size = sys.getsizeof(table)
+    seen = set()
+    for key, values in table.items():
+        size += sys.getsizeof(key) + sys.getsizeof(values)
+        for value in values:
+            if id(value) not in seen:
+                seen.add(id(value))
+                size += sys.getsizeof(value)
+
+    return size
+
+
+# -----------------------------------------------------------------------------
+
+
+def load_table(kind, file_name):
+    """Return the table of the given kind ("freq", "misspell" or "lookup") of
+     a data file (relative to the 'data' directory, or absolute), from the
+     table cache of the process if the file has not changed since it was
+     loaded.
+  """
+
+    if kind not in table_loaders:
+        raise ValueError('Unknown kind of table "%s"' % (kind))
+
+    file_name = data_file_name(file_name)
+    file_stamp = bundle.file_stamp(file_name)
+
+    cache_entry = _table_cache.get((kind, file_name))
+    if (cache_entry is not None) and (cache_entry[0] == file_stamp):
+        cache_entry[2]["hits"] += 1
+        return cache_entry[1]
+
+    start_time = time.perf_counter()
+    table = bundle.load_bundle_table(kind, file_name, file_stamp)
+    if table is not None:
+        source = "bundle"
+        if isinstance(table, dict):  # Values are already tuples of pooled strings
+            table = FrozenDict(table)
+    else:
+        source = "text"
+        table = freeze_table(table_loaders[kind](file_name))
+    load_time = time.perf_counter() - start_time
+
+    table_info = {
+        "kind": kind,
+        "file_name": file_name,
+        "source": source,
+        "num_entries": len(table),
+        "load_time": load_time,
+        "size": table_size(table),
+        "hits": 0,
+    }
+    _table_cache[(kind, file_name)] = (file_stamp, table, table_info)
+
+    return table
+
+
+# -----------------------------------------------------------------------------
+
+
+def table_info():
+    """Return a list with a dictionary for each loaded table: its kind, file
+     name, source ("bundle" or "text"), number of entries (distinct values or
+     keys), load time in seconds, estimated memory size in bytes, and number
+     of loads served from the cache.
+  """
+
+    return [dict(cache_entry[2]) for cache_entry in _table_cache.values()]
+
+
+# -----------------------------------------------------------------------------
+
+
+def clear_table_cache():
+    """Remove all tables from the table cache."""
+
+    _table_cache.clear()
@@ -0,0 +1,549 @@
+"""Compiled phonetic and OCR transformation rules.
+
+The rule files in the 'config' directory (lib_phonetic_rules.txt and
+lib_ocr_rules.txt) are parsed once per process into a RuleSet. Each line of
+a rule file is compiled into a Rule object that holds the pattern length,
+the position anchor and ready-made predicates for the pre-, post-, exist-
+and start-conditions, so querying the changes applicable to a value does
+not re-read or re-split anything. An Aho-Corasick automaton over all rule
+patterns finds the occurrences of all patterns in one pass over a value, and
+the conditions are only checked for the rules whose pattern occurs.
+
+The semantics (including the quirks) are the ones of the original
+'get_transformation' function by Agus Pudjijono, 2008.
+"""
+
+import collections
+import os
+
+vowels = "aeiouy"
+
+
+# =============================================================================
+
+
+def slavo_germanic(s):
+    """Return True if the given string looks Slavo-Germanic.
+  """
+
+    return ("w" in s) or ("k" in s) or ("cz" in s) or ("witz" in s)
+
+
+# -----------------------------------------------------------------------------
+
+
+class _PatternClause:
+    """One 'y;offset;pat1;pat2...' or 'n;offset;pat1;pat2...' condition on the
+     characters around a pattern occurrence.
+  """
+
+    __slots__ = ("negate", "offset", "alternatives")
+
+    def __init__(self, cond_str):
+        rl = cond_str.split(";")
+        self.negate = rl[0] == "n"
+        self.offset = int(rl[1])
+        self.alternatives = tuple(rl[2:])
+
+    def check(self, tmpstr, pat_start, pat_len):
+        if self.offset < 0:
+            index = pat_start + self.offset
+        else:
+            index = pat_start + (pat_len - 1) + self.offset
+
+        found = False
+        for alt in self.alternatives:
+            if tmpstr[index : index + len(alt)] == alt:
+                found = True
+                break
+
+        if self.negate:
+            return (not found) and (len(self.alternatives) > 0)
+        return found
+
+
+# -----------------------------------------------------------------------------
+
+
+class _ContextCondition:
+    """A pre- or post-condition of a rule. 'V' (vowel) and 'C' (consonant)
+     look at the character directly before (pre) or after (post) the
+     pattern, otherwise one or two (separated by '|') pattern clauses are
+     checked.
+  """
+
+    __slots__ = ("always", "kind", "clauses")
+
+    def __init__(self, cond_str):
+        self.always = cond_str == "None"
+        self.kind = cond_str if cond_str in ["V", "C"] else None
+        self.clauses = ()
+
+        if (not self.always) and (self.kind is None) and (";" in cond_str):
+            if "|" in cond_str:
+                rls = cond_str.split("|")
+                self.clauses = (_PatternClause(rls[0]), _PatternClause(rls[1]))
+            else:
+                self.clauses = (_PatternClause(cond_str),)
+
+    def check(self, tmpstr, char_pos, pat_start, pat_len):
+        """Check the condition for the pattern starting at 'pat_start', with
+         'char_pos' being the position of the neighbouring character.
+      """
+
+        if self.kind == "V":
+            if tmpstr[char_pos] in vowels:
+                return True
+        elif self.kind == "C":
+            if tmpstr[char_pos] not in vowels:
+                return True
+
+        if not self.clauses:
+            return False
+
+        for clause in self.clauses:
+            if not clause.check(tmpstr, pat_start, pat_len):
+                return False
+        return True
+
+
+# -----------------------------------------------------------------------------
+
+
+class _StringCondition:
+    """An exist- or start-condition of a rule. It only depends on the whole
+     input string, not on the position of the pattern.
+
+     Note that only the alternatives at positions 1, 2, 4, 8, ... of the
+     condition are checked, as in the original implementation.
+  """
+
+    __slots__ = ("always", "negate", "slavo", "anchored", "alternatives")
+
+    def __init__(self, cond_str, anchored):
+        self.always = cond_str == "None"
+        self.negate = False
+        self.slavo = False
+        self.anchored = anchored
+        self.alternatives = ()
+
+        if not self.always:
+            rl = cond_str.split(";")
+            self.negate = rl[0] == "n"
+
+            if (not anchored) and (rl[1] == "slavo"):
+                self.slavo = True
+            else:
+                alternatives = []
+                i = 1
+                while i < len(rl):
+                    alternatives.append(rl[i])
+                    i += i
+                self.alternatives = tuple(alternatives)
+
+    def check(self, s):
+        if self.always:
+            return True
+
+        if self.slavo:
+            return slavo_germanic(s) != self.negate
+
+        if self.negate:  # None of the values must be in the string
+            for alt in self.alternatives:
+                if alt in s:
+                    return False
+            return len(self.alternatives) > 0
+
+        for alt in self.alternatives:
+            if (self.anchored and s.startswith(alt)) or (
+                (not self.anchored) and (alt in s)
+            ):
+                return True
+        return False
+
+
+# =============================================================================
+
+
+class Rule:
+    """A compiled transformation rule:
+
+       where, orgpat, newpat, precond, postcond, existcond, startcond
+
+     where 'where' can be one of 'ALL', 'START', 'END' or 'MIDDLE'.
+  """
+
+    __slots__ = (
+        "where",
+        "orgpat",
+        "newpat",
+        "pat_len",
+        "change",
+        "precond",
+        "postcond",
+        "existcond",
+        "startcond",
+    )
+
+    def __init__(
+        self,
+        where,
+        orgpat,
+        newpat,
+        precond="None",
+        postcond="None",
+        existcond="None",
+        startcond="None",
+    ):
+        self.where = where
+        self.orgpat = orgpat
+        self.newpat = newpat
+        self.pat_len = len(orgpat)
+        self.change = orgpat + ">" + newpat + ">" + where.lower()
+
+        self.precond = _ContextCondition(precond)
+        self.postcond = _ContextCondition(postcond)
+        self.existcond = _StringCondition(existcond, False)
+        self.startcond = _StringCondition(startcond, True)
+
+    def position_ok(self, pat_start, str_len):
+        """Check the position anchor of the rule.
+      """
+
+        where = self.where
+        if where == "ALL":
+            return True
+        elif where == "START":
+            return pat_start == 0
+        elif where == "END":
+            return pat_start + self.pat_len == str_len
+        elif where == "MIDDLE":
+            return (pat_start > 0) and (pat_start + self.pat_len < str_len)
+        return False
+
+    def context_ok(self, tmpstr, pat_start, str_len):
+        """Check the pre- and post-condition for a pattern occurrence.
+      """
+
+        pat_len = self.pat_len
+
+        precond = self.precond
+        if not precond.always:
+            if pat_start <= 0:
+                return False
+            if not precond.check(tmpstr, pat_start - 1, pat_start, pat_len):
+                return False
+
+        postcond = self.postcond
+        if not postcond.always:
+            pat_end = pat_start + pat_len
+            if pat_end >= str_len:
+                return False
+            if not postcond.check(tmpstr, pat_end, pat_start, pat_len):
+                return False
+
+        return True
+
+    def string_ok(self, s):
+        """Check the exist- and start-condition for the whole input string.
+      """
+
+        return self.existcond.check(s) and self.startcond.check(s)
+
+    def applies(self, s):
+        """Return True if this rule can be applied at least once to 's'.
+    """
+
+        positions = []
+        pat_start = s.find(self.orgpat)
+        while pat_start >= 0:
+            positions.append(pat_start)
+            pat_start = s.find(self.orgpat, pat_start + 1)
+
+        return self.applies_at(s, positions)
+
+    def applies_at(self, s, positions):
+        """Return True if this rule can be applied to 's' at one of the given
+       (ascending) start positions of its pattern.
+
+       Pattern occurrences are visited in the same order (and with the same
+       early stop close to the end of the string) as in the original
+       search loop.
+    """
+
+        if (not positions) or (not self.string_ok(s)):
+            return False
+
+        str_len = len(s)
+
+        for pat_start in positions:
+            if self.position_ok(pat_start, str_len) and self.context_ok(
+                s, pat_start, str_len
+            ):
+                return True
+
+            if pat_start + 1 >= (str_len - 1):
+                return False
+
+        return False
+
+    def rewrite(self, s):
+        """Replace all occurrences of the pattern in 's' where the rule
+       applies and return the new string.
+    """
+
+        orgpat = self.orgpat
+        newpat = self.newpat
+        pat_len = self.pat_len
+        str_ok = self.string_ok(s)
+
+        tmpstr = s
+        start_search = 0
+
+        while orgpat in tmpstr[start_search:]:
+            pat_start = tmpstr.find(orgpat, start_search)
+            str_len = len(tmpstr)
+
+            if (
+                str_ok
+                and self.context_ok(tmpstr, pat_start, str_len)
+                and self.position_ok(pat_start, str_len)
+            ):
+                tmpstr = tmpstr[:pat_start] + newpat + tmpstr[pat_start + pat_len :]
+                start_search = pat_start + len(newpat)
+            else:
+                start_search = pat_start + 1
+
+            if start_search >= (len(tmpstr) - 1):
+                break
+
+        return tmpstr
+
+
+# -----------------------------------------------------------------------------
+
+
+class PatternIndex:
+    """Aho-Corasick automaton over a list of patterns, used to find all the
+     occurrences of all patterns in a string in one pass.
+  """
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self.pattern_lens = [len(pat) for pat in self.patterns]
+
+        # Build the trie of all patterns
+        #
+        goto = [{}]
+        out = [[]]
+        for pat_id, pat in enumerate(self.patterns):
+            if pat == "":
+                raise ValueError("Empty patterns can not be indexed")
+
+            node = 0
+            for ch in pat:
+                next_node = goto[node].get(ch)
+                if next_node is None:
+                    next_node = len(goto)
+                    goto[node][ch] = next_node
+                    goto.append({})
+                    out.append([])
+                node = next_node
+            out[node].append(pat_id)
+
+        # Compute failure links in breadth first order and turn the trie into
+        # a deterministic automaton (missing characters go back to the root)
+        #
+        fail = [0] * len(goto)
+        delta = [None] * len(goto)
+        delta[0] = dict(goto[0])
+
+        queue = collections.deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            delta[node] = dict(delta[fail[node]])
+            delta[node].update(goto[node])
+            out[node] = out[node] + out[fail[node]]
+
+            for ch, next_node in goto[node].items():
+                fail[next_node] = delta[fail[node]].get(ch, 0)
+                queue.append(next_node)
+
+        self._delta = delta
+        self._out = out
+
+    def find_all(self, s):
+        """Return a dictionary with the identifiers of the patterns found in
+       's' as keys and lists of their (ascending) start positions as values.
+    """
+
+        hits = {}
+        node = 0
+        delta = self._delta
+        out = self._out
+        pattern_lens = self.pattern_lens
+
+        for i, ch in enumerate(s):
+            node = delta[node].get(ch, 0)
+            for pat_id in out[node]:
+                pat_start = i - pattern_lens[pat_id] + 1
+                if pat_id in hits:
+                    hits[pat_id].append(pat_start)
+                else:
+                    hits[pat_id] = [pat_start]
+
+        return hits
+
+
+# -----------------------------------------------------------------------------
+
+
+class RuleSet:
+    """All compiled rules of one rule file, in file order, with an index over
+     their patterns so only the rules whose pattern occurs in a value are
+     checked.
+  """
+
+    def __init__(self, rule_list, file_name=None):
+        self.rules = list(rule_list)
+        self.file_name = file_name
+
+        patterns = []
+        pattern_ids = {}
+        self.pattern_rules = []  # For each pattern the numbers of its rules
+
+        for rule_num, rule in enumerate(self.rules):
+            pat_id = pattern_ids.get(rule.orgpat)
+            if pat_id is None:
+                pat_id = len(patterns)
+                pattern_ids[rule.orgpat] = pat_id
+                patterns.append(rule.orgpat)
+                self.pattern_rules.append([])
+            self.pattern_rules[pat_id].append(rule_num)
+
+        self.index = PatternIndex(patterns)
+
+    def __len__(self):
+        return len(self.rules)
+
+    def changes_str(self, s):
+        """Return the string of all applicable changes, each change of the form
+       'orgpat>newpat>where' followed by a ';'.
+    """
+
+        hits = self.index.find_all(s)
+
+        candidates = []
+        for pat_id, positions in hits.items():
+            for rule_num in self.pattern_rules[pat_id]:
+                candidates.append((rule_num, positions))
+        candidates.sort(key=lambda candidate: candidate[0])  # Keep file order
+
+        changesstr = ""
+        rules = self.rules
+
+        for rule_num, positions in candidates:
+            rule = rules[rule_num]
+            if rule.applies_at(s, positions):
+                # Skip changes already contained in the string
+                if changesstr.find(rule.change) == -1:
+                    changesstr += rule.change + ";"
+
+        return changesstr
+
+    def changes(self, s):
+        """Return the list of candidate changes for the given string. If no
+       rule applies the list contains one empty string.
+    """
+
+        if s == "":
+            return []
+
+        return self.changes_str(s)[:-1].split(";")
+
+    def transform(self, s):
+        """Return the string 'workstr,changes' as created by
+       'utils.get_transformation', with 'workstr' being the input value
+       rewritten by the last rule of the rule set.
+    """
+
+        if s == "":
+            return s
+
+        if self.rules:
+            workstr = self.rules[-1].rewrite(s)
+        else:
+            workstr = s
+
+        return workstr + "," + self.changes_str(s)
+
+
+# =============================================================================
+
+
+def parse_rule_line(line):
+    """Parse one line of a rule file into a tuple of its (stripped) values.
+     Rules without conditions are padded with 'None' conditions.
+  """
+
+    val_tuple = ()
+    for val in line.strip().split(","):
+        if val != "":
+            val_tuple += (val.strip(),)
+
+    if len(val_tuple) == 3:
+        val_tuple += ("None", "None", "None", "None")
+
+    return val_tuple
+
+
+# -----------------------------------------------------------------------------
+
+
+def compile_rules(file_name):
+    """Read a rule file and compile it into a RuleSet.
+  """
+
+    try:
+        f = open(file_name, "r")
+    except:
+        print("Error cannot read file %s" % (file_name))
+        raise IOError
+
+    file_data = f.readlines()
+    f.close()
+
+    rule_list = []
+    for line in file_data:
+        if line.strip() == "":
+            continue
+
+        val_tuple = parse_rule_line(line)
+        if len(val_tuple) != 7:
+            raise ValueError(
+                'Illegal rule format in file "%s": %s' % (file_name, line.strip())
+            )
+
+        rule_list.append(Rule(*val_tuple))
+
+    return RuleSet(rule_list, file_name)
+
+
+# -----------------------------------------------------------------------------
+
+_rule_sets = {}  # Compiled rule sets, keyed by rule file name
+
+
+def load_rule_set(file_name):
+    """Return the compiled RuleSet for the given rule file. Each file is only
+     read and compiled once per process.
+  """
+
+    file_name = os.path.abspath(file_name)
+
+    rule_set = _rule_sets.get(file_name)
+    if rule_set is None:
+        rule_set = compile_rules(file_name)
+        _rule_sets[file_name] = rule_set
+
+    return rule_set
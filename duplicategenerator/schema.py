@@ -0,0 +1,371 @@
+"""Schema and parser of the attribute configuration.
+
+An attribute configuration (a JSON attribute file, or
+'config.DEFAULT_ATTR_CONFIG') is a dictionary with the sections:
+
+  attributes               Dictionary of field dictionaries (see 'config' for
+                           their keys).
+  field_swap_prob          Probability to swap the values of a pair of fields,
+                           with keys like "('given_name','surname')".
+  single_typo_prob         Probabilities of "same_row" and "same_col" keyboard
+                           typos.
+  error_type_distribution  Probabilities of the "typ", "pho" and "ocr"
+                           modification types.
+
+'parse_attr_config' checks a configuration against this schema (unknown
+sections or keys and values of the wrong type are errors), and returns a new
+configuration with the values parsed once into native Python values: the
+field pairs as tuples of two field names, and the start and end dates of
+date fields as (day, month, year) tuples of integers. Nothing is evaluated
+as Python code.
+
+'load_attr_config' loads, parses and freezes (read-only mappings and tuples)
+a configuration once per process: it is cached by file name, and read again
+only if the modification time or size of the file changes (the attribute
+files of the package are taken from the binary bundle, see 'bundle', if it
+is up to date). Generators copy the (small) dictionaries they change, so the
+cached configuration is shared by all generators.
+"""
+
+import json
+import os
+import re
+import types
+
+from duplicategenerator import bundle
+from duplicategenerator import config as cf
+
+# Sections of an attribute configuration
+#
+attr_sections = [
+    "attributes",
+    "field_swap_prob",
+    "single_typo_prob",
+    "error_type_distribution",
+]
+
+# Keys of a field dictionary and the kind of their values
+#
+field_keys = {
+    "name": "str",
+    "type": "str",
+    "char_range": "str",
+    "freq_file": "str",
+    "misspell_file": "str",
+    "lookup_file": "str",
+    "depend": "str",
+    "start_date": "date",
+    "end_date": "date",
+    "area_codes": "str_list",
+    "num_digits": "int",
+    "start_id": "int",
+    "end_id": "int",
+}
+for prob_name in [
+    "select_prob",
+    "depend_prob",
+    "ins_prob",
+    "del_prob",
+    "sub_prob",
+    "trans_prob",
+    "val_swap_prob",
+    "wrd_swap_prob",
+    "spc_ins_prob",
+    "spc_del_prob",
+    "miss_prob",
+    "misspell_prob",
+    "new_val_prob",
+    "pho_prob",
+    "ocr_prob",
+    "ocr_fail_prob",
+    "ocr_ins_sp_prob",
+    "ocr_del_sp_prob",
+]:
+    field_keys[prob_name] = "prob"
+
+# Keys of the probability sections
+#
+single_typo_keys = ["same_row", "same_col"]
+error_type_keys = ["typ", "pho", "ocr"]
+
+# Parsed and frozen attribute configurations of this process, by absolute
+# file name (None for the default configuration), together with the
+# modification time and size of the file when it was loaded
+#
+_attr_config_cache = {}
+
+# A date "(day,month,year)" and a field pair "('name_a','name_b')"
+#
+date_pattern = re.compile(r"^\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*\)$")
+field_pair_pattern = re.compile(
+    r"""^\(\s*(['"])(\w+)\1\s*,\s*(['"])(\w+)\3\s*\)$"""
+)
+
+
+# =============================================================================
+
+
+def parse_date(value):
+    """Return a date given as string "(day,month,year)" or as a list of three
+     integers as (day, month, year) tuple. Raise a ValueError for any other
+     value or an impossible date.
+  """
+
+    if isinstance(value, str):
+        date_match = date_pattern.match(value)
+        if date_match is None:
+            raise ValueError('Illegal date "%s", must be "(day,month,year)"' % (value))
+        date = tuple(int(num) for num in date_match.groups())
+
+    elif isinstance(value, (list, tuple)) and (len(value) == 3) and all(
+        isinstance(num, int) and not isinstance(num, bool) for num in value
+    ):
+        date = tuple(value)
+
+    else:
+        raise ValueError('Illegal date "%s", must be "(day,month,year)"' % (str(value)))
+
+    day, month, year = date
+    if (month < 1) or (month > 12) or (day < 1) or (day > 31) or (year < 1):
+        raise ValueError('Illegal date "%s"' % (str(value)))
+
+    return date
+
+
+# -----------------------------------------------------------------------------
+
+
+def parse_field_pair(value):
+    """Return a field pair given as string "('name_a','name_b')" (or already as
+     a tuple of two names) as tuple of the two field names.
+  """
+
+    if isinstance(value, tuple) and (len(value) == 2):
+        if all(isinstance(name, str) for name in value):
+            return value
+
+    elif isinstance(value, str):
+        pair_match = field_pair_pattern.match(value)
+        if pair_match is not None:
+            return (pair_match.group(2), pair_match.group(4))
+
+    raise ValueError(
+        "Illegal field pair \"%s\", must be \"('name_a','name_b')\"" % (str(value))
+    )
+
+
+# -----------------------------------------------------------------------------
+
+
+def check_prob(value, what):
+    """Raise a ValueError if 'value' is not a probability (a number between 0.0
+     and 1.0). 'what' describes the value in the error message.
+  """
+
+    if (
+        isinstance(value, bool)
+        or (not isinstance(value, (int, float)))
+        or (value < 0.0)
+        or (value > 1.0)
+    ):
+        raise ValueError("Illegal probability for %s: %s" % (what, str(value)))
+
+
+# -----------------------------------------------------------------------------
+
+
+def parse_field(field_dict):
+    """Check a field dictionary against the schema, and return a new field
+     dictionary with its dates parsed.
+  """
+
+    if not isinstance(field_dict, dict):
+        raise ValueError("Field must be a dictionary: %s" % (str(field_dict)))
+    if not isinstance(field_dict.get("name"), str):
+        raise ValueError("Field has no name: %s" % (str(field_dict)))
+
+    field_name = field_dict["name"]
+    parsed_dict = {}
+
+    for key, value in field_dict.items():
+        kind = field_keys.get(key)
+
+        if kind is None:
+            raise ValueError('Unknown key "%s" in field "%s"' % (key, field_name))
+
+        elif kind == "str":
+            if not isinstance(value, str):
+                raise ValueError(
+                    'Value of "%s" in field "%s" must be a string: %s'
+                    % (key, field_name, str(value))
+                )
+
+        elif kind == "prob":
+            check_prob(value, '"%s" in field "%s"' % (key, field_name))
+
+        elif kind == "int":
+            if isinstance(value, bool) or not isinstance(value, int):
+                raise ValueError(
+                    'Value of "%s" in field "%s" must be an integer: %s'
+                    % (key, field_name, str(value))
+                )
+
+        elif kind == "str_list":
+            if isinstance(value, list) and all(isinstance(item, str) for item in value):
+                value = list(value)  # Own copy
+            elif not isinstance(value, str):
+                raise ValueError(
+                    'Value of "%s" in field "%s" must be a string or a list of '
+                    % (key, field_name)
+                    + "strings: %s" % (str(value))
+                )
+
+        elif kind == "date":
+            value = parse_date(value)
+
+        parsed_dict[key] = value
+
+    return parsed_dict
+
+
+# -----------------------------------------------------------------------------
+
+
+def parse_prob_dict(prob_dict, section, keys):
+    """Check a section with probabilities for the given keys, and return a copy
+     of it.
+  """
+
+    if not isinstance(prob_dict, dict):
+        raise ValueError('Section "%s" must be a dictionary' % (section))
+
+    for key, value in prob_dict.items():
+        if key not in keys:
+            raise ValueError('Unknown key "%s" in section "%s"' % (key, section))
+        check_prob(value, '"%s" in section "%s"' % (key, section))
+
+    return dict(prob_dict)
+
+
+# -----------------------------------------------------------------------------
+
+
+def parse_attr_config(attr_data):
+    """Check an attribute configuration against the schema, and return a new
+     configuration with the field pairs and dates parsed (the given one is not
+     changed).
+  """
+
+    if not isinstance(attr_data, dict):
+        raise ValueError("Attribute configuration must be a dictionary")
+
+    for section in attr_data:
+        if section not in attr_sections:
+            raise ValueError('Unknown section "%s" in attribute configuration' % (section))
+    for section in attr_sections:
+        if section not in attr_data:
+            raise ValueError('Section "%s" missing in attribute configuration' % (section))
+
+    if not isinstance(attr_data["attributes"], dict):
+        raise ValueError('Section "attributes" must be a dictionary')
+
+    attributes = {}
+    for attr_name, field_dict in attr_data["attributes"].items():
+        attributes[attr_name] = parse_field(field_dict)
+
+    field_names = set(field_dict["name"] for field_dict in attributes.values())
+
+    if not isinstance(attr_data["field_swap_prob"], dict):
+        raise ValueError('Section "field_swap_prob" must be a dictionary')
+
+    field_swap_prob = {}
+    for field_pair, swap_prob in attr_data["field_swap_prob"].items():
+        field_pair = parse_field_pair(field_pair)
+        for field_name in field_pair:
+            if field_name not in field_names:
+                raise ValueError(
+                    'Unknown field "%s" in section "field_swap_prob"' % (field_name)
+                )
+        check_prob(swap_prob, 'field pair "%s"' % (str(field_pair)))
+        field_swap_prob[field_pair] = swap_prob
+
+    return {
+        "attributes": attributes,
+        "field_swap_prob": field_swap_prob,
+        "single_typo_prob": parse_prob_dict(
+            attr_data["single_typo_prob"], "single_typo_prob", single_typo_keys
+        ),
+        "error_type_distribution": parse_prob_dict(
+            attr_data["error_type_distribution"],
+            "error_type_distribution",
+            error_type_keys,
+        ),
+    }
+
+
+# -----------------------------------------------------------------------------
+
+
+def freeze_attr_config(attr_data):
+    """Return a read-only version of a parsed attribute configuration: all
+     dictionaries become read-only mappings (types.MappingProxyType) and the
+     lists of area codes become tuples.
+  """
+
+    attributes = {}
+    for attr_name, field_dict in attr_data["attributes"].items():
+        field_dict = dict(field_dict)
+        if isinstance(field_dict.get("area_codes"), list):
+            field_dict["area_codes"] = tuple(field_dict["area_codes"])
+        attributes[attr_name] = types.MappingProxyType(field_dict)
+
+    frozen_data = {"attributes": types.MappingProxyType(attributes)}
+    for section in attr_sections[1:]:
+        frozen_data[section] = types.MappingProxyType(dict(attr_data[section]))
+
+    return types.MappingProxyType(frozen_data)
+
+
+# -----------------------------------------------------------------------------
+
+
+def load_attr_config(file_name=None):
+    """Return the parsed and frozen attribute configuration of a JSON attribute
+     file (or of 'config.DEFAULT_ATTR_CONFIG' if 'file_name' is None), from
+     the configuration cache of the process if the file has not changed since
+     it was loaded.
+  """
+
+    if file_name is None:
+        file_stamp = None
+    else:
+        file_name = os.path.abspath(file_name)
+        file_stamp = bundle.file_stamp(file_name)
+
+    cache_entry = _attr_config_cache.get(file_name)
+    if (cache_entry is not None) and (cache_entry[0] == file_stamp):
+        return cache_entry[1]
+
+    if file_name is None:
+        attr_data = cf.DEFAULT_ATTR_CONFIG
+    else:
+        attr_data = bundle.load_bundle_config(file_name, file_stamp)
+        if attr_data is None:
+            with open(file_name, "r") as json_file:
+                attr_data = json.load(json_file)
+
+    attr_config = freeze_attr_config(parse_attr_config(attr_data))
+    _attr_config_cache[file_name] = (file_stamp, attr_config)
+
+    return attr_config
+
+
+# -----------------------------------------------------------------------------
+
+
+def clear_attr_config_cache():
+    """Remove all configurations from the configuration cache (for example
+     after changing 'config.DEFAULT_ATTR_CONFIG').
+  """
+
+    _attr_config_cache.clear()
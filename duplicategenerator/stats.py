@@ -0,0 +1,137 @@
+"""Statistics of the generation of a dataset.
+
+A GenerationStats keeps, for each stage of the generation:
+  tables      Loading of the frequency, misspellings and lookup tables (and
+              compilation of the fields).
+  originals   Creation of the original records.
+  duplicates  Creation of the duplicate records.
+  merging     Merging of the chunks (and removal of the records of a shard
+              already created in another shard).
+  output      Formatting of the records into the output type (and writing
+              them out with the command line tool).
+the wall and CPU time and the number of records, and the counters of the
+events of the generation:
+  unique_collisions                Records dropped because the same record
+                                   was already created.
+  retry_num_dups_exhausted         Original records for which no more
+                                   duplicates were tried because too many
+                                   were not unique.
+  retry_modif_in_record_exhausted  Duplicates with too many phonetic or OCR
+                                   changes that did not change a value.
+  idle_modif_in_record_exhausted   Duplicates in which too many fields were
+                                   selected in a row without a change.
+  shard_records_replaced           Records of a shard removed because they
+                                   were already created in another shard
+                                   (and created again).
+together with the number of modifications that changed a value (applied)
+or not (no-ops), for each modification (by the name of its probability,
+as "sub_prob" or "pho_prob").
+
+With worker processes, each shard has its own statistics and they are
+added up (so the times of the originals and duplicates are the sum of the
+times of all shards).
+"""
+
+import collections
+import contextlib
+import json
+import time
+
+# Names of the stages and of the event counters
+#
+stage_names = ["tables", "originals", "duplicates", "merging", "output"]
+
+counter_names = [
+    "unique_collisions",
+    "retry_num_dups_exhausted",
+    "retry_modif_in_record_exhausted",
+    "idle_modif_in_record_exhausted",
+    "shard_records_replaced",
+]
+
+
+# =============================================================================
+
+
+class GenerationStats:
+    """Times, record numbers and event counters of a generation.
+
+     wall_time    Wall time of each stage (in seconds).
+     cpu_time     CPU time of each stage (of this process, in seconds).
+     num_records  Number of records of each stage.
+     counters     Number of each event (see 'counter_names').
+     op_applied   Counter of the modifications that changed a value.
+     op_noops     Counter of the modifications that did not change a value.
+  """
+
+    def __init__(self):
+        self.wall_time = dict.fromkeys(stage_names, 0.0)
+        self.cpu_time = dict.fromkeys(stage_names, 0.0)
+        self.num_records = dict.fromkeys(stage_names, 0)
+        self.counters = dict.fromkeys(counter_names, 0)
+        self.op_applied = collections.Counter()
+        self.op_noops = collections.Counter()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Add the wall and CPU time of the 'with' block to the stage 'name'.
+    """
+
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        try:
+            yield self
+        finally:
+            self.wall_time[name] += time.perf_counter() - start_wall
+            self.cpu_time[name] += time.process_time() - start_cpu
+
+    def merge(self, other):
+        """Add the statistics of 'other' (another GenerationStats, for example
+       of a shard) to these statistics.
+    """
+
+        for name in stage_names:
+            self.wall_time[name] += other.wall_time[name]
+            self.cpu_time[name] += other.cpu_time[name]
+            self.num_records[name] += other.num_records[name]
+        for name in counter_names:
+            self.counters[name] += other.counters[name]
+        self.op_applied.update(other.op_applied)
+        self.op_noops.update(other.op_noops)
+
+    def as_dict(self):
+        """Return the statistics as dictionary (for JSON output), with the
+       number of records per second of each stage (None for stages without
+       records or time) and the modifications named without their '_prob'
+       suffix. Stages without records and time (that did not take place, as
+       the merging without worker processes) are left out.
+    """
+
+        stages = {}
+        for name in stage_names:
+            wall_time = self.wall_time[name]
+            num_records = self.num_records[name]
+            if (wall_time == 0.0) and (num_records == 0):
+                continue
+            stages[name] = {
+                "wall_time": wall_time,
+                "cpu_time": self.cpu_time[name],
+                "num_records": num_records,
+                "records_per_second": (
+                    num_records / wall_time if (num_records and wall_time > 0.0) else None
+                ),
+            }
+
+        ops = {}
+        for op in sorted(set(self.op_applied) | set(self.op_noops)):
+            op_name = op[:-5] if op.endswith("_prob") else op
+            ops[op_name] = {"applied": self.op_applied[op], "noops": self.op_noops[op]}
+
+        return {"stages": stages, "counters": dict(self.counters), "modifications": ops}
+
+    def to_json(self, **kwargs):
+        """Return the statistics (see 'as_dict') as JSON string, the keyword
+       arguments are passed to 'json.dumps'.
+    """
+
+        return json.dumps(self.as_dict(), **kwargs)
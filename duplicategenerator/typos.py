@@ -0,0 +1,311 @@
+"""Vectorized keyboard typos with NumPy.
+
+The TypoKernel applies the typographical modifications of duplicates (the
+"sub_prob", "ins_prob", "del_prob" and "trans_prob" modifications) to a
+whole batch of field values at once, instead of one value at a time with
+'utils.error_position' and 'utils.error_character'.
+
+The values of a batch are converted into a two-dimensional array of
+Unicode code points (one row per value). Each modification is one gather
+of the characters of its row (and, for substitutions and insertions, one
+new character), so all values of a batch are modified with a few array
+operations whatever their modifications. The neighbouring keys of the
+keyboard ('utils.keyboard_rows' and 'utils.keyboard_cols') are held in
+lookup arrays indexed by code point.
+
+The modifications follow the same distributions as the scalar functions:
+'error_positions' draws positions like 'utils.error_position', and new
+characters of substitutions are selected like 'utils.error_character' (with
+the "same_row" and "same_col" probabilities, and within the character range
+of the field). The random numbers are drawn from a 'numpy.random.Generator',
+so the values differ from the ones of the scalar functions.
+
+Values must not contain the character "\\0" (it marks the end of a value in
+NumPy string arrays).
+"""
+
+import string
+
+import numpy
+
+from duplicategenerator import utils
+
+# Codes of the modifications (-1 leaves a value unchanged)
+#
+op_codes = {"sub_prob": 0, "ins_prob": 1, "del_prob": 2, "trans_prob": 3}
+no_op = -1
+
+# Characters of each character range (as in 'fields.char_ranges')
+#
+range_chars = {
+    "digit": string.digits,
+    "alpha": string.ascii_lowercase,
+    "alphanum": string.ascii_lowercase + string.digits,
+}
+
+# Size of the lookup arrays (characters with larger code points have no
+# neighbouring keys)
+#
+num_codes = 128
+
+
+# =============================================================================
+
+
+def strings_to_codes(values):
+    """Return a sequence of strings as two-dimensional array of code points
+     (one row per string, padded with zeros) and an array of their lengths.
+  """
+
+    lengths = numpy.fromiter(map(len, values), dtype=numpy.int64, count=len(values))
+    width = max(int(lengths.max(initial=0)), 1)
+
+    str_array = numpy.array(values, dtype="<U%d" % (width)).reshape(-1)
+    codes = str_array.view(numpy.uint32).reshape(len(str_array), width).copy()
+
+    return codes, lengths
+
+
+def codes_to_strings(codes):
+    """Return the strings of a two-dimensional array of code points as a
+     list.
+  """
+
+    codes = numpy.ascontiguousarray(codes, dtype=numpy.uint32)
+    str_array = codes.view("<U%d" % (codes.shape[1])).reshape(-1)
+
+    return str_array.tolist()
+
+
+# -----------------------------------------------------------------------------
+
+
+def error_positions(lengths, len_offset, rng):
+    """Return an array with a random error position for each string length
+     in 'lengths', drawn like 'utils.error_position' (a gauss distribution
+     around one position behind the middle of the string), and -1 for empty
+     strings. 'len_offset' is the offset of the maximal position relative to
+     the string length (a scalar or an array).
+  """
+
+    lengths = numpy.asarray(lengths, dtype=numpy.int64)
+    mid_pos = (lengths + len_offset) / 2 + 1
+
+    random_pos = numpy.rint(rng.normal(mid_pos, 1.0)).astype(numpy.int64)
+    positions = numpy.minimum(numpy.maximum(random_pos, 0), lengths - 1 + len_offset)
+
+    return numpy.where(lengths > 0, positions, -1)
+
+
+# =============================================================================
+
+
+class TypoKernel:
+    """Apply keyboard typos to batches of values.
+
+     typo_prob  Dictionary with the probabilities of a new character from the
+                "same_row" and the "same_col" of the keyboard (default
+                'utils.single_typo_prob').
+  """
+
+    def __init__(self, typo_prob=None):
+        if typo_prob is None:
+            typo_prob = utils.single_typo_prob
+
+        self.same_row_prob = typo_prob["same_row"]
+        self.same_col_prob = typo_prob["same_col"]
+
+        # Neighbouring keys: a row of code points (padded) and the number of
+        # neighbours for each code point
+        #
+        self.row_keys, self.row_counts = self._neighbour_arrays(utils.keyboard_rows)
+        self.col_keys, self.col_counts = self._neighbour_arrays(utils.keyboard_cols)
+
+        # Code points of each character range, and the position of each code
+        # point within the range (-1 if not in the range)
+        #
+        self.range_codes = {}
+        self.range_index = {}
+        for char_range, chars in range_chars.items():
+            range_codes = numpy.array([ord(c) for c in chars], dtype=numpy.uint32)
+            range_index = numpy.full(num_codes, -1, dtype=numpy.int64)
+            range_index[range_codes] = numpy.arange(len(range_codes))
+            self.range_codes[char_range] = range_codes
+            self.range_index[char_range] = range_index
+
+    @staticmethod
+    def _neighbour_arrays(keyboard_dict):
+        max_keys = max(len(keys) for keys in keyboard_dict.values())
+        keys = numpy.zeros((num_codes, max_keys), dtype=numpy.uint32)
+        counts = numpy.zeros(num_codes, dtype=numpy.int64)
+        for char, neighbours in keyboard_dict.items():
+            keys[ord(char), : len(neighbours)] = [ord(c) for c in neighbours]
+            counts[ord(char)] = len(neighbours)
+        return keys, counts
+
+    # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+    def random_chars(self, num, char_range, rng, exclude=None):
+        """Return an array of 'num' code points randomly chosen from the
+       character range, different from the code points in 'exclude' (if
+       given and in the range).
+    """
+
+        range_codes = self.range_codes[char_range]
+        num_chars = len(range_codes)
+
+        if exclude is None:
+            return range_codes[rng.integers(0, num_chars, num)]
+
+        exclude_index = self._range_index(char_range, exclude)
+        excluded = exclude_index >= 0
+        num_choices = numpy.where(excluded, num_chars - 1, num_chars)
+        choice = (rng.random(num) * num_choices).astype(numpy.int64)
+        choice += excluded & (choice >= exclude_index)
+
+        return range_codes[choice]
+
+    def _range_index(self, char_range, codes):
+        codes = numpy.asarray(codes, dtype=numpy.int64)
+        in_table = codes < num_codes
+        index = self.range_index[char_range][numpy.where(in_table, codes, 0)]
+        return numpy.where(in_table, index, -1)
+
+    def substitute_chars(self, old_codes, char_range, rng):
+        """Return an array of new code points for the code points 'old_codes',
+       chosen like 'utils.error_character': a neighbouring key in the same
+       row or column of the keyboard (with the "same_row" and "same_col"
+       probabilities), else a different random character of the range.
+    """
+
+        old_codes = numpy.asarray(old_codes, dtype=numpy.int64)
+        num = len(old_codes)
+        in_table = old_codes < num_codes
+        table_codes = numpy.where(in_table, old_codes, 0)
+
+        row_counts = numpy.where(in_table, self.row_counts[table_codes], 0)
+        col_counts = numpy.where(in_table, self.col_counts[table_codes], 0)
+
+        if char_range == "digit":
+            has_row = row_counts > 0
+            has_row &= self._range_index("digit", old_codes) >= 0
+            has_col = numpy.zeros(num, dtype=bool)  # Only the same row for digits
+        elif char_range == "alpha":
+            has_row = self._range_index("alpha", old_codes) >= 0
+            has_col = has_row
+        else:
+            has_row = row_counts > 0
+            has_col = col_counts > 0
+
+        rand_num = rng.random(num)
+        rand_key = rng.random(num)
+
+        use_row = (rand_num <= self.same_row_prob) & has_row
+        use_col = (
+            (rand_num > self.same_row_prob)
+            & (rand_num <= self.same_row_prob + self.same_col_prob)
+            & has_col
+        )
+
+        new_codes = self.random_chars(num, char_range, rng, exclude=old_codes)
+
+        row_choice = (rand_key * row_counts).astype(numpy.int64)
+        row_choice = numpy.minimum(row_choice, self.row_keys.shape[1] - 1)
+        row_codes = self.row_keys[table_codes, row_choice]
+        new_codes = numpy.where(use_row, row_codes, new_codes)
+
+        col_choice = (rand_key * col_counts).astype(numpy.int64)
+        col_choice = numpy.minimum(col_choice, self.col_keys.shape[1] - 1)
+        col_codes = self.col_keys[table_codes, col_choice]
+        new_codes = numpy.where(use_col, col_codes, new_codes)
+
+        return new_codes.astype(numpy.uint32)
+
+    # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+    def apply_codes(self, codes, ops, positions, new_chars):
+        """Apply one modification to each row of an array of code points (padded
+       with zeros), and return the new array (one column wider, also padded
+       with zeros).
+
+       ops        Array with the code of the modification of each row (see
+                  'op_codes', -1 for none).
+       positions  Array with the position of each modification (for
+                  transpositions the position of the first character).
+       new_chars  Array with the new code point of each row (used by
+                  substitutions and insertions).
+    """
+
+        num, width = codes.shape
+        ops = numpy.asarray(ops, dtype=numpy.int64)
+        pos = numpy.where(ops == no_op, -2, positions).astype(numpy.int32)[:, None]
+
+        is_ins = (ops == op_codes["ins_prob"]).astype(numpy.int8)[:, None]
+        is_del = (ops == op_codes["del_prob"]).astype(numpy.int8)[:, None]
+        is_trans = (ops == op_codes["trans_prob"]).astype(numpy.int8)[:, None]
+        put_char = ((ops == op_codes["sub_prob"]) | (ops == op_codes["ins_prob"]))[:, None]
+
+        # Source column of each column of the new array: the column itself,
+        # shifted by one after the position of an insertion or deletion, and
+        # swapped with the next one at the position of a transposition
+        #
+        j = numpy.arange(width + 1, dtype=numpy.int32)[None, :]
+        at_pos = j == pos
+        shift = (j > pos) * (is_del - is_ins)
+        shift += at_pos * (is_del + is_trans)
+        shift -= (j == pos + 1) * is_trans
+
+        padded = numpy.zeros((num, width + 2), dtype=numpy.uint32)
+        padded[:, :width] = codes
+        new_codes = numpy.take_along_axis(padded, j + shift, axis=1)
+
+        new_chars = numpy.asarray(new_chars, dtype=numpy.uint32)[:, None]
+        numpy.copyto(new_codes, new_chars, where=at_pos & put_char)
+
+        return new_codes
+
+    def apply(self, values, ops, positions, char_range, rng):
+        """Return a list with the values after one modification each.
+
+       values      Sequence of strings.
+       ops         Codes of the modifications (see 'op_codes', -1 for none).
+       positions   Positions of the modifications, for example drawn with
+                   'error_positions' (-1 for none).
+       char_range  Character range of the field ("digit", "alpha" or
+                   "alphanum") of the new characters.
+       rng         A 'numpy.random.Generator' for the new characters.
+
+       Modifications that are not possible (a position outside of the value,
+       or a deletion or transposition in a value with less than two
+       characters) leave the value unchanged.
+    """
+
+        codes, lengths = strings_to_codes(values)
+        num = len(lengths)
+        ops = numpy.asarray(ops, dtype=numpy.int64)
+        positions = numpy.asarray(positions, dtype=numpy.int64)
+
+        max_pos = lengths - 1
+        max_pos += ops == op_codes["ins_prob"]
+        max_pos -= ops == op_codes["trans_prob"]
+        valid = (positions >= 0) & (positions <= max_pos)
+        valid &= ~numpy.isin(ops, [op_codes["del_prob"], op_codes["trans_prob"]]) | (
+            lengths > 1
+        )
+        ops = numpy.where(valid, ops, no_op)
+
+        new_chars = numpy.zeros(num, dtype=numpy.uint32)
+
+        is_sub = ops == op_codes["sub_prob"]
+        if is_sub.any():
+            sub_rows = numpy.flatnonzero(is_sub)
+            old_codes = codes[sub_rows, positions[sub_rows]]
+            new_chars[sub_rows] = self.substitute_chars(old_codes, char_range, rng)
+
+        is_ins = ops == op_codes["ins_prob"]
+        if is_ins.any():
+            new_chars[is_ins] = self.random_chars(int(is_ins.sum()), char_range, rng)
+
+        new_codes = self.apply_codes(codes, ops, positions, new_chars)
+
+        return codes_to_strings(new_codes)
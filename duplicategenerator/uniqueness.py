@@ -0,0 +1,262 @@
+"""Indexes used to check that all created records are different.
+
+A record (without its identifier) is reduced to a canonical key: the bytes of
+its (field name, value) pairs sorted by field name. The RecordHashIndex keeps
+a 128-bit hash of this key in a compact open-addressing table (two NumPy
+'uint64' arrays), so each record costs a few dozen bytes instead of a Python
+string with the whole record. In exact-verification mode it also keeps the
+keys, so that two different records with the same hash are never taken for
+the same record.
+
+The RecordSetIndex keeps the keys in a Python set (exact, but uses much more
+memory).
+
+Both indexes have the same interface:
+  add(rec_data)  Insert the record, returns False if it was already in the
+                 index (True otherwise).
+"""
+
+import hashlib
+
+import numpy
+
+# Names of the available indexes, as used for the 'unique_index' argument
+#
+index_names = ["hash", "hash-verify", "set"]
+
+# Start capacity (number of slots) and maximal load factor of the hash table,
+# and number of slots moved at a time when the table is resized
+#
+start_capacity = 1024
+max_load = 0.7
+resize_block_size = 1 << 20
+
+
+# =============================================================================
+
+
+def record_key(rec_data):
+    """Return the canonical key of a record dictionary (without record
+     identifier): the UTF-8 bytes of its (field name, value) pairs sorted by
+     field name, with field names and values separated by control characters
+     (which do not occur in field values).
+  """
+
+    rec_items = sorted(rec_data.items())
+
+    try:
+        rec_str = "\x1e".join(map("\x1f".join, rec_items))
+    except TypeError:  # Not all field values are strings
+        rec_str = "\x1e".join(
+            [name + "\x1f" + str(value) for (name, value) in rec_items]
+        )
+
+    return rec_str.encode("utf-8")
+
+
+# -----------------------------------------------------------------------------
+
+
+def record_hash(rec_key):
+    """Return the 128-bit hash of a record key as two integers (high and low
+     64 bits). The hash is never all zero (see RecordHashIndex).
+  """
+
+    digest = hashlib.blake2b(rec_key, digest_size=16).digest()
+    hash_hi, hash_lo = memoryview(digest).cast("Q")
+
+    if (hash_hi == 0) and (hash_lo == 0):
+        hash_lo = 1
+
+    return hash_hi, hash_lo
+
+
+# -----------------------------------------------------------------------------
+
+
+def create_index(name):
+    """Return a new (empty) record index with the given name (one of
+     'index_names').
+  """
+
+    if name == "hash":
+        return RecordHashIndex()
+    elif name == "hash-verify":
+        return RecordHashIndex(verify=True)
+    elif name == "set":
+        return RecordSetIndex()
+
+    raise ValueError(
+        'Illegal unique index must be one of: "hash", "hash-verify" or "set"'
+    )
+
+
+# =============================================================================
+
+
+class RecordSetIndex:
+    """Exact record index based on a Python set of record keys."""
+
+    def __init__(self):
+        self.rec_set = set()
+
+    def __len__(self):
+        return len(self.rec_set)
+
+    def __contains__(self, rec_data):
+        return record_key(rec_data) in self.rec_set
+
+    def add(self, rec_data):
+        rec_key = record_key(rec_data)
+
+        if rec_key in self.rec_set:
+            return False
+
+        self.rec_set.add(rec_key)
+        return True
+
+
+# =============================================================================
+
+
+class RecordHashIndex:
+    """Record index with the 128-bit hashes of the records in an open-addressing
+     hash table with linear probing.
+
+     The hashes are kept in two 'uint64' arrays (high and low 64 bits). A slot
+     with both parts zero is empty.
+
+     verify  If True, also keep the record keys, and compare them when the
+             hash of a new record is already in the table.
+  """
+
+    def __init__(self, capacity=start_capacity, verify=False):
+        capacity = max(int(capacity), 8)
+        capacity = 1 << (capacity - 1).bit_length()  # Power of two
+
+        self._set_tables(
+            numpy.zeros(capacity, dtype=numpy.uint64),
+            numpy.zeros(capacity, dtype=numpy.uint64),
+        )
+        self.num_records = 0
+        self.verify = verify
+        self.rec_set = set() if verify else None
+        self.num_collisions = 0  # Different records with the same hash
+
+    def __len__(self):
+        return self.num_records
+
+    def __contains__(self, rec_data):
+        rec_key = record_key(rec_data)
+        slot = self._find_slot(*record_hash(rec_key))
+
+        if not (self._hi_view[slot] or self._lo_view[slot]):
+            return False
+        if self.verify:
+            return rec_key in self.rec_set
+        return True
+
+    @property
+    def capacity(self):
+        return len(self.hash_hi)
+
+    @property
+    def nbytes(self):
+        """Memory (in bytes) used by the hash table (without the record keys
+       kept in exact-verification mode).
+    """
+
+        return self.hash_hi.nbytes + self.hash_lo.nbytes
+
+    def add(self, rec_data):
+        rec_key = record_key(rec_data)
+        hash_hi, hash_lo = record_hash(rec_key)
+        slot = self._find_slot(hash_hi, hash_lo)
+
+        if self._hi_view[slot] or self._lo_view[slot]:  # Hash already in the table
+            if not self.verify:
+                return False
+            if rec_key in self.rec_set:
+                return False
+            self.num_collisions += 1  # A new record, only its hash is known
+        else:
+            self._hi_view[slot] = hash_hi
+            self._lo_view[slot] = hash_lo
+
+        self.num_records += 1
+        if self.verify:
+            self.rec_set.add(rec_key)
+
+        if self.num_records > max_load * self.capacity:
+            self._resize(2 * self.capacity)
+
+        return True
+
+    # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+    def _set_tables(self, hash_hi, hash_lo):
+        """Set the arrays of the hash table, and the memory views used to
+       access single slots (much faster than indexing the arrays).
+    """
+
+        self.hash_hi = hash_hi
+        self.hash_lo = hash_lo
+        self._hi_view = memoryview(hash_hi)
+        self._lo_view = memoryview(hash_lo)
+
+    def _find_slot(self, hash_hi, hash_lo):
+        """Return the slot with the given hash, or the first empty slot where
+       it can be inserted.
+    """
+
+        mask = self.capacity - 1
+        slot = hash_lo & mask
+        table_hi = self._hi_view
+        table_lo = self._lo_view
+
+        while True:
+            slot_hi = table_hi[slot]
+            slot_lo = table_lo[slot]
+            if ((slot_hi == hash_hi) and (slot_lo == hash_lo)) or (
+                (slot_hi == 0) and (slot_lo == 0)
+            ):
+                return slot
+            slot = (slot + 1) & mask
+
+    def _resize(self, capacity):
+        """Move all hashes into a new table with the given number of slots
+       (inserted with linear probing, a block of slots of the old table at
+       a time so that only small temporary arrays are needed).
+    """
+
+        hash_hi = numpy.zeros(capacity, dtype=numpy.uint64)
+        hash_lo = numpy.zeros(capacity, dtype=numpy.uint64)
+        mask = numpy.uint64(capacity - 1)
+
+        for block_start in range(0, self.capacity, resize_block_size):
+            block_hi = self.hash_hi[block_start : block_start + resize_block_size]
+            block_lo = self.hash_lo[block_start : block_start + resize_block_size]
+            used = (block_hi != 0) | (block_lo != 0)
+            old_hi = block_hi[used]
+            old_lo = block_lo[used]
+
+            pending = numpy.arange(len(old_hi))
+            slots = old_lo & mask
+
+            while len(pending) > 0:
+                # Of all pending hashes that probe an empty slot, insert the
+                # first one for each slot; all others probe the next slot
+                #
+                empty = (hash_hi[slots] == 0) & (hash_lo[slots] == 0)
+                free_slots, first = numpy.unique(slots[empty], return_index=True)
+                placed = numpy.flatnonzero(empty)[first]
+
+                hash_hi[free_slots] = old_hi[pending[placed]]
+                hash_lo[free_slots] = old_lo[pending[placed]]
+
+                keep = numpy.ones(len(pending), dtype=bool)
+                keep[placed] = False
+                pending = pending[keep]
+                slots = (slots[keep] + numpy.uint64(1)) & mask
+
+        self._set_tables(hash_hi, hash_lo)
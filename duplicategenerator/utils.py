@@ -1,3 +1,5 @@
+import array
+import collections
 import math
 import os
 import random
@@ -5,6 +7,10 @@ import string
 import sys
 import time
 
+import numpy
+
+from duplicategenerator import rules
+
 days_in_month = [
     [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31],
     [31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31],
@@ -19,6 +25,78 @@ days_in_month = [
 #
 single_typo_prob = {"same_row": 0.40, "same_col": 0.30}
 
+# Keyboard substitutions gives two dictionaries with the neigbouring keys for
+# all letters both for rows and columns (based on ideas implemented by
+# Mauricio A. Hernandez in his dbgen).
+#
+keyboard_rows = {
+    "a": "s",
+    "b": "vn",
+    "c": "xv",
+    "d": "sf",
+    "e": "wr",
+    "f": "dg",
+    "g": "fh",
+    "h": "gj",
+    "i": "uo",
+    "j": "hk",
+    "k": "jl",
+    "l": "k",
+    "m": "n",
+    "n": "bm",
+    "o": "ip",
+    "p": "o",
+    "q": "w",
+    "r": "et",
+    "s": "ad",
+    "t": "ry",
+    "u": "yi",
+    "v": "cb",
+    "w": "qe",
+    "x": "zc",
+    "y": "tu",
+    "z": "x",
+    "1": "2",
+    "2": "13",
+    "3": "24",
+    "4": "35",
+    "5": "46",
+    "6": "57",
+    "7": "68",
+    "8": "79",
+    "9": "80",
+    "0": "9",
+}
+
+keyboard_cols = {
+    "a": "qzw",
+    "b": "gh",
+    "c": "df",
+    "d": "erc",
+    "e": "d",
+    "f": "rvc",
+    "g": "tbv",
+    "h": "ybn",
+    "i": "k",
+    "j": "umn",
+    "k": "im",
+    "l": "o",
+    "m": "jk",
+    "n": "hj",
+    "o": "l",
+    "p": "p",
+    "q": "a",
+    "r": "f",
+    "s": "wxz",
+    "t": "gf",
+    "u": "j",
+    "v": "fg",
+    "w": "s",
+    "x": "sd",
+    "y": "h",
+    "z": "as",
+}
+
 # ---------------------------------------------------------------
 ocr_rules_file = "lib_ocr_rules.txt"
 phonetic_rules_file = "lib_phonetic_rules.txt"
@@ -28,7 +106,7 @@ phonetic_rules_file = "lib_phonetic_rules.txt"
 # Functions used by the main program come here
 
 
-def error_position(input_string, len_offset):
+def error_position(input_string, len_offset, rng=random):
     """A function that randomly calculates an error position within the given
      input string and returns the position as integer number 0 or larger.
 
@@ -39,6 +117,9 @@ def error_position(input_string, len_offset):
      Errors do not likely appear at the beginning of a word, so a gauss random
      distribution is used with the mean being one position behind half the
      string length (and standard deviation 1.0)
+
+     The random numbers are drawn from 'rng' (a 'random.Random' instance,
+     default the global generator of the random module).
   """
 
     str_len = len(input_string)
@@ -49,7 +130,7 @@ def error_position(input_string, len_offset):
 
     mid_pos = (str_len + len_offset) / 2 + 1
 
-    random_pos = random.gauss(float(mid_pos), 1.0)
+    random_pos = rng.gauss(float(mid_pos), 1.0)
     random_pos = max(0, int(round(random_pos)))  # Make it integer and 0 or larger
 
     return min(random_pos, max_return_pos)
@@ -58,141 +139,77 @@ def error_position(input_string, len_offset):
 # -----------------------------------------------------------------------------
 
 
-def error_character(input_char, char_range):
+def error_character(input_char, char_range, rng=random, typo_prob=None):
     """A function which returns a character created randomly. It uses row and
-     column keyboard dictionaires.
+     column keyboard dictionaires. The random numbers are drawn from 'rng'.
+
+     'typo_prob' is a dictionary with the probabilities of a neighbouring key
+     in the "same_row" and "same_col" (default 'single_typo_prob'). Characters
+     without neighbouring keys (for example letters with accents) are replaced
+     by a randomly chosen character of the range.
   """
 
-    # Keyboard substitutions gives two dictionaries with the neigbouring keys for
-    # all letters both for rows and columns (based on ideas implemented by
-    # Mauricio A. Hernandez in his dbgen).
-    #
-    rows = {
-        "a": "s",
-        "b": "vn",
-        "c": "xv",
-        "d": "sf",
-        "e": "wr",
-        "f": "dg",
-        "g": "fh",
-        "h": "gj",
-        "i": "uo",
-        "j": "hk",
-        "k": "jl",
-        "l": "k",
-        "m": "n",
-        "n": "bm",
-        "o": "ip",
-        "p": "o",
-        "q": "w",
-        "r": "et",
-        "s": "ad",
-        "t": "ry",
-        "u": "yi",
-        "v": "cb",
-        "w": "qe",
-        "x": "zc",
-        "y": "tu",
-        "z": "x",
-        "1": "2",
-        "2": "13",
-        "3": "24",
-        "4": "35",
-        "5": "46",
-        "6": "57",
-        "7": "68",
-        "8": "79",
-        "9": "80",
-        "0": "9",
-    }
-
-    cols = {
-        "a": "qzw",
-        "b": "gh",
-        "c": "df",
-        "d": "erc",
-        "e": "d",
-        "f": "rvc",
-        "g": "tbv",
-        "h": "ybn",
-        "i": "k",
-        "j": "umn",
-        "k": "im",
-        "l": "o",
-        "m": "jk",
-        "n": "hj",
-        "o": "l",
-        "p": "p",
-        "q": "a",
-        "r": "f",
-        "s": "wxz",
-        "t": "gf",
-        "u": "j",
-        "v": "fg",
-        "w": "s",
-        "x": "sd",
-        "y": "h",
-        "z": "as",
-    }
-
-    rand_num = random.random()  # Create a random number between 0 and 1
+    if typo_prob is None:
+        typo_prob = single_typo_prob
+
+    rand_num = rng.random()  # Create a random number between 0 and 1
 
     if char_range == "digit":
 
         # A randomly chosen neigbouring key in the same keyboard row
         #
-        if (input_char.isdigit()) and (rand_num <= single_typo_prob["same_row"]):
-            output_char = random.choice(rows[input_char])
+        if (input_char in string.digits) and (rand_num <= typo_prob["same_row"]):
+            output_char = rng.choice(keyboard_rows[input_char])
         else:
             choice_str = str.replace(string.digits, input_char, "")
-            output_char = random.choice(choice_str)  # A randomly choosen digit
+            output_char = rng.choice(choice_str)  # A randomly choosen digit
 
     elif char_range == "alpha":
 
+        is_letter = input_char in keyboard_cols  # All lower case letters
+
         # A randomly chosen neigbouring key in the same keyboard row
         #
-        if (input_char.isalpha()) and (rand_num <= single_typo_prob["same_row"]):
-            output_char = random.choice(rows[input_char])
+        if is_letter and (rand_num <= typo_prob["same_row"]):
+            output_char = rng.choice(keyboard_rows[input_char])
 
         # A randomly chosen neigbouring key in the same keyboard column
         #
-        elif (input_char.isalpha()) and (
-            rand_num <= (single_typo_prob["same_row"] + single_typo_prob["same_col"])
-        ):
-            output_char = random.choice(cols[input_char])
+        elif is_letter and (rand_num <= (typo_prob["same_row"] + typo_prob["same_col"])):
+            output_char = rng.choice(keyboard_cols[input_char])
         else:
             choice_str = str.replace(string.ascii_lowercase, input_char, "")
-            output_char = random.choice(choice_str)  # A randomly choosen letter
+            output_char = rng.choice(choice_str)  # A randomly choosen letter
 
     else:  # Both letters and digits possible
 
         # A randomly chosen neigbouring key in the same keyboard row
         #
-        if rand_num <= single_typo_prob["same_row"]:
-            if input_char in rows:
-                output_char = random.choice(rows[input_char])
+        if rand_num <= typo_prob["same_row"]:
+            if input_char in keyboard_rows:
+                output_char = rng.choice(keyboard_rows[input_char])
             else:
                 choice_str = str.replace(
                     string.ascii_lowercase + string.digits, input_char, ""
                 )
-                output_char = random.choice(choice_str)  # A randomly choosen character
+                output_char = rng.choice(choice_str)  # A randomly choosen character
 
         # A randomly chosen neigbouring key in the same keyboard column
         #
-        elif rand_num <= (single_typo_prob["same_row"] + single_typo_prob["same_col"]):
-            if input_char in cols:
-                output_char = random.choice(cols[input_char])
+        elif rand_num <= (typo_prob["same_row"] + typo_prob["same_col"]):
+            if input_char in keyboard_cols:
+                output_char = rng.choice(keyboard_cols[input_char])
             else:
                 choice_str = str.replace(
                     string.ascii_lowercase + string.digits, input_char, ""
                 )
-                output_char = random.choice(choice_str)  # A randomly choosen character
+                output_char = rng.choice(choice_str)  # A randomly choosen character
 
         else:
             choice_str = str.replace(
                 string.ascii_lowercase + string.digits, input_char, ""
             )
-            output_char = random.choice(choice_str)  # A randomly choosen character
+            output_char = rng.choice(choice_str)  # A randomly choosen character
 
     return output_char
 
@@ -417,6 +434,340 @@ def date_to_epoch(day, month, year):
 # -----------------------------------------------------------------------------
 
 
+def build_alias_table(weights):
+    """Build the tables for Walker's alias method (Vose's variant) for the
+     given list of non-negative weights.
+
+     Returns a list of acceptance probabilities and a list of alias indices,
+     both of the same length as the weights list.
+  """
+
+    num_weights = len(weights)
+    weight_sum = float(sum(weights))
+
+    if (num_weights == 0) or (weight_sum <= 0.0):
+        raise ValueError("Weights must contain at least one positive value")
+
+    prob = [w * num_weights / weight_sum for w in weights]
+    alias = list(range(num_weights))
+
+    small = [i for i in range(num_weights) if prob[i] < 1.0]
+    large = [i for i in range(num_weights) if prob[i] >= 1.0]
+
+    while small and large:
+        s = small.pop()
+        l = large.pop()
+
+        alias[s] = l
+        prob[l] = (prob[l] + prob[s]) - 1.0
+
+        if prob[l] < 1.0:
+            small.append(l)
+        else:
+            large.append(l)
+
+    for i in large + small:  # Only rounding errors left
+        prob[i] = 1.0
+
+    return prob, alias
+
+
+# -----------------------------------------------------------------------------
+
+
+class DiscreteSampler:
+    """Randomly select values according to a discrete probability distribution.
+
+     Values are selected with Walker's alias method, so each selection is
+     O(1) whatever the number of values (and 'sample_array' selects many
+     values at once with NumPy).
+
+     The distribution is also available in the list form used by
+     'random_select' ('prob_list', tuples of value and cumulative
+     probability of all previous values).
+  """
+
+    def __init__(self, values, probs):
+        if len(values) != len(probs):
+            raise ValueError("Number of values and probabilities differ")
+
+        self.values = list(values)
+
+        prob, alias = build_alias_table(probs)
+        self.prob = array.array("d", prob)
+        self.alias = array.array("q", alias)
+
+        self._prob_list = None  # List form of the distribution, created on demand
+        self._value_array = None  # NumPy array of the values, created on demand
+
+    @classmethod
+    def from_prob_list(cls, prob_list):
+        """Create a sampler from a list of tuples of value and cumulative
+       probability (as used by 'random_select'). The last value has the
+       remaining probability up to 1.0.
+    """
+
+        probs = []
+        for i in range(len(prob_list) - 1):
+            probs.append(max(0.0, prob_list[i + 1][1] - prob_list[i][1]))
+        probs.append(max(0.0, 1.0 - prob_list[-1][1]))
+
+        sampler = cls([value for (value, cum_prob) in prob_list], probs)
+        sampler._prob_list = list(prob_list)
+
+        return sampler
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def prob_list(self):
+        """The distribution as list of tuples of value and cumulative
+       probability (recovered from the alias table if not given).
+    """
+
+        if self._prob_list is None:
+            num_values = len(self.values)
+            probs = [p / num_values for p in self.prob]
+            for i in range(num_values):
+                probs[self.alias[i]] += (1.0 - self.prob[i]) / num_values
+
+            self._prob_list = []
+            prob_sum = 0.0
+            for (value, p) in zip(self.values, probs):
+                self._prob_list.append((value, prob_sum))
+                prob_sum += p
+
+        return self._prob_list
+
+    def sample(self, rng=random):
+        """Return one randomly selected value, using the random numbers of
+       'rng' (a 'random.Random' instance).
+    """
+
+        i = int(rng.random() * len(self.values))
+        if rng.random() < self.prob[i]:
+            return self.values[i]
+        return self.values[self.alias[i]]
+
+    def sample_array(self, num, rng):
+        """Return a NumPy object array with 'num' randomly selected values,
+       drawn with the given 'numpy.random.Generator'.
+    """
+
+        if self._value_array is None:
+            self._value_array = numpy.empty(len(self.values), dtype=object)
+            self._value_array[:] = self.values
+
+        return self._value_array[self.sample_indices(num, rng)]
+
+    def sample_indices(self, num, rng):
+        """Return a NumPy array with the indices (in 'values') of 'num'
+       randomly selected values, drawn with the given
+       'numpy.random.Generator'.
+    """
+
+        i = rng.integers(0, len(self.values), num)
+        accept = rng.random(num) < numpy.frombuffer(self.prob, dtype=numpy.float64)[i]
+
+        return numpy.where(accept, i, numpy.frombuffer(self.alias, dtype=numpy.int64)[i])
+
+
+# -----------------------------------------------------------------------------
+
+
+class FrequencySampler(DiscreteSampler):
+    """Randomly select values according to their frequencies.
+
+     Only the distinct values are stored (together with an alias table), so
+     the memory needed is proportional to the number of distinct values and
+     not to the sum of their frequencies. Each selection is O(1).
+  """
+
+    def __init__(self, values, freqs):
+        if len(values) != len(freqs):
+            raise ValueError("Number of values and frequencies differ")
+
+        self.freqs = array.array("q", freqs)
+        self.total = sum(self.freqs)
+
+        DiscreteSampler.__init__(self, values, self.freqs)
+
+    @classmethod
+    def from_alias_table(cls, values, freqs, prob, alias):
+        """Create a sampler from its values, frequencies and an alias table
+       built before (for example by a sampler with the same frequencies), as
+       sequences or NumPy arrays.
+    """
+
+        sampler = cls.__new__(cls)
+        sampler.values = list(values)
+        sampler.freqs = array.array("q", numpy.asarray(freqs, dtype=numpy.int64).tobytes())
+        sampler.total = sum(sampler.freqs)
+        sampler.prob = array.array("d", numpy.asarray(prob, dtype=numpy.float64).tobytes())
+        sampler.alias = array.array("q", numpy.asarray(alias, dtype=numpy.int64).tobytes())
+
+        num_values = len(sampler.values)
+        if not (num_values == len(sampler.freqs) == len(sampler.prob) == len(sampler.alias)):
+            raise ValueError("Number of values, frequencies and alias table entries differ")
+
+        sampler._prob_list = None
+        sampler._value_array = None
+
+        return sampler
+
+
+# -----------------------------------------------------------------------------
+
+
+class DynamicSampler:
+    """Randomly select values according to weights, where values can be
+     removed (their weight set to zero) between selections.
+
+     The weights are held in a Fenwick tree (binary indexed tree) of their
+     partial sums, so each selection and each removal is O(log k) for k
+     values, and the remaining weights are renormalized implicitly. 'reset'
+     restores all the values (and their initial weights) in O(k).
+  """
+
+    def __init__(self, values, weights):
+        if len(values) != len(weights):
+            raise ValueError("Number of values and weights differ")
+
+        self.values = list(values)
+        num_values = len(self.values)
+
+        self._init_weights = [float(w) for w in weights]
+        self._init_tree = [0.0] * (num_values + 1)
+        for j in range(1, num_values + 1):
+            self._init_tree[j] += self._init_weights[j - 1]
+            parent = j + (j & -j)
+            if parent <= num_values:
+                self._init_tree[parent] += self._init_tree[j]
+
+        self._init_num_left = sum(w > 0.0 for w in self._init_weights)
+        self._init_total = sum(self._init_weights)
+
+        self._top_step = 1  # Largest power of two not larger than k
+        while self._top_step * 2 <= num_values:
+            self._top_step *= 2
+
+        self.reset()
+
+    def __len__(self):
+        return len(self.values)
+
+    def reset(self):
+        """Restore all values with their initial weights."""
+
+        self.weights = self._init_weights[:]
+        self._tree = self._init_tree[:]
+        self._total = self._init_total
+        self.num_left = self._init_num_left  # Number of values with a weight
+
+    def remove(self, i):
+        """Remove the value with index 'i' (set its weight to zero)."""
+
+        weight = self.weights[i]
+        if weight > 0.0:
+            self.weights[i] = 0.0
+            self._total -= weight
+            self.num_left -= 1
+
+            tree = self._tree
+            j = i + 1
+            while j < len(tree):
+                tree[j] -= weight
+                j += j & -j
+
+    def total(self):
+        """Return the sum of the weights of the values not removed."""
+
+        return self._total
+
+    def sample_index(self, rng=random):
+        """Return the index of one randomly selected value (of the values not
+       removed), using the random numbers of 'rng' (a 'random.Random'
+       instance).
+    """
+
+        if self.num_left == 0:
+            raise ValueError("All values have been removed")
+
+        tree = self._tree
+        num_values = len(tree) - 1
+        rand_weight = rng.random() * self._total
+
+        # Descend the tree to the first value with a partial sum larger
+        # than the random weight
+        #
+        i = 0
+        step = self._top_step
+        while step > 0:
+            j = i + step
+            if (j <= num_values) and (tree[j] <= rand_weight):
+                i = j
+                rand_weight -= tree[j]
+            step >>= 1
+
+        # Rounding errors of the partial sums can end on a removed value,
+        # then the closest value not removed is taken
+        #
+        if (i >= num_values) or (self.weights[i] <= 0.0):
+            left = [j for j, w in enumerate(self.weights) if w > 0.0]
+            i = min(left, key=lambda j: abs(j - i))
+
+        return i
+
+    def sample(self, rng=random):
+        """Return one randomly selected value (of the values not removed)."""
+
+        return self.values[self.sample_index(rng)]
+
+
+# -----------------------------------------------------------------------------
+
+
+def load_frequency_file(freq_file_name):
+    """Load a frequency file with lines of the form 'value,frequency'.
+
+     Returns a FrequencySampler with the distinct values of the file (the
+     frequencies of repeated values are added up).
+  """
+
+    try:
+        f = open(freq_file_name, "r")
+    except:
+        print("  Error: Can not open frequency file %s" % (freq_file_name))
+        raise IOError
+
+    freq_dict = {}  # Keeps the order of the values in the file
+
+    for line in f:
+        line = line.strip()
+        line_list = line.split(",")
+        if len(line_list) != 2:
+            f.close()
+            print(
+                "  Error: Illegal format in  frequency file %s: %s"
+                % (freq_file_name, line)
+            )
+            raise Exception
+
+        line_val = line_list[0].strip()
+        line_freq = int(line_list[1])
+
+        if line_freq > 0:
+            freq_dict[line_val] = freq_dict.get(line_val, 0) + line_freq
+
+    f.close()
+
+    return FrequencySampler(list(freq_dict.keys()), list(freq_dict.values()))
+
+
+# -----------------------------------------------------------------------------
+
+
 def load_misspellings_dict(misspellings_file_name):
     """Load a look-up table containing misspellings for common words, which can
      be used to introduce realistic errors.
@@ -527,7 +878,7 @@ def load_misspellings_dict(misspellings_file_name):
     # Now convert all sets into lists - - - - - - - - - - - - - - - - - - - - -
     #
     for k in misspell_dict:
-        misspell_dict[k] = list(misspell_dict[k])
+        misspell_dict[k] = sorted(misspell_dict[k])  # Same order in all processes
 
     # print '  Length of misspellings dictionary: %d' % (len(misspell_dict))
 
@@ -641,7 +992,7 @@ def load_lookup_dict(dict_file_name):
     # Now convert all sets into lists - - - - - - - - - - - - - - - - - - - - -
     #
     for k in lookup_dict:
-        lookup_dict[k] = list(lookup_dict[k])
+        lookup_dict[k] = sorted(lookup_dict[k])  # Same order in all processes
 
     return lookup_dict
 
@@ -649,12 +1000,12 @@ def load_lookup_dict(dict_file_name):
 # -----------------------------------------------------------------------------
 
 
-def random_select(prob_dist_list):
+def random_select(prob_dist_list, rng=random):
     """Randomly select one of the list entries (tuples of value and probability
-     values).
+     values), using the random numbers of 'rng'.
   """
 
-    rand_num = random.random()  # Random number between 0.0 and 1.0
+    rand_num = rng.random()  # Random number between 0.0 and 1.0
 
     ind = -1
     while prob_dist_list[ind][1] > rand_num:
@@ -663,12 +1014,251 @@ def random_select(prob_dist_list):
     return prob_dist_list[ind][0]
 
 
+# -----------------------------------------------------------------------------
+
+
+def record_id(org_num, dup_num=-1):
+    """Return the identifier string of duplicate 'dup_num' of original record
+     'org_num' ("rec-5-dup-1"), or of the original record itself if
+     'dup_num' is -1 ("rec-5-org").
+  """
+
+    if dup_num < 0:
+        return "rec-%i-org" % (org_num)
+    return "rec-%i-dup-%i" % (org_num, dup_num)
+
+
+# -----------------------------------------------------------------------------
+
+
+def record_ids(org_nums, dup_nums):
+    """Return the list of identifier strings (see 'record_id') of the records
+     with the integer-coded identifiers 'org_nums' and 'dup_nums'.
+  """
+
+    return [
+        "rec-%i-dup-%i" % (org_num, dup_num)
+        if dup_num >= 0
+        else "rec-%i-org" % (org_num)
+        for org_num, dup_num in zip(
+            numpy.asarray(org_nums).tolist(), numpy.asarray(dup_nums).tolist()
+        )
+    ]
+
+
+# -----------------------------------------------------------------------------
+
+
+def parse_record_ids(rec_ids):
+    """Return the integer-coded identifiers (arrays of original record numbers
+     and duplicate numbers, -1 for original records) of a sequence of record
+     identifier strings.
+  """
+
+    # "rec-N-org" or "rec-N-dup-D" (sliced, without creating a list of parts
+    # for each identifier)
+    #
+    org_nums = numpy.array(
+        [int(rec_id[4 : rec_id.index("-", 4)]) for rec_id in rec_ids],
+        dtype=numpy.int64,
+    )
+    dup_nums = numpy.array(
+        [
+            -1 if rec_id.endswith("-org") else int(rec_id[rec_id.rindex("-") + 1 :])
+            for rec_id in rec_ids
+        ],
+        dtype=numpy.int64,
+    )
+
+    return org_nums, dup_nums
+
+
+# -----------------------------------------------------------------------------
+
+
+def group_pairs(keys):
+    """Return all pairs of positions in the integer array 'keys' with the same
+     key, as two arrays of the first and the second position of each pair (the
+     first position is always the smaller one).
+
+     The keys are sorted, and each position is paired with the ones 'offset'
+     positions further in the sorted keys, for increasing offsets until no
+     keys are equal any more (so the groups should be small).
+  """
+
+    keys = numpy.asarray(keys)
+    order = numpy.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+
+    first_pos = [numpy.empty(0, dtype=numpy.int64)]
+    second_pos = [numpy.empty(0, dtype=numpy.int64)]
+
+    offset = 1
+    while offset < len(keys):
+        same = sorted_keys[offset:] == sorted_keys[:-offset]
+        if not same.any():
+            break
+        first_pos.append(order[:-offset][same])
+        second_pos.append(order[offset:][same])
+        offset += 1
+
+    return numpy.concatenate(first_pos), numpy.concatenate(second_pos)
+
+
+# -----------------------------------------------------------------------------
+
+
+def true_link_pairs(org_nums, dup_nums):
+    """Return all true links (pairs of records created from the same original
+     record) given the number of the original record and the number of the
+     duplicate of each duplicate (NumPy integer arrays).
+
+     Each link is coded by the number of the original record and the numbers
+     of the duplicates of the two records, with -1 for the original record
+     itself (so 'rec-5-org' with 'rec-5-dup-1' is (5, -1, 1), and
+     'rec-5-dup-0' with 'rec-5-dup-1' is (5, 0, 1)). The three arrays of the
+     links are returned, sorted by original record.
+  """
+
+    org_nums = numpy.asarray(org_nums, dtype=numpy.int64)
+    dup_nums = numpy.asarray(dup_nums, dtype=numpy.int64)
+
+    order = numpy.lexsort((dup_nums, org_nums))
+    org_nums = org_nums[order]
+    dup_nums = dup_nums[order]
+
+    # Links between the duplicates of the same original record (in the sorted
+    # arrays, the first one has the smaller duplicate number)
+    #
+    first_pos, second_pos = group_pairs(org_nums)
+
+    # and links between the original record and each of its duplicates
+    #
+    link_org = numpy.concatenate([org_nums, org_nums[first_pos]])
+    link_a = numpy.concatenate(
+        [numpy.full(len(org_nums), -1, dtype=numpy.int64), dup_nums[first_pos]]
+    )
+    link_b = numpy.concatenate([dup_nums, dup_nums[second_pos]])
+
+    order = numpy.lexsort((link_b, link_a, link_org))
+
+    return link_org[order], link_a[order], link_b[order]
+
+
 # =============================================================================
 # Functions for phonetic and OCR transformation
 # Agus Pudjijono, 2008
 
 
+def rules_file_name(t):
+    """Return the name of the rule file for the modification type 't' (one of
+     'pho' or 'ocr').
+  """
+
+    this_dir, this_filename = os.path.split(__file__)
+
+    if t == "pho":
+        return os.path.join(this_dir, "config", phonetic_rules_file)
+    elif t == "ocr":
+        return os.path.join(this_dir, "config", ocr_rules_file)
+
+    raise ValueError('Illegal transformation type "%s", must be "pho" or "ocr"' % (t))
+
+
+# -----------------------------------------------------------------------------
+
+
+def get_transformation_changes(s, t):
+    """Return the list of candidate changes ('orgpat>newpat>where') of type
+     't' for the string 's', using the compiled rules of the corresponding
+     rule file. If no rule applies the list contains one empty string, for
+     an empty string an empty list is returned.
+  """
+
+    return rules.load_rule_set(rules_file_name(t)).changes(s)
+
+
+# -----------------------------------------------------------------------------
+
+
+class TransformationCache:
+    """A bounded least recently used (LRU) cache for the candidate changes
+     returned by 'get_transformation_changes', keyed by (value, type).
+
+     The cached lists are shared between calls and must not be modified. A
+     'max_size' of 0 disables the cache.
+  """
+
+    def __init__(self, max_size=10000):
+        if max_size < 0:
+            raise ValueError("Cache size must be zero or positive")
+
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._cache = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._cache)
+
+    def get_changes(self, s, t):
+        """Return the list of candidate changes of type 't' for 's'.
+    """
+
+        key = (s, t)
+        cache = self._cache
+
+        changes = cache.get(key)
+        if changes is not None:
+            self.hits += 1
+            cache.move_to_end(key)
+            return changes
+
+        self.misses += 1
+        changes = get_transformation_changes(s, t)
+
+        if self.max_size > 0:
+            cache[key] = changes
+            if len(cache) > self.max_size:
+                cache.popitem(last=False)  # Remove least recently used entry
+                self.evictions += 1
+
+        return changes
+
+    def info(self):
+        """Return a dictionary with the cache counters.
+    """
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._cache),
+            "max_size": self.max_size,
+        }
+
+
+# -----------------------------------------------------------------------------
+
+
 def get_transformation(s, t):
+    """Return a string 'workstr,changes' with all the phonetic ('pho') or OCR
+     ('ocr') changes that can be applied to 's', separated by ';'.
+  """
+
+    return rules.load_rule_set(rules_file_name(t)).transform(s)
+
+
+# -----------------------------------------------------------------------------
+
+
+def _get_transformation_scan(s, t):
+    """Reference implementation of 'get_transformation' which re-reads the
+     rule file and scans all rules for each call. Only used to check and
+     benchmark the compiled rules.
+  """
+
     if s == "":
         return s
 
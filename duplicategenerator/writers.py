@@ -0,0 +1,244 @@
+"""Writers of generated records into output files, chunk by chunk.
+
+Each writer consumes the chunks of 'DuplicateGen.generate_iter' in the
+output type given by its 'output' attribute, and writes them incrementally
+(the whole dataset is never kept in memory):
+
+  csv      Comma separated values (from dataframes, with a header line).
+  jsonl    One JSON object per record and line (missing values omitted).
+  parquet  Apache Parquet file, one row group per chunk.
+  arrow    Apache Arrow IPC stream, one record batch per chunk.
+
+The Parquet and Arrow writers need the optional 'pyarrow' package. In the
+Arrow tables, the columns of frequency fields with few distinct values (like
+'culture', 'sex' or 'state') are dictionary-encoded.
+
+The same writers also write the true links (see 'utils.true_link_pairs'),
+integer-coded with the columns 'org_num', 'dup_num_a' and 'dup_num_b'.
+"""
+
+import json
+
+import pandas
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # Only needed for the "arrow" and "parquet" formats
+    pyarrow = None
+
+# Names of the available file formats
+#
+formats = ["csv", "jsonl", "parquet", "arrow"]
+
+# Maximal number of distinct values of a frequency field for its column to be
+# dictionary-encoded in Arrow tables
+#
+max_dictionary_size = 100
+
+# Columns of the true links: number of the original record and numbers of the
+# duplicates of the two linked records (-1 for the original record itself)
+#
+link_columns = ["org_num", "dup_num_a", "dup_num_b"]
+
+
+# =============================================================================
+
+
+def check_pyarrow():
+    """Raise an ImportError if the optional 'pyarrow' package is not available.
+  """
+
+    if pyarrow is None:
+        raise ImportError(
+            'The "arrow" and "parquet" formats need the "pyarrow" package'
+        )
+
+
+# -----------------------------------------------------------------------------
+
+
+def records_to_arrow(records, columns, dictionary_columns=(), rec_ids=None):
+    """Convert a list of record dictionaries into an Arrow table with the given
+     string columns (missing values are null). The columns in
+     'dictionary_columns' are dictionary-encoded. If the list of record
+     identifiers 'rec_ids' is given, it is the first column ("rec_id").
+  """
+
+    check_pyarrow()
+
+    arrays = []
+    if rec_ids is not None:
+        arrays.append(pyarrow.array(rec_ids, type=pyarrow.string()))
+        columns = ["rec_id"] + list(columns)
+
+    for column in columns[len(arrays):]:
+        array = pyarrow.array(
+            [rec_dict.get(column) for rec_dict in records], type=pyarrow.string()
+        )
+        if column in dictionary_columns:
+            array = array.dictionary_encode()
+        arrays.append(array)
+
+    return pyarrow.Table.from_arrays(arrays, names=list(columns))
+
+
+# -----------------------------------------------------------------------------
+
+
+def format_true_links(link_pairs, output):
+    """Convert the three arrays of true links returned by
+     'utils.true_link_pairs' into the given output type: a list of
+     dictionaries ("list"), a dataframe indexed by 'org_num' ("dataframe") or
+     an Arrow table ("arrow").
+  """
+
+    columns = dict(zip(link_columns, link_pairs))
+
+    if output == "list":
+        return [
+            dict(zip(link_columns, link))
+            for link in zip(*[column.tolist() for column in link_pairs])
+        ]
+    elif output == "dataframe":
+        return pandas.DataFrame(columns).set_index(link_columns[0])
+    elif output == "arrow":
+        check_pyarrow()
+        return pyarrow.table(
+            {name: pyarrow.array(column, type=pyarrow.int64())
+             for name, column in columns.items()}
+        )
+
+    raise ValueError(
+        'Illegal output type must be one of: "dataframe", "arrow" or "list"'
+    )
+
+
+# -----------------------------------------------------------------------------
+
+
+def open_writer(file_name, file_format):
+    """Return a writer for the given file format (one of 'formats')."""
+
+    if file_format == "csv":
+        return CsvWriter(file_name)
+    elif file_format == "jsonl":
+        return JsonlWriter(file_name)
+    elif file_format == "parquet":
+        return ParquetWriter(file_name)
+    elif file_format == "arrow":
+        return ArrowWriter(file_name)
+
+    raise ValueError(
+        'Illegal file format must be one of: "csv", "jsonl", "parquet" or "arrow"'
+    )
+
+
+# =============================================================================
+
+
+class RecordWriter:
+    """Base class of the writers: 'write' one chunk at a time, and 'close' the
+     file at the end (or use the writer as context manager).
+  """
+
+    output = None  # Output type of the chunks consumed by the writer
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self.num_chunks = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, records):
+        self._write(records)
+        self.num_chunks += 1
+
+    def _write(self, records):
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+
+# -----------------------------------------------------------------------------
+
+
+class CsvWriter(RecordWriter):
+
+    output = "dataframe"
+
+    def __init__(self, file_name):
+        RecordWriter.__init__(self, file_name)
+        self.file = open(file_name, "w", newline="")
+
+    def _write(self, records):
+        records.to_csv(self.file, header=(self.num_chunks == 0))
+
+    def close(self):
+        self.file.close()
+
+
+class JsonlWriter(RecordWriter):
+
+    output = "list"
+
+    def __init__(self, file_name):
+        RecordWriter.__init__(self, file_name)
+        self.file = open(file_name, "w", encoding="utf-8")
+
+    def _write(self, records):
+        self.file.writelines(
+            [json.dumps(rec_dict, ensure_ascii=False) + "\n" for rec_dict in records]
+        )
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter(RecordWriter):
+    """The file is opened with the schema of the first chunk."""
+
+    output = "arrow"
+
+    def __init__(self, file_name):
+        check_pyarrow()
+        RecordWriter.__init__(self, file_name)
+        self.writer = None
+
+    def _write(self, records):
+        if self.writer is None:
+            self.writer = pyarrow.parquet.ParquetWriter(self.file_name, records.schema)
+        self.writer.write_table(records)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+class ArrowWriter(RecordWriter):
+    """Arrow IPC stream format, as the dictionaries of the dictionary-encoded
+     columns differ between the chunks (which the IPC file format does not
+     allow).
+  """
+
+    output = "arrow"
+
+    def __init__(self, file_name):
+        check_pyarrow()
+        RecordWriter.__init__(self, file_name)
+        self.writer = None
+
+    def _write(self, records):
+        if self.writer is None:
+            self.writer = pyarrow.ipc.new_stream(self.file_name, records.schema)
+        self.writer.write_table(records)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
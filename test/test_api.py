@@ -6,6 +6,11 @@ import sys
 import pandas
 import numpy
 import json
+import math
+import concurrent.futures
+import contextlib
+import io
+import tempfile
 
 import unittest
 import duplicategenerator
@@ -143,5 +148,290 @@ class DuplicateGenTests(unittest.TestCase):
             field_names_prob = {'culture' : 0,'sex': 0.1,'given_name':0.3,'surname':0.3, 'date_of_birth':0.2,'phone_number':0.1}
         ).generate("dataframe").index), 20)          
 
+    # Test if the transformation cache counters are set by generate
+    def test_transformation_cache_info(self):
+        dupgen = duplicategenerator.DuplicateGen(
+            num_org_records = 50,
+            num_dup_records = 50,
+            max_num_dups = 1,
+            max_num_field_modifi= 1,
+            max_num_record_modifi= 1,
+            prob_distribution = "uniform",
+            type_modification= "pho",
+            transformation_cache_size = 5
+        )
+        self.assertIsNone(dupgen.transformation_cache_info)
+        dupgen.generate()
+        cache_info = dupgen.transformation_cache_info
+        self.assertEqual(cache_info["max_size"], 5)
+        self.assertLessEqual(cache_info["size"], 5)
+        self.assertGreater(cache_info["hits"] + cache_info["misses"], 0)
+
+    # Test if an error is raised when the transformation cache size is negative
+    def test_validate_transformation_cache_size(self):
+        with self.assertRaises(ValueError):
+            duplicategenerator.DuplicateGen(
+            num_org_records = 10,
+            num_dup_records = 10,
+            max_num_dups = 1,
+            max_num_field_modifi= 1,
+            max_num_record_modifi= 1,
+            prob_distribution = "uniform",
+            type_modification= "all",
+            transformation_cache_size = -1
+        )
+
+    # Test if generate_iter returns self-contained chunks of records
+    def test_generate_iter(self):
+        dupgen = duplicategenerator.DuplicateGen(
+            num_org_records = 25,
+            num_dup_records = 10,
+            max_num_dups = 1,
+            max_num_field_modifi= 1,
+            max_num_record_modifi= 1,
+            prob_distribution = "uniform",
+            type_modification= "typ"
+        )
+        chunks = list(dupgen.generate_iter(chunk_size = 10))
+        self.assertEqual([len(chunk) for chunk in chunks], [14, 14, 7])
+
+        for chunk in chunks:
+            self.assertIsInstance(chunk, list)
+            chunk_ids = set(rec_dict["rec_id"] for rec_dict in chunk)
+            for rec_id in chunk_ids:
+                if "-dup-" in rec_id:
+                    self.assertIn(rec_id.split("-dup-")[0] + "-org", chunk_ids)
+
+        df_chunks = list(dupgen.generate_iter(chunk_size = 10, output = "dataframe"))
+        self.assertEqual(sum(len(df.index) for df in df_chunks), 35)
+        self.assertEqual(
+            list(df_chunks[0].columns), list(df_chunks[-1].columns)
+        )
+
+    # Test if an error is raised for an unknown output type
+    def test_validate_generate_iter_output(self):
+        dupgen = duplicategenerator.DuplicateGen(
+            num_org_records = 10,
+            num_dup_records = 10,
+            max_num_dups = 1,
+            max_num_field_modifi= 1,
+            max_num_record_modifi= 1,
+            prob_distribution = "uniform",
+            type_modification= "typ"
+        )
+        with self.assertRaises(ValueError):
+            next(dupgen.generate_iter(output = "csv"))
+        with self.assertRaises(ValueError):
+            next(dupgen.generate_iter(chunk_size = 0))
+
+    # Test if an error is raised when there are not enough original records
+    def test_not_enough_original_records(self):
+        with self.assertRaises(ValueError):
+            duplicategenerator.DuplicateGen(
+            num_org_records = 5,
+            num_dup_records = 10,
+            max_num_dups = 1,
+            max_num_field_modifi= 1,
+            max_num_record_modifi= 1,
+            prob_distribution = "uniform",
+            type_modification= "typ"
+        ).generate()
+
+    # Test if an error is raised when no unique duplicate can be created
+    def test_no_unique_duplicates(self):
+        for engine in ["scalar", "numpy"]:
+            dupgen = duplicategenerator.DuplicateGen(
+                20, 20, 1, 1, 1, "uniform", "pho",
+                field_names_prob = {"culture": 0, "date_of_birth": 1.0},
+                engine = engine, seed = 1,
+            )
+            with self.assertRaises(ValueError):
+                dupgen.generate("list")
+
+    # Test if all unique indexes give the requested number of different records
+    def test_unique_index(self):
+        for unique_index in ["hash", "hash-verify", "set"]:
+            df = duplicategenerator.DuplicateGen(
+                num_org_records = 20,
+                num_dup_records = 10,
+                max_num_dups = 1,
+                max_num_field_modifi= 1,
+                max_num_record_modifi= 1,
+                prob_distribution = "uniform",
+                type_modification= "typ",
+                unique_index = unique_index
+            ).generate("dataframe")
+            self.assertEqual(len(df.index), 30)
+            self.assertFalse(df.duplicated().any())
+
+        with self.assertRaises(ValueError):
+            duplicategenerator.DuplicateGen(
+            10, 10, 1, 1, 1, "uniform", "typ", unique_index = "list"
+        )
+
+    # Test if the shards created by worker processes are merged
+    def test_generate_workers(self):
+        dupgen = duplicategenerator.DuplicateGen(
+            num_org_records = 40,
+            num_dup_records = 20,
+            max_num_dups = 1,
+            max_num_field_modifi= 1,
+            max_num_record_modifi= 1,
+            prob_distribution = "uniform",
+            type_modification= "all"
+        )
+        df = dupgen.generate("dataframe", workers = 2)
+        self.assertEqual(len(df.index), 60)
+        self.assertTrue(df.index.is_unique)
+        self.assertFalse(df.duplicated().any())
+        for rec_id in df.index:
+            if "-dup-" in rec_id:
+                self.assertIn(rec_id.split("-dup-")[0] + "-org", df.index)
+
+        with self.assertRaises(ValueError):
+            dupgen.generate(workers = 0)
+
+    # Test if the records removed when merging the shards are created again
+    def test_generate_workers_collisions(self):
+        with open('./duplicategenerator/config/attr_config_file.example.json') as config_file:
+            attr_data = json.load(config_file)
+        attributes = attr_data["attributes"]
+
+        # Few fields with few values, so that the shards create the same records
+        #
+        attr_dict = {
+            "sex": dict(attributes["sex"], select_prob = 0.5),
+            "state": dict(attributes["state"], select_prob = 0.5),
+            "blocking_number": attributes["blocking_number"],
+        }
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            attr_file_name = os.path.join(tmp_dir, "attr_config_file.json")
+            with open(attr_file_name, "w") as config_file:
+                json.dump(
+                    dict(attr_data, attributes = attr_dict, field_swap_prob = {}),
+                    config_file,
+                )
+
+            for engine in ["scalar", "numpy"]:
+                dupgen = duplicategenerator.DuplicateGen(
+                    40, 20, 1, 1, 1, "uniform", "typ",
+                    attr_file_name = attr_file_name, engine = engine, seed = 1,
+                )
+                df = pandas.concat(dupgen.generate_iter(20, "dataframe", workers = 2))
+                self.assertGreater(
+                    dupgen.generation_stats.counters["shard_records_replaced"], 0
+                )
+                self.assertEqual(len(df.index), 60)
+                self.assertEqual(df.index.str.endswith("-org").sum(), 40)
+                self.assertTrue(df.index.is_unique)
+                self.assertFalse(df.duplicated().any())
+                for rec_id in df.index:
+                    if "-dup-" in rec_id:
+                        self.assertIn(rec_id.split("-dup-")[0] + "-org", df.index)
+
+    # Test if records already created in another shard are removed
+    def test_merge_shard_records(self):
+        dupgen = duplicategenerator.DuplicateGen(
+            10, 10, 1, 1, 1, "uniform", "typ"
+        )
+        all_rec_index = duplicategenerator.uniqueness.create_index("hash")
+        all_rec_index.add({"surname": "smith"})
+        records, rec_ids = dupgen._merge_shard_records(
+            [
+                {"surname": "smith"},  # rec-0-org
+                {"surname": "miller"},  # rec-1-org
+                {"surname": "smyth"},  # rec-0-dup-0
+                {"surname": "smith"},  # rec-1-dup-0
+                {"surname": "muller"},  # rec-1-dup-1
+            ],
+            (numpy.array([0, 1, 0, 1, 1]), numpy.array([-1, -1, 0, 0, 1])),
+            all_rec_index,
+        )
+        self.assertEqual(records, [{"surname": "miller"}, {"surname": "muller"}])
+        self.assertEqual(
+            duplicategenerator.utils.record_ids(*rec_ids), ["rec-1-org", "rec-1-dup-1"]
+        )
+
+    # Test if the same seed gives the same dataset
+    def test_seed(self):
+        def generate_csv(seed, engine = "scalar", workers = 1):
+            dupgen = duplicategenerator.DuplicateGen(
+                num_org_records = 30,
+                num_dup_records = 20,
+                max_num_dups = 3,
+                max_num_field_modifi= 2,
+                max_num_record_modifi= 4,
+                prob_distribution = "poi",
+                type_modification= "all",
+                culture = "eng",
+                engine = engine,
+                seed = seed
+            )
+            return dupgen.generate("dataframe", workers = workers).to_csv()
+
+        self.assertEqual(generate_csv(5), generate_csv(5))
+        self.assertNotEqual(generate_csv(5), generate_csv(6))
+        self.assertEqual(generate_csv(5, "numpy"), generate_csv(5, "numpy"))
+        self.assertEqual(generate_csv(5, workers = 2), generate_csv(5, workers = 2))
+
+        with self.assertRaises(ValueError):
+            duplicategenerator.DuplicateGen(
+            10, 10, 1, 1, 1, "uniform", "typ", seed = -1
+        )
+
+    # Test if generators with their own seed can run in threads
+    def test_seed_threads(self):
+        def generate_dict(seed):
+            return duplicategenerator.DuplicateGen(
+                40, 20, 2, 1, 2, "poi", "typ", culture = "eng", seed = seed
+            ).generate()
+
+        expected = [generate_dict(seed) for seed in range(4)]
+        with concurrent.futures.ThreadPoolExecutor(max_workers = 4) as executor:
+            self.assertEqual(list(executor.map(generate_dict, range(4))), expected)
+
+    # Test if the steps and the trace events are logged (and not printed)
+    def test_logging(self):
+        dupgen = duplicategenerator.DuplicateGen(
+            10, 5, 2, 1, 2, "uniform", "typ", culture = "eng", seed = 1
+        )
+        with contextlib.redirect_stdout(io.StringIO()) as stdout:
+            with self.assertLogs("duplicategenerator.generate", "INFO") as logs:
+                dupgen.generate()
+        self.assertEqual(stdout.getvalue(), "")
+        self.assertIn("Step 1", logs.output[2])
+        self.assertFalse(any("Original:" in line for line in logs.output))
+
+        with self.assertLogs("duplicategenerator.generate", "DEBUG") as logs:
+            df = dupgen.generate("dataframe")
+        originals = [line for line in logs.output if "Original:" in line]
+        self.assertEqual(len(originals), 10)
+        self.assertIn(df.index[0], originals[0])
+
+    # Test the closed form distributions of the number of duplicates
+    def test_count_distribution(self):
+        dupgen = duplicategenerator.DuplicateGen(
+            10, 10, 1, 1, 1, "uniform", "typ"
+        )
+
+        prob_list = dupgen._count_distribution("poi", 4, 2.0).prob_list
+        poisson_num = [math.exp(-2.0) * 2.0 ** i / math.factorial(i) for i in range(4)]
+        cum_prob = 0.0
+        for (count, prob), p in zip(prob_list, poisson_num):
+            self.assertAlmostEqual(prob, cum_prob)
+            cum_prob += p / sum(poisson_num)
+        self.assertEqual([count for (count, prob) in prob_list], [1, 2, 3, 4])
+
+        # No overflow for large numbers of duplicates
+        sampler = dupgen._count_distribution("poi", 500, 2.0)
+        self.assertEqual(len(sampler), 500)
+        sampler = dupgen._count_distribution("zip", 500, 2.0)
+        self.assertAlmostEqual(sampler.prob_list[1][1], 1.0 / sum(
+            1.0 / (i + 1) ** 0.5 for i in range(500)
+        ))
+
+        self.assertEqual(dupgen._count_distribution("uniform", 5, 2.0).prob_list, [(1, 0.0)])
+
 if __name__ =="__main__" :
     unittest.main()
\ No newline at end of file
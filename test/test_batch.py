@@ -0,0 +1,202 @@
+import json
+import os
+import tempfile
+import unittest
+
+import numpy
+
+import duplicategenerator
+from duplicategenerator import batch
+from duplicategenerator import utils
+from duplicategenerator import config as cf
+
+
+def total_variation(series_a, series_b):
+    freq_a = series_a.value_counts(normalize=True, dropna=False)
+    freq_b = series_b.value_counts(normalize=True, dropna=False)
+    freq_a, freq_b = freq_a.align(freq_b, fill_value=0.0)
+    return 0.5 * (freq_a - freq_b).abs().sum()
+
+
+def original_records(engine, num_org_records, seed=None):
+    dupgen = duplicategenerator.DuplicateGen(
+        num_org_records=num_org_records,
+        num_dup_records=1,
+        max_num_dups=1,
+        max_num_field_modifi=1,
+        max_num_record_modifi=1,
+        prob_distribution="uniform",
+        type_modification="typ",
+        engine=engine,
+        seed=seed,
+    )
+    df = dupgen.generate("dataframe")
+    return df[df.index.str.endswith("-org")]
+
+
+class BatchEngineTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.df_scalar = original_records("scalar", 20000, seed=7)
+        cls.df_numpy = original_records("numpy", 20000, seed=7)
+
+    def test_validate_engine(self):
+        with self.assertRaises(ValueError):
+            original_records("gpu", 10)
+
+    def test_number_of_records(self):
+        self.assertEqual(len(self.df_numpy), 20000)
+        self.assertTrue(self.df_numpy.index.is_unique)
+        self.assertEqual(
+            sorted(self.df_numpy.columns), sorted(self.df_scalar.columns)
+        )
+
+    def test_missing_values(self):
+        for column in self.df_scalar.columns:
+            self.assertAlmostEqual(
+                self.df_scalar[column].isna().mean(),
+                self.df_numpy[column].isna().mean(),
+                delta=0.025,
+                msg=column,
+            )
+
+    def test_categorical_columns(self):
+        for column in ["culture", "sex", "state"]:
+            self.assertLess(
+                total_variation(self.df_scalar[column], self.df_numpy[column]),
+                0.05,
+                msg=column,
+            )
+
+    def test_name_columns(self):
+        for column in ["given_name", "surname", "address_1"]:
+            self.assertLess(
+                total_variation(
+                    self.df_scalar[column].str[0], self.df_numpy[column].str[0]
+                ),
+                0.05,
+                msg=column,
+            )
+
+    # Given names depend on culture and sex
+    def test_dependent_column(self):
+        this_dir = os.path.dirname(utils.__file__)
+        lookup_dict = utils.load_lookup_dict(
+            os.path.join(this_dir, "data", "givenname-lookup.tbl")
+        )
+
+        def dependency_followed(df):
+            return numpy.mean(
+                [
+                    given_name in lookup_dict.get("%s-%s" % (culture, sex), [])
+                    for culture, sex, given_name in zip(
+                        df["culture"], df["sex"], df["given_name"]
+                    )
+                ]
+            )
+
+        self.assertAlmostEqual(
+            dependency_followed(self.df_scalar),
+            dependency_followed(self.df_numpy),
+            delta=0.02,
+        )
+
+    def test_numeric_columns(self):
+        for column, delta in [
+            ("date_of_birth", 0.01),
+            ("national_identifier", 0.01),
+            ("blocking_number", 0.05),
+        ]:
+            mean_scalar = self.df_scalar[column].dropna().astype(int).mean()
+            mean_numpy = self.df_numpy[column].dropna().astype(int).mean()
+            self.assertAlmostEqual(
+                mean_numpy / mean_scalar, 1.0, delta=delta, msg=column
+            )
+
+    def test_phone_column(self):
+        self.assertLess(
+            total_variation(
+                self.df_scalar["phone_number"].str.len(),
+                self.df_numpy["phone_number"].str.len(),
+            ),
+            0.04,
+        )
+
+    def test_epochs_to_iso(self):
+        epochs = [-200000, 0, 37734, utils.date_to_epoch(29, 2, 2000)]
+        self.assertEqual(
+            batch.epochs_to_iso(epochs).tolist(),
+            [
+                "".join(reversed(utils.epoch_to_date(daynum)))
+                for daynum in epochs
+            ],
+        )
+
+    def test_create_columns(self):
+        dupgen = duplicategenerator.DuplicateGen(
+            10, 10, 1, 1, 1, "uniform", "typ", culture="eng", engine="numpy"
+        )
+        batch_gen = batch.OriginalBatchGenerator(
+            dupgen.field_list,
+            dupgen._load_frequency_lookup_tables(),
+            "eng",
+            numpy.random.default_rng(1),
+        )
+        columns = batch_gen.create_columns(100)
+        self.assertEqual(list(columns), [f["name"] for f in dupgen.field_list])
+        self.assertEqual(set(columns["culture"].tolist()), {"eng"})
+        for column in columns.values():
+            self.assertEqual(len(column), 100)
+
+
+class AgeDependencyTests(unittest.TestCase):
+
+    # The year of birth follows the age (which is sometimes drawn again,
+    # breaking the dependency) in the same way in both engines
+    def test_age_year_agreement(self):
+        this_dir = os.path.dirname(utils.__file__)
+        with open(
+            os.path.join(this_dir, "config", "attr_config_file.example.json")
+        ) as config_file:
+            attr_data = json.load(config_file)
+        attributes = attr_data["attributes"]
+
+        # An age field before the date of birth (no missing values in both)
+        #
+        age_dict = dict(attributes["sex"], name="age", char_range="digit")
+        age_dict.update(freq_file="age-freq.csv", select_prob=0)
+        for field_dict in [age_dict, attributes["date_of_birth"]]:
+            field_dict["sub_prob"] += field_dict["miss_prob"]
+            field_dict["miss_prob"] = 0
+        attr_dict = {}
+        for name, field_dict in attributes.items():
+            if name == "date_of_birth":
+                attr_dict["age"] = age_dict
+            attr_dict[name] = field_dict
+
+        def agreement(engine, attr_file_name):
+            df = duplicategenerator.DuplicateGen(
+                5000, 1, 1, 1, 1, "uniform", "typ", attr_file_name=attr_file_name,
+                engine=engine, seed=3,
+            ).generate("dataframe")
+            df = df[df.index.str.endswith("-org")]
+            return numpy.mean(
+                df["date_of_birth"].str[:4].astype(int)
+                == cf.current_year - df["age"].astype(int)
+            )
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            attr_file_name = os.path.join(tmp_dir, "attr_config_file.json")
+            with open(attr_file_name, "w") as config_file:
+                json.dump(dict(attr_data, attributes=attr_dict), config_file)
+
+            agreement_scalar = agreement("scalar", attr_file_name)
+            agreement_numpy = agreement("numpy", attr_file_name)
+
+        self.assertLess(agreement_scalar, 0.95)
+        self.assertAlmostEqual(agreement_scalar, agreement_numpy, delta=0.02)
+
+
+if __name__ == "__main__":
+    unittest.main()
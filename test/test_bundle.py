@@ -0,0 +1,96 @@
+import os
+import struct
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from duplicategenerator import bundle
+from duplicategenerator import cli
+from duplicategenerator import resources
+from duplicategenerator import utils
+
+
+class BundleTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.bundle_file = os.path.join(cls.tmp_dir.name, "test.bundle")
+        cls.contents = bundle.build_bundle(cls.bundle_file)
+
+    @classmethod
+    def tearDownClass(cls):
+        bundle._bundle_cache.pop(cls.bundle_file, None)
+        cls.tmp_dir.cleanup()
+
+    def load_table(self, kind, file_name):
+        file_name = resources.data_file_name(file_name)
+        return bundle.load_bundle_table(
+            kind, file_name, bundle.file_stamp(file_name), self.bundle_file
+        )
+
+    def test_contents(self):
+        bundled = set((kind, file_name) for (kind, file_name, num) in self.contents)
+        self.assertIn(("freq", "surname-freq.csv"), bundled)
+        self.assertIn(("lookup", "surname-lookup.tbl"), bundled)
+        self.assertIn(("config", "attr_config_file.example.json"), bundled)
+
+    def test_freq_table(self):
+        sampler = self.load_table("freq", "surname-freq.csv")
+        text_sampler = utils.load_frequency_file(resources.data_file_name("surname-freq.csv"))
+
+        self.assertEqual(sampler.values, text_sampler.values)
+        self.assertEqual(sampler.prob, text_sampler.prob)
+        self.assertEqual(sampler.alias, text_sampler.alias)
+        self.assertEqual(sampler.total, text_sampler.total)
+
+    def test_dict_tables(self):
+        for kind, file_name in [
+            ("misspell", "givenname-misspell.tbl"),
+            ("lookup", "title-sex-age-lookup-freq.tbl"),
+        ]:
+            text_table = resources.table_loaders[kind](resources.data_file_name(file_name))
+            self.assertEqual(
+                self.load_table(kind, file_name),
+                {key: tuple(values) for key, values in text_table.items()},
+            )
+
+    def test_config(self):
+        file_name = os.path.join(bundle.config_dir, "attr_config_file.example.json")
+        attr_data = bundle.load_bundle_config(
+            file_name, bundle.file_stamp(file_name), self.bundle_file
+        )
+        self.assertEqual(len(attr_data["attributes"]), 12)
+
+    # Tables of changed files and bundles of another version are not used
+    def test_stale(self):
+        file_name = resources.data_file_name("surname-freq.csv")
+        mtime_ns, size = bundle.file_stamp(file_name)
+        self.assertIsNone(
+            bundle.load_bundle_table("freq", file_name, (mtime_ns + 1, size), self.bundle_file)
+        )
+
+        old_file = os.path.join(self.tmp_dir.name, "old.bundle")
+        with open(self.bundle_file, "rb") as f:
+            bundle_data = bytearray(f.read())
+        bundle_data[len(bundle.bundle_magic) : len(bundle.bundle_magic) + 4] = struct.pack(
+            "<I", bundle.bundle_version + 1
+        )
+        with open(old_file, "wb") as f:
+            f.write(bundle_data)
+        self.assertIsNone(bundle.open_bundle(old_file))
+
+        self.assertIsNone(bundle.open_bundle(os.path.join(self.tmp_dir.name, "none.bundle")))
+
+    def test_command_line(self):
+        bundle_file = os.path.join(self.tmp_dir.name, "cli.bundle")
+        argv = ["duplicategenerator", "build_bundle", "--bundle_file", bundle_file]
+        with mock.patch.object(sys, "argv", argv), mock.patch("sys.stdout"):
+            cli.execute_from_command_line()
+
+        self.assertIsNotNone(bundle.open_bundle(bundle_file))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,6 @@
 import argparse
+import contextlib
+import io
 import logging
 import os
 import random
@@ -6,14 +8,62 @@ import sys
 import pandas
 import numpy
 import json
+import tempfile
 
 import unittest
+from unittest import mock
 import duplicategenerator
+from duplicategenerator import cli
 
 class DuplicateGenCommandLineTests(unittest.TestCase):
     
     def test_no_parameters(self):
         pass
+
+    def run_command_line(self, *args):
+        with mock.patch.object(sys, "argv", ["duplicategenerator"] + list(args)):
+            cli.execute_from_command_line()
+
+    # Test if the CSV file written chunk by chunk contains all records
+    def test_write_csv_in_chunks(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_file = os.path.join(tmp_dir, "output.csv")
+            self.run_command_line(
+                output_file, "25", "10", "1", "1", "1", "uniform", "typ",
+                "--chunk_size", "10",
+            )
+            df = pandas.read_csv(output_file, index_col = "rec_id", dtype = str)
+
+        self.assertEqual(len(df.index), 35)
+        self.assertTrue(df.index.is_unique)
+        self.assertNotIn("rec_id", list(df["culture"]))
+
+    # Test if the chunks generated by worker processes contain all records
+    def test_write_csv_with_workers(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_file = os.path.join(tmp_dir, "output.csv")
+            self.run_command_line(
+                output_file, "25", "10", "1", "1", "1", "uniform", "typ",
+                "--chunk_size", "10", "--workers", "2",
+            )
+            df = pandas.read_csv(output_file, index_col = "rec_id", dtype = str)
+
+        self.assertEqual(len(df.index), 35)
+        self.assertTrue(df.index.is_unique)
+
+    # Test if the statistics are printed as JSON
+    def test_stats(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_file = os.path.join(tmp_dir, "output.csv")
+            with contextlib.redirect_stdout(io.StringIO()) as stdout:
+                self.run_command_line(
+                    output_file, "25", "10", "1", "1", "1", "uniform", "typ",
+                    "--stats",
+                )
+
+        stats = json.loads(stdout.getvalue())
+        self.assertEqual(stats["stages"]["output"]["num_records"], 35)
+        self.assertIn("unique_collisions", stats["counters"])
     
 if __name__ =="__main__" :
-    unittest.main()
\ No newline at end of file
+    unittest.main()
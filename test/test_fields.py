@@ -0,0 +1,65 @@
+import pickle
+import random
+import unittest
+
+import duplicategenerator
+from duplicategenerator import fields
+
+
+class FieldPlanTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dupgen = duplicategenerator.DuplicateGen(
+            10, 10, 1, 1, 1, "uniform", "typ", culture="eng"
+        )
+        cls.field_plan = fields.compile_field_plan(
+            cls.dupgen.field_list,
+            cls.dupgen._load_frequency_lookup_tables(),
+            "eng",
+        )
+
+    def test_compile_field_plan(self):
+        self.assertEqual(
+            [field.name for field in self.field_plan],
+            [field_dict["name"] for field_dict in self.dupgen.field_list],
+        )
+        for field, field_dict in zip(self.field_plan, self.dupgen.field_list):
+            self.assertIs(type(field), fields.field_classes[field_dict["type"]])
+            self.assertFalse(hasattr(field, "__dict__"))
+
+    def test_create_value(self):
+        rng = random.Random(3)
+        for field in self.field_plan:
+            rec_dict = {}
+            value = field.create_value(rng, rec_dict)
+            self.assertIsInstance(value, str)
+            if field.name == "culture":
+                self.assertEqual(value, "eng")
+
+    def test_phone_bounds(self):
+        phone = [f for f in self.field_plan if isinstance(f, fields.PhoneField)][0]
+        self.assertEqual(phone.max_digit, int("9" * phone.num_digits))
+
+        value = phone.new_value(random.Random(1), None)
+        area_code, number = value.split(" ")
+        self.assertIn(area_code, phone.area_codes)
+        self.assertEqual(len(number), phone.num_digits)
+
+    def test_compile_swap_pairs(self):
+        self.assertEqual(
+            fields.compile_swap_pairs({("given_name", "surname"): 0.05}),
+            [(0.05, "given_name", "surname")],
+        )
+
+    # The fields are sent to the worker processes
+    def test_pickle(self):
+        field_plan = pickle.loads(pickle.dumps(self.field_plan))
+        self.assertEqual(
+            [field.create_value(random.Random(5), {}) for field in field_plan],
+            [field.create_value(random.Random(5), {}) for field in self.field_plan],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import random
+import unittest
+
+import numpy
+
+import duplicategenerator
+from duplicategenerator import fields
+from duplicategenerator import planner
+from duplicategenerator import typos
+from duplicategenerator import utils
+
+
+def create_generator(type_modification, engine="scalar", **kwargs):
+    params = dict(
+        num_org_records=300,
+        num_dup_records=250,
+        max_num_dups=5,
+        max_num_field_modifi=2,
+        max_num_record_modifi=3,
+        prob_distribution="uniform",
+        type_modification=type_modification,
+        engine=engine,
+        seed=5,
+    )
+    params.update(kwargs)
+    return duplicategenerator.DuplicateGen(**params)
+
+
+class DuplicatePlannerTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dupgen = create_generator("typ")
+        cls.freq_files = cls.dupgen._load_frequency_lookup_tables()
+        cls.field_plan = fields.compile_field_plan(cls.dupgen.field_list, cls.freq_files)
+        cls.org_records = [
+            {"culture": "eng", "sex": "f", "given_name": "mary jane", "surname": "smith",
+             "date_of_birth": "19700101", "phone_number": "0412345678"},
+            {"culture": "eng", "given_name": "peter", "surname": "o connor",
+             "date_of_birth": "19851231", "national_identifier": "12345678"},
+        ]
+
+    def modify(self, error_type, max_num_field_modifi=2, max_num_record_modifi=3, num=500):
+        dup_planner = planner.DuplicatePlanner(
+            self.field_plan,
+            fields.compile_swap_pairs(self.dupgen.field_swap_prob),
+            max_num_field_modifi,
+            max_num_record_modifi,
+            utils.TransformationCache(),
+            typos.TypoKernel(),
+            random.Random(1),
+            numpy.random.default_rng(1),
+        )
+        org_records = self.org_records * (num // 2)
+        dup_batch = planner.DuplicateBatch(
+            planner.records_to_values(org_records, dup_planner.field_names),
+            dup_planner.field_names,
+            [planner.error_codes[error_type]] * len(org_records),
+        )
+        dup_planner.modify(dup_batch)
+        return org_records, dup_batch
+
+    def test_limits(self):
+        for max_field, max_rec in [(1, 1), (1, 3), (2, 2), (2, 4)]:
+            org_records, dup_batch = self.modify("typ", max_field, max_rec)
+
+            self.assertTrue((dup_batch.num_modif <= max_rec).all())
+            self.assertTrue(dup_batch.done.any() or (dup_batch.num_modif == max_rec).all())
+            if max_rec == 1:
+                self.assertTrue((dup_batch.field_counts <= max_field).all())
+
+            # Each duplicate differs from its original in at most the
+            # maximal number of fields
+            #
+            for org_rec, dup_rec in zip(org_records, dup_batch.records()):
+                num_diff = sum(
+                    org_rec.get(name) != dup_rec.get(name) for name in dup_batch.field_names
+                )
+                self.assertLessEqual(num_diff, max_rec)
+
+    def test_error_types(self):
+        for error_type in ["typ", "pho", "ocr"]:
+            org_records, dup_batch = self.modify(error_type)
+            num_changed = sum(
+                org_rec != dup_rec for org_rec, dup_rec in zip(org_records, dup_batch.records())
+            )
+            self.assertGreater(num_changed, len(org_records) * 0.9, msg=error_type)
+
+    def test_records(self):
+        field_names = ["surname", "sex", "suburb"]
+        org_values = planner.records_to_values(self.org_records, field_names)
+        self.assertEqual(org_values[1].tolist(), ["o connor", None, None])
+
+        dup_batch = planner.DuplicateBatch(org_values, field_names, [0, 0])
+        self.assertEqual(
+            dup_batch.records(), [{"surname": "smith", "sex": "f"}, {"surname": "o connor"}]
+        )
+
+    def test_spaces(self):
+        rng = random.Random(1)
+        for i in range(100):
+            new_value = planner.insert_space(" peter ", rng)
+            self.assertEqual(new_value.replace(" ", ""), "peter")
+            self.assertNotIn("  ", new_value)
+            self.assertFalse(new_value.startswith(" ") or new_value.endswith(" "))
+
+        self.assertEqual(planner.delete_space("o connor smith"), "oconnor smith")
+
+
+class NumpyEngineDuplicateTests(unittest.TestCase):
+
+    def test_duplicates(self):
+        for type_modification in ["typ", "pho", "ocr", "all"]:
+            dupgen = create_generator(type_modification, engine="numpy")
+            df = dupgen.generate("dataframe")
+
+            self.assertEqual(len(df), 550, msg=type_modification)
+            self.assertTrue(df.index.is_unique)
+
+            # The duplicates of each original record are numbered from zero
+            #
+            dup_ids = df.index[df.index.str.contains("-dup-")].str.split("-")
+            dup_nums = {}
+            for rec_id in dup_ids:
+                dup_nums.setdefault(rec_id[1], []).append(int(rec_id[3]))
+            for nums in dup_nums.values():
+                self.assertEqual(sorted(nums), list(range(len(nums))))
+                self.assertLessEqual(len(nums), 5)
+
+            self.assertFalse(df.fillna("").duplicated().any())
+
+    def test_seed(self):
+        df_a = create_generator("all", engine="numpy").generate("dataframe")
+        df_b = create_generator("all", engine="numpy").generate("dataframe")
+        self.assertTrue(df_a.equals(df_b))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+import duplicategenerator
+from duplicategenerator import resources
+from duplicategenerator import utils
+
+
+class ResourceTests(unittest.TestCase):
+
+    def test_load_table(self):
+        misspell_dict = resources.load_table("misspell", "surname-misspell.tbl")
+        self.assertIs(resources.load_table("misspell", "surname-misspell.tbl"), misspell_dict)
+        self.assertEqual(
+            misspell_dict,
+            {
+                key: tuple(values)
+                for key, values in utils.load_misspellings_dict(
+                    resources.data_file_name("surname-misspell.tbl")
+                ).items()
+            },
+        )
+        with self.assertRaises(TypeError):
+            misspell_dict["smith"] = ("smyth",)
+        self.assertEqual(pickle.loads(pickle.dumps(misspell_dict)), misspell_dict)
+
+        with self.assertRaises(ValueError):
+            resources.load_table("unknown", "surname-misspell.tbl")
+
+    # Generators share the tables
+    def test_shared_tables(self):
+        dupgen_a = duplicategenerator.DuplicateGen(10, 10, 1, 1, 1, "uniform", "typ")
+        dupgen_b = duplicategenerator.DuplicateGen(10, 10, 1, 1, 1, "uniform", "typ")
+        freq_files_a = dupgen_a._load_frequency_lookup_tables()
+        freq_files_b = dupgen_b._load_frequency_lookup_tables()
+        self.assertIs(freq_files_a["surname"], freq_files_b["surname"])
+
+        table_info = {
+            (info["kind"], os.path.basename(info["file_name"])): info
+            for info in resources.table_info()
+        }
+        info = table_info[("freq", "surname-freq.csv")]
+        self.assertEqual(info["num_entries"], len(freq_files_a["surname"]))
+        self.assertGreater(info["size"], 0)
+        self.assertGreaterEqual(info["hits"], 1)
+
+    def test_changed_file(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_name = os.path.join(tmp_dir, "test-freq.csv")
+            with open(file_name, "w") as freq_file:
+                freq_file.write("a,1\nb,2\n")
+            sampler = resources.load_table("freq", file_name)
+            self.assertEqual(sampler.values, ["a", "b"])
+
+            with open(file_name, "w") as freq_file:
+                freq_file.write("a,1\nb,2\nc,3\n")
+            file_stat = os.stat(file_name)
+            os.utime(file_name, ns=(file_stat.st_atime_ns, file_stat.st_mtime_ns + 10**9))
+
+            self.assertEqual(resources.load_table("freq", file_name).values, ["a", "b", "c"])
+
+
+if __name__ == "__main__":
+    unittest.main()
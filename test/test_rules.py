@@ -0,0 +1,81 @@
+import os
+import unittest
+
+from duplicategenerator import rules
+from duplicategenerator import utils
+
+
+def load_freq_values(file_name):
+    this_dir = os.path.dirname(utils.__file__)
+    values = []
+    with open(os.path.join(this_dir, "data", file_name)) as fin:
+        for line in fin:
+            values.append(line.split(",")[0].strip())
+    return values
+
+
+class RuleSetTests(unittest.TestCase):
+
+    def test_rule_set_loaded_once(self):
+        rule_set = rules.load_rule_set(utils.rules_file_name("pho"))
+        self.assertIs(rule_set, rules.load_rule_set(utils.rules_file_name("pho")))
+        self.assertEqual(len(rule_set), 356)
+
+    def test_invalid_transformation_type(self):
+        with self.assertRaises(ValueError):
+            utils.get_transformation("smith", "typ")
+
+    def test_empty_value(self):
+        self.assertEqual(utils.get_transformation("", "pho"), "")
+        self.assertEqual(utils.get_transformation_changes("", "pho"), [])
+
+    def test_no_change(self):
+        self.assertEqual(utils.get_transformation_changes("5", "pho"), [""])
+
+    def test_pattern_index_overlapping(self):
+        index = rules.PatternIndex(["a", "aa", "ab", "b"])
+        self.assertEqual(
+            index.find_all("aaab"), {0: [0, 1, 2], 1: [0, 1], 2: [2], 3: [3]}
+        )
+        self.assertEqual(index.find_all("xyz"), {})
+
+    def test_transformation_cache(self):
+        cache = utils.TransformationCache(2)
+        self.assertEqual(
+            cache.get_changes("smith", "pho"),
+            utils.get_transformation_changes("smith", "pho"),
+        )
+        cache.get_changes("smith", "pho")
+        cache.get_changes("smith", "ocr")
+        cache.get_changes("jones", "pho")  # Evicts ("smith", "pho")
+        cache.get_changes("smith", "pho")
+        self.assertEqual(
+            cache.info(),
+            {"hits": 1, "misses": 4, "evictions": 2, "size": 2, "max_size": 2},
+        )
+
+    def test_transformation_cache_disabled(self):
+        cache = utils.TransformationCache(0)
+        cache.get_changes("smith", "pho")
+        cache.get_changes("smith", "pho")
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.info()["misses"], 2)
+
+    # The indexed rules must give the same changes (and thus the same modified
+    # values) as the original rule scan for all names in the frequency files
+    def test_same_as_scan(self):
+        values = load_freq_values("surname-freq.csv")
+        values += load_freq_values("givenname-freq.csv")
+
+        for t in ["pho", "ocr"]:
+            for value in values:
+                scan_str = utils._get_transformation_scan(value, t)
+                self.assertEqual(utils.get_transformation(value, t), scan_str)
+
+                scan_changes = scan_str.split(",")[1][:-1].split(";")
+                changes = utils.get_transformation_changes(value, t)
+                self.assertEqual(changes, scan_changes)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import copy
+import json
+import os
+import tempfile
+import unittest
+
+import duplicategenerator
+from duplicategenerator import config as cf
+from duplicategenerator import schema
+
+
+class SchemaTests(unittest.TestCase):
+
+    def test_parse_date(self):
+        self.assertEqual(schema.parse_date("(1,1,1900)"), (1, 1, 1900))
+        self.assertEqual(schema.parse_date("( 31, 12 ,1999 )"), (31, 12, 1999))
+        self.assertEqual(schema.parse_date([31, 12, 1999]), (31, 12, 1999))
+        for value in ["(1,13,1900)", "1,1,1900", "__import__('os')", [1, 2], 19000101]:
+            with self.assertRaises(ValueError):
+                schema.parse_date(value)
+
+    def test_parse_field_pair(self):
+        self.assertEqual(
+            schema.parse_field_pair("('given_name','surname')"), ("given_name", "surname")
+        )
+        self.assertEqual(
+            schema.parse_field_pair('( "given_name", "surname" )'),
+            ("given_name", "surname"),
+        )
+        for value in ["('given_name')", "('a','b','c')", "exit()", ("a",)]:
+            with self.assertRaises(ValueError):
+                schema.parse_field_pair(value)
+
+    def test_parse_attr_config(self):
+        attr_data = schema.parse_attr_config(cf.DEFAULT_ATTR_CONFIG)
+
+        self.assertEqual(
+            attr_data["field_swap_prob"],
+            {("address_1", "address_2"): 0.02, ("given_name", "surname"): 0.05},
+        )
+        self.assertEqual(attr_data["attributes"]["date_of_birth"]["start_date"], (1, 1, 1900))
+        self.assertIsInstance(cf.DEFAULT_ATTR_CONFIG["attributes"]["date_of_birth"]["start_date"], str)
+
+    def test_invalid_attr_config(self):
+        def invalid_config(change):
+            attr_data = copy.deepcopy(cf.DEFAULT_ATTR_CONFIG)
+            change(attr_data)
+            return attr_data
+
+        for change in [
+            lambda d: d.pop("single_typo_prob"),
+            lambda d: d.update(extra_section={}),
+            lambda d: d["attributes"]["sex"].update(sleect_prob=0.1),
+            lambda d: d["attributes"]["sex"].update(miss_prob=1.5),
+            lambda d: d["attributes"]["sex"].update(miss_prob="0.1"),
+            lambda d: d["attributes"]["phone_number"].update(num_digits="8"),
+            lambda d: d["field_swap_prob"].update({"('sex','unknown')": 0.1}),
+            lambda d: d["error_type_distribution"].update(abc=0.1),
+        ]:
+            with self.assertRaises(ValueError):
+                schema.parse_attr_config(invalid_config(change))
+
+    def test_attr_file(self):
+        attr_data = copy.deepcopy(cf.DEFAULT_ATTR_CONFIG)
+        attr_data["attributes"]["date_of_birth"]["end_date"] = "print('x')"
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            attr_file_name = os.path.join(tmp_dir, "attr_config.json")
+            with open(attr_file_name, "w") as json_file:
+                json.dump(attr_data, json_file)
+
+            with self.assertRaises(ValueError):
+                duplicategenerator.DuplicateGen(
+                    10, 10, 1, 1, 1, "uniform", "typ", attr_file_name=attr_file_name
+                )
+
+    def test_load_attr_config(self):
+        attr_data = schema.load_attr_config()
+        self.assertIs(schema.load_attr_config(), attr_data)
+        with self.assertRaises(TypeError):
+            attr_data["attributes"]["sex"]["select_prob"] = 0.5
+
+        # Generators change their own copies, never the cached configuration
+        #
+        dupgen_a = duplicategenerator.DuplicateGen(10, 10, 1, 1, 1, "uniform", "typ")
+        dupgen_b = duplicategenerator.DuplicateGen(10, 10, 1, 1, 1, "uniform", "typ")
+        select_prob = attr_data["attributes"]["sex"]["select_prob"]
+        for field_dict in dupgen_a.field_list:
+            field_dict["select_prob"] = 0.5
+        self.assertEqual(attr_data["attributes"]["sex"]["select_prob"], select_prob)
+        self.assertNotIn(0.5, [field_dict["select_prob"] for field_dict in dupgen_b.field_list])
+
+        # A changed file is loaded again
+        #
+        file_data = copy.deepcopy(cf.DEFAULT_ATTR_CONFIG)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            attr_file_name = os.path.join(tmp_dir, "attr_config.json")
+            with open(attr_file_name, "w") as json_file:
+                json.dump(file_data, json_file)
+            file_config = schema.load_attr_config(attr_file_name)
+            self.assertIs(schema.load_attr_config(attr_file_name), file_config)
+
+            file_data["single_typo_prob"]["same_row"] = 0.25
+            with open(attr_file_name, "w") as json_file:
+                json.dump(file_data, json_file)
+            file_stat = os.stat(attr_file_name)
+            os.utime(attr_file_name, ns=(file_stat.st_atime_ns, file_stat.st_mtime_ns + 10**9))
+
+            self.assertEqual(
+                schema.load_attr_config(attr_file_name)["single_typo_prob"]["same_row"], 0.25
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
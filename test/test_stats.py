@@ -0,0 +1,77 @@
+import json
+import unittest
+
+import duplicategenerator
+from duplicategenerator import stats
+
+
+class GenerationStatsTests(unittest.TestCase):
+
+    def test_merge(self):
+        stats_a = stats.GenerationStats()
+        stats_a.num_records["originals"] = 10
+        stats_a.wall_time["originals"] = 2.0
+        stats_a.wall_time["tables"] = 1.0
+        stats_a.counters["unique_collisions"] = 1
+        stats_a.op_applied["sub_prob"] += 3
+
+        stats_b = stats.GenerationStats()
+        stats_b.num_records["originals"] = 30
+        stats_b.wall_time["originals"] = 2.0
+        stats_b.op_applied["sub_prob"] += 1
+        stats_b.op_noops["pho_prob"] += 2
+
+        stats_a.merge(stats_b)
+        stats_dict = stats_a.as_dict()
+
+        originals = stats_dict["stages"]["originals"]
+        self.assertEqual(originals["num_records"], 40)
+        self.assertAlmostEqual(originals["records_per_second"], 10.0)
+        self.assertIsNone(stats_dict["stages"]["tables"]["records_per_second"])
+        self.assertNotIn("duplicates", stats_dict["stages"])
+        self.assertEqual(stats_dict["counters"]["unique_collisions"], 1)
+        self.assertEqual(
+            stats_dict["modifications"],
+            {"pho": {"applied": 0, "noops": 2}, "sub": {"applied": 4, "noops": 0}},
+        )
+        self.assertEqual(json.loads(stats_a.to_json()), stats_dict)
+
+    def test_stage(self):
+        generation_stats = stats.GenerationStats()
+        with generation_stats.stage("tables"):
+            sum(range(100000))
+        self.assertGreater(generation_stats.wall_time["tables"], 0.0)
+        self.assertGreater(generation_stats.cpu_time["tables"], 0.0)
+
+    # The statistics of generate() are the ones of the dataset created
+    def test_generate(self):
+        for engine, workers in [("scalar", 1), ("numpy", 1), ("scalar", 2)]:
+            dupgen = duplicategenerator.DuplicateGen(
+                60, 40, 3, 2, 3, "uniform", "all", culture="eng", engine=engine, seed=2
+            )
+            df = dupgen.generate("dataframe", workers=workers)
+            num_records = dupgen.generation_stats.num_records
+
+            self.assertEqual(num_records["output"], len(df))
+            self.assertEqual(num_records["merging"], len(df))
+            self.assertEqual(num_records["originals"] + num_records["duplicates"], len(df))
+
+            op_applied = dupgen.generation_stats.op_applied
+            self.assertGreater(sum(op_applied.values()), 40, msg=engine)
+            for stage_name in ["tables", "originals", "duplicates"]:
+                self.assertGreater(dupgen.generation_stats.wall_time[stage_name], 0.0)
+
+    # Without worker processes generate_iter() does not merge the chunks
+    def test_generate_iter_no_merging(self):
+        dupgen = duplicategenerator.DuplicateGen(
+            20, 10, 1, 1, 1, "uniform", "typ", culture="eng", seed=2
+        )
+        for _ in dupgen.generate_iter(10):
+            pass
+        stages = dupgen.generation_stats.as_dict()["stages"]
+        self.assertEqual(stages["duplicates"]["num_records"], 10)
+        self.assertNotIn("merging", stages)
+
+
+if __name__ == "__main__":
+    unittest.main()
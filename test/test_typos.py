@@ -0,0 +1,103 @@
+import collections
+import random
+import unittest
+
+import numpy
+
+from duplicategenerator import typos
+from duplicategenerator import utils
+
+
+class TypoKernelTests(unittest.TestCase):
+
+    def setUp(self):
+        self.kernel = typos.TypoKernel()
+        self.rng = numpy.random.default_rng(1)
+
+    def apply(self, values, op, positions, char_range="alpha"):
+        ops = [typos.op_codes[op]] * len(values)
+        return self.kernel.apply(values, ops, positions, char_range, self.rng)
+
+    def test_codes(self):
+        values = ["smith", "", "jo", "bérénice"]
+        codes, lengths = typos.strings_to_codes(values)
+        self.assertEqual(lengths.tolist(), [5, 0, 2, 8])
+        self.assertEqual(typos.codes_to_strings(codes), values)
+        self.assertEqual(typos.strings_to_codes([])[1].tolist(), [])
+
+    def test_operations(self):
+        values = ["smith", "jo", "a", ""]
+
+        self.assertEqual(
+            self.apply(values, "del_prob", [1, 1, 0, -1]), ["sith", "j", "a", ""]
+        )
+        self.assertEqual(
+            self.apply(values, "trans_prob", [3, 0, 0, -1]), ["smiht", "oj", "a", ""]
+        )
+
+        inserted = self.apply(values, "ins_prob", [5, 0, 1, -1])
+        self.assertEqual([len(value) for value in inserted], [6, 3, 2, 0])
+        self.assertEqual(inserted[0][:5], "smith")
+        self.assertEqual(inserted[1][1:], "jo")
+
+        substituted = self.apply(values, "sub_prob", [0, 1, 0, -1])
+        self.assertEqual(substituted[0][1:], "mith")
+        self.assertNotEqual(substituted[0][0], "s")
+        self.assertEqual(substituted[3], "")
+
+    def test_mixed_operations(self):
+        values = ["peter", "peter", "peter", "peter", "peter"]
+        ops = [typos.no_op] + [
+            typos.op_codes[op] for op in ["del_prob", "trans_prob", "ins_prob", "sub_prob"]
+        ]
+        new_values = self.kernel.apply(values, ops, [2] * 5, "alpha", self.rng)
+
+        self.assertEqual(new_values[:3], ["peter", "peer", "peetr"])
+        self.assertEqual(len(new_values[3]), 6)
+        self.assertEqual(len(new_values[4]), 5)
+
+    def test_char_range(self):
+        for char_range, chars in typos.range_chars.items():
+            new_values = self.apply(["12345"] * 200, "sub_prob", [2] * 200, char_range)
+            self.assertTrue(all(value[2] in chars for value in new_values))
+            self.assertTrue(all(value[2] != "3" for value in new_values))
+
+    # The new characters follow the distribution of 'utils.error_character'
+    def test_substitute_distribution(self):
+        num = 20000
+        for char_range, char in [
+            ("alpha", "d"), ("alphanum", "5"), ("digit", "5"), ("alpha", "é")
+        ]:
+            batch_chars = collections.Counter(
+                chr(code)
+                for code in self.kernel.substitute_chars(
+                    numpy.full(num, ord(char)), char_range, self.rng
+                )
+            )
+            rng = random.Random(1)
+            scalar_chars = collections.Counter(
+                utils.error_character(char, char_range, rng) for i in range(num)
+            )
+            for new_char in set(batch_chars) | set(scalar_chars):
+                self.assertAlmostEqual(
+                    batch_chars[new_char] / num, scalar_chars[new_char] / num, delta=0.02
+                )
+
+    def test_typo_prob(self):
+        kernel = typos.TypoKernel({"same_row": 1.0, "same_col": 0.0})
+        new_chars = kernel.substitute_chars(numpy.full(100, ord("a")), "alpha", self.rng)
+        self.assertEqual(set(new_chars.tolist()), {ord("s")})
+
+    def test_error_positions(self):
+        lengths = numpy.array([0, 1, 2, 7, 7] * 200)
+        positions = typos.error_positions(lengths, 0, self.rng)
+        self.assertTrue((positions[lengths == 0] == -1).all())
+        self.assertTrue((positions[lengths > 0] >= 0).all())
+        self.assertTrue((positions < numpy.maximum(lengths, 1)).all())
+
+        positions = typos.error_positions(lengths, 1, self.rng)
+        self.assertTrue((positions[lengths > 0] <= lengths[lengths > 0]).all())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+from unittest import mock
+
+from duplicategenerator import uniqueness
+
+
+def record(i):
+    return {"given_name": "name%i" % (i), "surname": "smith", "age": str(i % 90)}
+
+
+class RecordIndexTests(unittest.TestCase):
+
+    def test_add(self):
+        for name in uniqueness.index_names:
+            index = uniqueness.create_index(name)
+            self.assertTrue(index.add(record(1)), msg=name)
+            self.assertTrue(index.add(record(2)), msg=name)
+            self.assertFalse(index.add(record(1)), msg=name)
+            # Same fields and values in another order
+            self.assertFalse(
+                index.add({"age": "1", "surname": "smith", "given_name": "name1"}),
+                msg=name,
+            )
+            self.assertEqual(len(index), 2, msg=name)
+
+    def test_invalid_index(self):
+        with self.assertRaises(ValueError):
+            uniqueness.create_index("list")
+
+    # All records must still be found after the table has been resized
+    def test_resize(self):
+        index = uniqueness.RecordHashIndex(capacity=8)
+        with mock.patch.object(uniqueness, "resize_block_size", 64):
+            for i in range(5000):
+                self.assertTrue(index.add(record(i)))
+
+        self.assertGreater(index.capacity, 5000)
+        self.assertEqual(index.nbytes, 16 * index.capacity)
+        for i in range(5000):
+            self.assertIn(record(i), index)
+            self.assertFalse(index.add(record(i)))
+        self.assertNotIn(record(5000), index)
+
+    # Different records with the same hash are only kept apart when verified
+    def test_hash_collision(self):
+        with mock.patch.object(uniqueness, "record_hash", return_value=(1, 2)):
+            index = uniqueness.RecordHashIndex()
+            self.assertTrue(index.add(record(1)))
+            self.assertFalse(index.add(record(2)))
+
+            index = uniqueness.RecordHashIndex(verify=True)
+            self.assertTrue(index.add(record(1)))
+            self.assertTrue(index.add(record(2)))
+            self.assertFalse(index.add(record(2)))
+            self.assertEqual(index.num_collisions, 1)
+            self.assertEqual(len(index), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
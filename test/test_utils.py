@@ -0,0 +1,184 @@
+import collections
+import os
+import random
+import unittest
+
+import numpy
+
+from duplicategenerator import utils
+
+
+class FrequencySamplerTests(unittest.TestCase):
+
+    # The alias table must give back the exact probabilities of all values
+    def test_alias_table(self):
+        weights = [5, 1, 0, 3, 11]
+        prob, alias = utils.build_alias_table(weights)
+
+        n = len(weights)
+        sample_prob = [0.0] * n
+        for i in range(n):
+            sample_prob[i] += prob[i] / n
+            sample_prob[alias[i]] += (1.0 - prob[i]) / n
+
+        for i in range(n):
+            self.assertAlmostEqual(sample_prob[i], weights[i] / float(sum(weights)))
+
+    def test_alias_table_no_weights(self):
+        with self.assertRaises(ValueError):
+            utils.build_alias_table([0, 0])
+
+    def test_sample(self):
+        random.seed(1)
+        sampler = utils.FrequencySampler(["a", "b", "c"], [1, 0, 3])
+        counts = collections.Counter(sampler.sample() for i in range(20000))
+
+        self.assertEqual(set(counts), {"a", "c"})
+        self.assertAlmostEqual(counts["c"] / 20000.0, 0.75, delta=0.02)
+
+    def test_load_frequency_file(self):
+        this_dir = os.path.dirname(utils.__file__)
+        sampler = utils.load_frequency_file(
+            os.path.join(this_dir, "data", "sex-freq.csv")
+        )
+        self.assertEqual(sorted(sampler.values), ["f", "m"])
+        self.assertEqual(sampler.total, 60)
+
+
+class DiscreteSamplerTests(unittest.TestCase):
+
+    prob_list = [(1, 0.0), (2, 0.5), (3, 0.5), (4, 0.8)]
+
+    # Same distribution as the list form used by random_select
+    def test_from_prob_list(self):
+        sampler = utils.DiscreteSampler.from_prob_list(self.prob_list)
+        self.assertEqual(sampler.prob_list, self.prob_list)
+
+        rng = random.Random(3)
+        counts = collections.Counter(sampler.sample(rng) for i in range(20000))
+        list_counts = collections.Counter(
+            utils.random_select(self.prob_list, rng) for i in range(20000)
+        )
+
+        self.assertNotIn(2, counts)
+        for value in [1, 3, 4]:
+            self.assertAlmostEqual(
+                counts[value] / 20000.0, list_counts[value] / 20000.0, delta=0.02
+            )
+
+    def test_prob_list(self):
+        sampler = utils.DiscreteSampler(["a", "b", "c"], [2, 0, 6])
+        self.assertEqual([value for (value, p) in sampler.prob_list], ["a", "b", "c"])
+        for (value, p), expected in zip(sampler.prob_list, [0.0, 0.25, 0.25]):
+            self.assertAlmostEqual(p, expected)
+
+    def test_sample_array(self):
+        sampler = utils.DiscreteSampler([("a", 1), ("b", 2)], [1, 3])
+        values = sampler.sample_array(20000, numpy.random.default_rng(5))
+
+        self.assertEqual(values.shape, (20000,))
+        self.assertEqual(set(values.tolist()), {("a", 1), ("b", 2)})
+        self.assertAlmostEqual(
+            numpy.mean([value == ("b", 2) for value in values]), 0.75, delta=0.02
+        )
+
+
+class DynamicSamplerTests(unittest.TestCase):
+
+    def sample_freqs(self, sampler, num=20000):
+        rng = random.Random(2)
+        counts = collections.Counter(sampler.sample(rng) for i in range(num))
+        return {value: count / float(num) for value, count in counts.items()}
+
+    # Removed values are never selected, the others keep their proportions
+    def test_remove(self):
+        values = ["a", "b", "c", "d", "e", "f", "g"]
+        sampler = utils.DynamicSampler(values, [1, 2, 0, 3, 2, 1, 1])
+        self.assertAlmostEqual(sampler.total(), 10.0)
+        self.assertEqual(sampler.num_left, 6)
+
+        sampler.remove(3)
+        sampler.remove(0)
+        sampler.remove(2)
+        self.assertAlmostEqual(sampler.total(), 6.0)
+        self.assertEqual(sampler.num_left, 4)
+
+        freqs = self.sample_freqs(sampler)
+        self.assertEqual(set(freqs), {"b", "e", "f", "g"})
+        for value, weight in [("b", 2), ("e", 2), ("f", 1), ("g", 1)]:
+            self.assertAlmostEqual(freqs[value], weight / 6.0, delta=0.02)
+
+    def test_reset(self):
+        sampler = utils.DynamicSampler(["a", "b"], [1, 3])
+        sampler.remove(1)
+        self.assertEqual(set(self.sample_freqs(sampler, 100)), {"a"})
+
+        sampler.remove(0)
+        self.assertEqual(sampler.num_left, 0)
+        with self.assertRaises(ValueError):
+            sampler.sample()
+
+        sampler.reset()
+        self.assertEqual(sampler.num_left, 2)
+        self.assertAlmostEqual(self.sample_freqs(sampler)["b"], 0.75, delta=0.02)
+
+
+class ErrorCharacterTests(unittest.TestCase):
+
+    def test_error_character(self):
+        rng = random.Random(1)
+        for char_range, chars in [
+            ("digit", "0123456789"),
+            ("alpha", "abcdefghijklmnopqrstuvwxyz"),
+            ("alphanum", "abcdefghijklmnopqrstuvwxyz0123456789"),
+        ]:
+            for input_char in ["a", "5", "é", "Z", " "]:
+                for i in range(20):
+                    new_char = utils.error_character(input_char, char_range, rng)
+                    self.assertIn(new_char, chars)
+
+    def test_typo_prob(self):
+        rng = random.Random(1)
+        typo_prob = {"same_row": 0.0, "same_col": 1.0}
+        new_chars = set(utils.error_character("a", "alpha", rng, typo_prob) for i in range(50))
+        self.assertEqual(new_chars, set(utils.keyboard_cols["a"]))
+
+
+class RecordIdTests(unittest.TestCase):
+
+    def test_record_ids(self):
+        rec_ids = utils.record_ids([5, 5, 12], [-1, 1, 0])
+        self.assertEqual(rec_ids, ["rec-5-org", "rec-5-dup-1", "rec-12-dup-0"])
+        self.assertEqual(utils.record_id(5, 1), "rec-5-dup-1")
+
+        org_nums, dup_nums = utils.parse_record_ids(rec_ids)
+        self.assertEqual(org_nums.tolist(), [5, 5, 12])
+        self.assertEqual(dup_nums.tolist(), [-1, 1, 0])
+
+
+class TrueLinkPairsTests(unittest.TestCase):
+
+    def test_true_link_pairs(self):
+        link_org, link_a, link_b = utils.true_link_pairs([7, 2, 7, 7], [1, 0, 0, 2])
+
+        self.assertEqual(
+            list(zip(link_org.tolist(), link_a.tolist(), link_b.tolist())),
+            [(2, -1, 0), (7, -1, 0), (7, -1, 1), (7, -1, 2),
+             (7, 0, 1), (7, 0, 2), (7, 1, 2)],
+        )
+
+    def test_group_pairs(self):
+        first_pos, second_pos = utils.group_pairs([3, 1, 3, 2, 3])
+
+        self.assertEqual(
+            sorted(zip(first_pos.tolist(), second_pos.tolist())),
+            [(0, 2), (0, 4), (2, 4)],
+        )
+
+    def test_no_duplicates(self):
+        link_org, link_a, link_b = utils.true_link_pairs([], [])
+        self.assertEqual(len(link_org), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas
+
+import duplicategenerator
+from duplicategenerator import cli
+from duplicategenerator import writers
+
+
+def write_output_file(tmp_dir, file_format, options=()):
+    output_file = os.path.join(tmp_dir, "output." + file_format)
+    argv = [
+        "duplicategenerator", output_file, "25", "10", "1", "1", "1", "uniform",
+        "typ", "--chunk_size", "10", "--format", file_format, "--seed", "3",
+    ] + list(options)
+    with mock.patch.object(sys, "argv", argv):
+        cli.execute_from_command_line()
+    return output_file
+
+
+class WriterTests(unittest.TestCase):
+
+    def test_invalid_format(self):
+        with self.assertRaises(ValueError):
+            writers.open_writer("output.xml", "xml")
+
+    def test_jsonl(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with open(write_output_file(tmp_dir, "jsonl"), encoding="utf-8") as fin:
+                records = [json.loads(line) for line in fin]
+
+        self.assertEqual(len(records), 35)
+        self.assertEqual(len(set(rec_dict["rec_id"] for rec_dict in records)), 35)
+
+    @unittest.skipIf(writers.pyarrow is None, "pyarrow is not installed")
+    def test_parquet_and_arrow(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            df_csv = pandas.read_csv(
+                write_output_file(tmp_dir, "csv"), index_col="rec_id", dtype=str
+            )
+            table_parquet = writers.pyarrow.parquet.read_table(
+                write_output_file(tmp_dir, "parquet")
+            )
+            with writers.pyarrow.ipc.open_stream(
+                write_output_file(tmp_dir, "arrow")
+            ) as reader:
+                table_arrow = reader.read_all()
+
+        for table in [table_parquet, table_arrow]:
+            df = table.to_pandas().set_index("rec_id").astype(object)
+            df = df.where(df.notna(), None)
+            self.assertEqual(list(df.columns), list(df_csv.columns))
+            self.assertEqual(
+                df.to_csv(), df_csv.where(df_csv.notna(), None).to_csv()
+            )
+
+        self.assertTrue(
+            writers.pyarrow.types.is_dictionary(table_arrow.schema.field("sex").type)
+        )
+        self.assertFalse(
+            writers.pyarrow.types.is_dictionary(table_arrow.schema.field("surname").type)
+        )
+
+    @unittest.skipIf(writers.pyarrow is None, "pyarrow is not installed")
+    def test_generate_arrow(self):
+        table = duplicategenerator.DuplicateGen(
+            20, 10, 1, 1, 1, "uniform", "typ", seed=1
+        ).generate("arrow")
+
+        self.assertEqual(table.num_rows, 30)
+        self.assertEqual(table.column_names[0], "rec_id")
+        self.assertTrue(writers.pyarrow.types.is_dictionary(table.schema.field("culture").type))
+
+    def test_true_links(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_file = os.path.join(tmp_dir, "output.csv")
+            links_file = os.path.join(tmp_dir, "links.csv")
+            argv = [
+                "duplicategenerator", output_file, "20", "30", "4", "1", "1", "zip",
+                "typ", "--chunk_size", "10", "--seed", "3",
+                "--true_links_file", links_file,
+            ]
+            with mock.patch.object(sys, "argv", argv):
+                cli.execute_from_command_line()
+
+            df = pandas.read_csv(output_file, index_col="rec_id", dtype=str)
+            df_links = pandas.read_csv(links_file)
+
+        self.assertEqual(list(df_links.columns), writers.link_columns)
+
+        def rec_id(org_num, dup_num):
+            if dup_num < 0:
+                return "rec-%i-org" % (org_num)
+            return "rec-%i-dup-%i" % (org_num, dup_num)
+
+        links = set(
+            frozenset([rec_id(org_num, dup_num_a), rec_id(org_num, dup_num_b)])
+            for org_num, dup_num_a, dup_num_b in df_links.itertuples(index=False)
+        )
+        true_links = duplicategenerator.DuplicateGen(
+            10, 10, 1, 1, 1, "uniform", "typ"
+        ).generate_true_links(df)
+
+        self.assertEqual(len(links), len(df_links))
+        self.assertEqual(links, set(frozenset(link) for link in true_links))
+        self.assertTrue((df_links["dup_num_a"] >= 0).any())  # Duplicate pairs
+
+
+if __name__ == "__main__":
+    unittest.main()